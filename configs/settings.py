@@ -48,6 +48,41 @@ class Settings:
     MAX_OPEN_DAY_POSITIONS = int(os.getenv("MAX_OPEN_DAY_POSITIONS", "100"))   # Unlimited
     MAX_PORTFOLIO_RISK_PERCENT = float(os.getenv("MAX_PORTFOLIO_RISK_PERCENT", "25.0"))
 
+    # Scan Coalescing (Dashboard /scan serves results younger than this)
+    SCAN_CACHE_SECONDS = float(os.getenv("SCAN_CACHE_SECONDS", "60"))
+    SCAN_STORE_KEEP = int(os.getenv("SCAN_STORE_KEEP", "20"))  # Versioned snapshots retained for /scan/latest diffs
+    NEWS_CACHE_SECONDS = float(os.getenv("NEWS_CACHE_SECONDS", "900"))  # Per-symbol headline cache
+    BAR_FETCH_CHUNK = int(os.getenv("BAR_FETCH_CHUNK", "50"))  # Symbols per multi-symbol bar request
+    BAR_FETCH_WORKERS = int(os.getenv("BAR_FETCH_WORKERS", "4"))  # Concurrent bar requests
+    ORDER_SUBMIT_WORKERS = int(os.getenv("ORDER_SUBMIT_WORKERS", "4"))  # Concurrent order submissions per auto-execution batch
+    PORTFOLIO_RECONCILE_SECONDS = float(os.getenv("PORTFOLIO_RECONCILE_SECONDS", "60"))  # Full broker snapshot vs. the trade-updates state
+    TRADE_UPDATES_REPLAY = os.getenv("TRADE_UPDATES_REPLAY", "")  # JSONL of recorded trade updates to replay instead of the websocket
+    PROTECT_GRACE_SECONDS = float(os.getenv("PROTECT_GRACE_SECONDS", "1"))  # Wait for a bracket leg / replacement stop before healing a naked position
+    CONDOR_WING_TIMEOUT_SECONDS = float(os.getenv("CONDOR_WING_TIMEOUT_SECONDS", "10"))  # Wings must fill by this deadline or the condor is aborted
+    CONDOR_BODY_TIMEOUT_SECONDS = float(os.getenv("CONDOR_BODY_TIMEOUT_SECONDS", "30"))  # Unfilled short legs are cancelled after this (wings kept)
+    LIFECYCLE_BACKSTOP_MINUTES = float(os.getenv("LIFECYCLE_BACKSTOP_MINUTES", "30"))  # Exit poller / stop watchdog (events handle the normal path)
+    BROKER_RATE_PER_MIN = float(os.getenv("BROKER_RATE_PER_MIN", "200"))  # Trading API token bucket (Alpaca account limit)
+    BROKER_BURST = int(os.getenv("BROKER_BURST", "20"))  # Trading API bucket size
+    DATA_RATE_PER_MIN = float(os.getenv("DATA_RATE_PER_MIN", "200"))  # Market data token bucket (raise for an unlimited data plan)
+    DATA_BURST = int(os.getenv("DATA_BURST", "20"))  # Market data bucket size
+    BROKER_RESERVED_TOKENS = int(os.getenv("BROKER_RESERVED_TOKENS", "5"))  # Tokens scans/analytics leave for orders and account calls
+    BROKER_RETRY_MAX = int(os.getenv("BROKER_RETRY_MAX", "3"))  # Retries on 429 / 5xx (POST/PATCH only on 429)
+    BROKER_BACKOFF_BASE = float(os.getenv("BROKER_BACKOFF_BASE", "0.5"))  # Full-jitter exponential backoff base (seconds)
+    BROKER_BACKOFF_MAX = float(os.getenv("BROKER_BACKOFF_MAX", "10"))  # Backoff / Retry-After cap (seconds)
+
+    # Execution Pools (blocking work runs here, never on the event loop)
+    IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "16"))  # Broker / HTTP / disk
+    CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(min(8, os.cpu_count() or 2))))  # pandas / numpy
+    LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "250"))  # Report event loop stalls above this
+    SCAN_PROCESSES = int(os.getenv("SCAN_PROCESSES", str(min(4, os.cpu_count() or 1))))  # Sharded scan workers (<=1 disables)
+    SHARD_MIN_SYMBOLS = int(os.getenv("SHARD_MIN_SYMBOLS", "200"))  # Smaller universes are scanned in-process
+    TRACE_KEEP = int(os.getenv("TRACE_KEEP", "50"))  # Scan / scheduler job traces kept for /api/debug/traces
+    BAR_CLOSE_DELAY_SECONDS = float(os.getenv("BAR_CLOSE_DELAY_SECONDS", "3"))  # Wait after a bar close for the feed to publish it
+    SCAN_TRIGGER_TIMEFRAME = os.getenv("SCAN_TRIGGER_TIMEFRAME", "5Min")  # Bar close that triggers the market scan
+    SCAN_TRIGGER_MIN_SECONDS = float(os.getenv("SCAN_TRIGGER_MIN_SECONDS", "30"))  # Debounce between triggered market scans (a late close never fires twice)
+    VOLUME_PROFILE_DAYS = int(os.getenv("VOLUME_PROFILE_DAYS", "20"))  # Sessions of 1Min history per time-of-day volume profile
+    VOLUME_PROFILE_MIN_VOLUME = float(os.getenv("VOLUME_PROFILE_MIN_VOLUME", "1000000"))  # Asset index volume cut for the profiled universe
+
     # Signal
     MIN_WIN_PROBABILITY_ESTIMATE = float(os.getenv("MIN_WIN_PROBABILITY", "65.0"))
     MIN_SWING_SCORE = 10.0 # DEBUG: Was 70.0
@@ -0,0 +1,234 @@
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import datetime
+import os
+import threading
+import numpy as np
+import pytz
+from alpaca_trade_api.rest import REST
+from configs.settings import settings
+from utils.rate_limiter import broker_priority, ANALYTICS
+
+# Persistent daily index of the tradable US equity universe
+INDEX_FILE = "uploads/asset_index.npz"
+
+NY_TZ = pytz.timezone("America/New_York")
+
+# Exchange codes (uint8). Anything not listed maps to OTHER.
+EXCHANGES = ["NASDAQ", "NYSE", "AMEX", "ARCA", "BATS", "OTC", "OTHER"]
+EXCHANGE_CODES = {e: i for i, e in enumerate(EXCHANGES)}
+MAJOR_EXCHANGES = ("NASDAQ", "NYSE", "AMEX")
+
+# Flag bits (uint8)
+FLAG_TRADABLE = 1
+FLAG_SHORTABLE = 2
+FLAG_EASY_TO_BORROW = 4
+FLAG_MARGINABLE = 8
+
+# Bucket edges. Bucket i covers [EDGES[i-1], EDGES[i]); bucket 0 is below the first edge.
+PRICE_EDGES = np.array([0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 50.0, 100.0, 500.0])
+VOLUME_EDGES = np.array([1e5, 5e5, 1e6, 5e6, 2e7])
+UNKNOWN_BUCKET = 255 # No snapshot for this symbol at refresh time
+
+# Prebuilt candidate lists: name -> (exchanges, min_price, max_price)
+# Prices are last close at refresh time, so scan lists carry slack for today's move.
+COMMON_FILTERS = {
+    "major": (MAJOR_EXCHANGES, None, None),
+    "price_2_20": (MAJOR_EXCHANGES, 2.0, 20.0),
+    "warrior": (MAJOR_EXCHANGES, 1.0, 20.0), # Gappers (+10%) landing in $2-$20
+    "sykes": (MAJOR_EXCHANGES, 0.5, 30.0),   # Penny FGD / Panic moves (<$25 after a 10% drop)
+}
+
+class AssetIndex:
+    """
+    Daily-refreshed local index of the Alpaca us_equity universe.
+
+    Stored as compact NumPy columns (exchange code, flag bits, price bucket,
+    volume bucket). Common filters are materialized once per refresh, so scans
+    start from a ready-made candidate tuple instead of calling list_assets.
+    """
+
+    def __init__(self, path: str = INDEX_FILE):
+        self.path = path
+        self.api = None
+        if settings.APCA_API_KEY_ID:
+            self.api = REST(
+                settings.APCA_API_KEY_ID,
+                settings.APCA_API_SECRET_KEY,
+                base_url=settings.APCA_API_BASE_URL
+            )
+
+        self._lock = threading.Lock()
+        self.built_on = None
+        self.has_prices = False
+        self.symbols = np.array([], dtype="U12")
+        self.exchange = np.array([], dtype=np.uint8)
+        self.flags = np.array([], dtype=np.uint8)
+        self.price_bucket = np.array([], dtype=np.uint8)
+        self.volume_bucket = np.array([], dtype=np.uint8)
+        self._lists: Dict[str, Tuple[str, ...]] = {}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(NY_TZ).strftime("%Y-%m-%d")
+
+    def is_stale(self) -> bool:
+        return self.built_on != self._today()
+
+    def candidates(self, name: str = "major") -> Tuple[str, ...]:
+        """
+        Returns the prebuilt symbol tuple for a COMMON_FILTERS entry.
+        Loads from disk on first use and refreshes once per trading day.
+        """
+        if self.is_stale():
+            self.ensure_fresh()
+        return self._lists.get(name, ())
+
+    def ensure_fresh(self):
+        with self._lock:
+            if self.built_on is None:
+                self._load()
+            if self.is_stale() and self.api:
+                self._refresh_locked()
+
+    def refresh(self) -> int:
+        """Rebuilds the index from the broker. Returns number of assets indexed."""
+        with self._lock:
+            return self._refresh_locked()
+
+    def select(self, exchanges: Optional[Iterable[str]] = MAJOR_EXCHANGES,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               shortable: Optional[bool] = None, min_volume: Optional[float] = None) -> Tuple[str, ...]:
+        """
+        Ad-hoc filter over the index columns. Price/volume bounds are matched on
+        bucket edges, so pass values from PRICE_EDGES / VOLUME_EDGES for exact cuts.
+        If the last refresh had no snapshot data, price/volume bounds are ignored.
+        """
+        mask = (self.flags & FLAG_TRADABLE) > 0
+        if exchanges is not None:
+            codes = [EXCHANGE_CODES[e] for e in exchanges if e in EXCHANGE_CODES]
+            mask &= np.isin(self.exchange, codes)
+        if shortable is not None:
+            mask &= ((self.flags & FLAG_SHORTABLE) > 0) == shortable
+
+        if self.has_prices:
+            known = self.price_bucket != UNKNOWN_BUCKET
+            if min_price is not None:
+                lo = np.searchsorted(PRICE_EDGES, min_price, side="right")
+                mask &= known & (self.price_bucket >= lo)
+            if max_price is not None:
+                hi = np.searchsorted(PRICE_EDGES, max_price, side="left")
+                mask &= known & (self.price_bucket <= hi)
+            if min_volume is not None:
+                lo = np.searchsorted(VOLUME_EDGES, min_volume, side="right")
+                mask &= (self.volume_bucket != UNKNOWN_BUCKET) & (self.volume_bucket >= lo)
+
+        return tuple(self.symbols[mask].tolist())
+
+    @broker_priority(ANALYTICS)
+    def _refresh_locked(self) -> int:
+        if not self.api:
+            print("ASSET INDEX: No API. Keeping current index.")
+            return len(self.symbols)
+
+        print("ASSET INDEX: Refreshing tradable universe...")
+        try:
+            assets = self.api.list_assets(status='active', asset_class='us_equity')
+        except Exception as e:
+            print(f"ASSET INDEX: list_assets failed: {e}")
+            return len(self.symbols)
+
+        n = len(assets)
+        symbols = np.empty(n, dtype="U12")
+        exchange = np.empty(n, dtype=np.uint8)
+        flags = np.zeros(n, dtype=np.uint8)
+        other = EXCHANGE_CODES["OTHER"]
+        for i, a in enumerate(assets):
+            symbols[i] = a.symbol
+            exchange[i] = EXCHANGE_CODES.get(a.exchange, other)
+            f = 0
+            if a.tradable: f |= FLAG_TRADABLE
+            if getattr(a, 'shortable', False): f |= FLAG_SHORTABLE
+            if getattr(a, 'easy_to_borrow', False): f |= FLAG_EASY_TO_BORROW
+            if getattr(a, 'marginable', False): f |= FLAG_MARGINABLE
+            flags[i] = f
+
+        # Last price / volume from snapshots (major exchanges, tradable only)
+        price_bucket = np.full(n, UNKNOWN_BUCKET, dtype=np.uint8)
+        volume_bucket = np.full(n, UNKNOWN_BUCKET, dtype=np.uint8)
+        major_codes = [EXCHANGE_CODES[e] for e in MAJOR_EXCHANGES]
+        wanted = np.flatnonzero(((flags & FLAG_TRADABLE) > 0) & np.isin(exchange, major_codes))
+        wanted_syms = symbols[wanted].tolist()
+        pos = dict(zip(wanted_syms, wanted.tolist()))
+
+        chunk_size = 1000
+        priced = 0
+        for i in range(0, len(wanted_syms), chunk_size):
+            chunk = wanted_syms[i:i + chunk_size]
+            try:
+                snaps = self.api.get_snapshots(chunk)
+            except Exception as e:
+                print(f"ASSET INDEX: Snapshot chunk failed: {e}")
+                continue
+            for sym, snap in snaps.items():
+                if snap is None: continue
+                bar = snap.daily_bar or snap.prev_daily_bar
+                if not bar: continue
+                j = pos.get(sym)
+                if j is None: continue
+                price_bucket[j] = np.searchsorted(PRICE_EDGES, bar.c, side="right")
+                volume_bucket[j] = np.searchsorted(VOLUME_EDGES, bar.v, side="right")
+                priced += 1
+
+        self.symbols = symbols
+        self.exchange = exchange
+        self.flags = flags
+        self.price_bucket = price_bucket
+        self.volume_bucket = volume_bucket
+        self.has_prices = priced > 0
+        self.built_on = self._today()
+        self._build_lists()
+        self._save()
+
+        print(f"ASSET INDEX: Indexed {n} assets ({priced} priced). Lists: "
+              + ", ".join(f"{k}={len(v)}" for k, v in self._lists.items()))
+        return n
+
+    def _build_lists(self):
+        self._lists = {
+            name: self.select(exchanges=ex, min_price=lo, max_price=hi)
+            for name, (ex, lo, hi) in COMMON_FILTERS.items()
+        }
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            np.savez_compressed(
+                self.path,
+                symbols=self.symbols,
+                exchange=self.exchange,
+                flags=self.flags,
+                price_bucket=self.price_bucket,
+                volume_bucket=self.volume_bucket,
+                meta=np.array([self.built_on, "1" if self.has_prices else "0"])
+            )
+        except Exception as e:
+            print(f"ASSET INDEX: Save failed: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                self.symbols = data["symbols"]
+                self.exchange = data["exchange"]
+                self.flags = data["flags"]
+                self.price_bucket = data["price_bucket"]
+                self.volume_bucket = data["volume_bucket"]
+                self.built_on = str(data["meta"][0])
+                self.has_prices = str(data["meta"][1]) == "1"
+            self._build_lists()
+            print(f"ASSET INDEX: Loaded {len(self.symbols)} assets (built {self.built_on}).")
+        except Exception as e:
+            print(f"ASSET INDEX: Load failed ({e}). Will rebuild.")
+
+asset_index = AssetIndex()
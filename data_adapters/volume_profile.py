@@ -0,0 +1,225 @@
+from typing import Dict, List, Optional, Sequence
+from datetime import datetime
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytz
+from configs.settings import settings
+from utils.rate_limiter import broker_priority, ANALYTICS
+
+# Persistent per-symbol time-of-day volume profiles (rebuilt nightly)
+PROFILE_FILE = "uploads/volume_profiles.npz"
+
+NY_TZ = pytz.timezone("America/New_York")
+SESSION_OPEN_MIN = 9 * 60 + 30 # Minutes after midnight, exchange time
+SESSION_MINUTES = 390
+FULL_SESSION_MIN = 360         # A session counts only if it has bars at/after 15:30 (skips half days)
+MIN_SESSIONS = 5               # Fewer full sessions than this: no profile (callers fall back)
+FRACTION_SCALE = 65535         # Cumulative fractions stored as uint16
+
+_NS_PER_DAY = 86_400 * 10**9
+_NS_PER_MIN = 60 * 10**9
+
+def session_minutes(index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Minute of the regular session for each timestamp (0 = the 9:30 bar,
+    389 = the 15:59 bar); outside the session is < 0 or >= 390.
+    Naive timestamps are taken as UTC (Alpaca's bar index).
+    """
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    wall = index.tz_convert(NY_TZ).tz_localize(None).values.astype("datetime64[ns]").view("i8")
+    return (wall % _NS_PER_DAY) // _NS_PER_MIN - SESSION_OPEN_MIN
+
+class VolumeProfiles:
+    """
+    Time-of-day volume profiles for the liquid universe, built nightly from
+    VOLUME_PROFILE_DAYS sessions of 1Min bars.
+
+    Per symbol: the average session volume (float32) and the cumulative share
+    of it traded by the end of each session minute (390 x uint16), ~800 bytes
+    per symbol. Expected volume through minute m, or inside one bar, is then
+    an O(1) lookup, so RVOL compares against the open/close volume smile
+    instead of a flat average.
+    """
+
+    def __init__(self, path: str = PROFILE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.built_on = None
+        self.sessions = 0
+        self.symbols = np.array([], dtype="U12")
+        self.avg_volume = np.array([], dtype=np.float32)
+        self.fractions = np.zeros((0, SESSION_MINUTES), dtype=np.uint16)
+        self._pos: Dict[str, int] = {}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(NY_TZ).strftime("%Y-%m-%d")
+
+    def __contains__(self, symbol: str) -> bool:
+        self._ensure_loaded()
+        return symbol in self._pos
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self.symbols)
+
+    # --- Lookups ---
+
+    def expected(self, symbol: str, minute: int) -> Optional[float]:
+        """Average volume traded from the open through session minute `minute` (inclusive)."""
+        self._ensure_loaded()
+        i = self._pos.get(symbol)
+        if i is None or not 0 <= minute < SESSION_MINUTES:
+            return None
+        return float(self.avg_volume[i]) * self.fractions[i, minute] / FRACTION_SCALE
+
+    def rvol(self, symbol: str, cum_volume: float, minute: int) -> Optional[float]:
+        """Cumulative time-of-day RVOL: today's volume so far / expected by this minute."""
+        expected = self.expected(symbol, minute)
+        return cum_volume / expected if expected else None
+
+    def expected_many(self, symbols: Sequence[str], minutes: np.ndarray) -> np.ndarray:
+        """Vectorized expected(): one minute per symbol, NaN where there is no profile."""
+        self._ensure_loaded()
+        out = np.full(len(symbols), np.nan)
+        idx = np.array([self._pos.get(s, -1) for s in symbols], dtype=np.int64)
+        minutes = np.asarray(minutes, dtype=np.int64)
+        ok = (idx >= 0) & (minutes >= 0) & (minutes < SESSION_MINUTES)
+        out[ok] = self.avg_volume[idx[ok]] * self.fractions[idx[ok], minutes[ok]] / FRACTION_SCALE
+        return out
+
+    def bar_rvol(self, symbol: str, volumes: np.ndarray, index: pd.DatetimeIndex, bar_minutes: int = 1) -> Optional[np.ndarray]:
+        """
+        Per-bar RVOL for one symbol's bars: bar volume / average volume traded
+        in the same minutes of the session. Bars are labelled by their start
+        (Alpaca). NaN outside the session; None if the symbol has no profile.
+        """
+        self._ensure_loaded()
+        i = self._pos.get(symbol)
+        if i is None:
+            return None
+        start = session_minutes(index)
+        end = start + bar_minutes - 1
+        ok = (start >= 0) & (end < SESSION_MINUTES)
+        cum = self.fractions[i].astype(np.float64) * (float(self.avg_volume[i]) / FRACTION_SCALE)
+        before = np.where(start[ok] > 0, cum[np.maximum(start[ok] - 1, 0)], 0.0)
+        expected = np.full(len(start), np.nan)
+        expected[ok] = cum[end[ok]] - before
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(expected > 0, np.asarray(volumes, dtype=np.float64) / expected, np.nan)
+
+    # --- Build ---
+
+    @broker_priority(ANALYTICS)
+    def refresh(self, symbols: Optional[List[str]] = None) -> int:
+        """
+        Rebuilds the profiles from 1Min history. Default universe: asset index
+        names above VOLUME_PROFILE_MIN_VOLUME. Returns number of symbols profiled.
+        """
+        from strategy_engine.data_loader import data_loader
+        if symbols is None:
+            from data_adapters.asset_index import asset_index
+            asset_index.ensure_fresh()
+            symbols = list(asset_index.select(min_volume=settings.VOLUME_PROFILE_MIN_VOLUME))
+        if not symbols or not data_loader.api:
+            print("VOLUME PROFILE: No universe or no API. Keeping current profiles.")
+            return len(self.symbols)
+
+        days = settings.VOLUME_PROFILE_DAYS
+        print(f"VOLUME PROFILE: Building {days}-session profiles for {len(symbols)} symbols...")
+        frame = data_loader.fetch_frame_chunked(symbols, "1Min", days=int(days * 7 / 5) + 3)
+        with self._lock:
+            self._build(frame)
+            self.built_on = self._today()
+            self._loaded = True
+            self._save()
+        print(f"VOLUME PROFILE: Profiled {len(self.symbols)} symbols over up to {self.sessions} sessions.")
+        return len(self.symbols)
+
+    def _build(self, frame):
+        """Vectorized over the whole BarFrame: one bincount for every (symbol, minute)."""
+        n = len(frame)
+        if n == 0:
+            self._set(np.array([], dtype="U12"), np.array([], dtype=np.float32), np.zeros((0, SESSION_MINUTES), dtype=np.uint16), 0)
+            return
+
+        # Bars covered by the symbol ranges, with their symbol id
+        lengths = frame.stops - frame.starts
+        sym = np.repeat(np.arange(n), lengths)
+        pos = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(frame.starts, lengths)
+
+        index = frame.index[pos]
+        minute = session_minutes(index)
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        day = index.tz_convert(NY_TZ).tz_localize(None).values.astype("datetime64[D]").view("i8")
+        volume = frame.columns["volume"][pos].astype(np.float64)
+
+        keep = (minute >= 0) & (minute < SESSION_MINUTES)
+        sym, minute, day, volume = sym[keep], minute[keep], day[keep], volume[keep]
+
+        # (symbol, day) runs are contiguous (bars sorted by symbol, then time); keep full sessions only
+        key = sym.astype(np.int64) * 100_000 + (day - day.min() if len(day) else day)
+        run_start = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        run_end = np.r_[run_start[1:], len(key)] - 1
+        full_run = minute[run_end] >= FULL_SESSION_MIN
+        full_bar = np.repeat(full_run, run_end - run_start + 1)
+
+        sums = np.bincount(sym[full_bar] * SESSION_MINUTES + minute[full_bar], weights=volume[full_bar],
+                           minlength=n * SESSION_MINUTES).reshape(n, SESSION_MINUTES)
+        sessions = np.bincount(sym[run_start[full_run]], minlength=n)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cum = np.cumsum(sums, axis=1) / sessions[:, None]
+        avg = cum[:, -1]
+        ok = (sessions >= MIN_SESSIONS) & (avg > 0)
+        fractions = np.round(cum[ok] / avg[ok, None] * FRACTION_SCALE).astype(np.uint16)
+        symbols = np.array(frame.symbols, dtype="U12")[ok]
+        self._set(symbols, avg[ok].astype(np.float32), fractions, int(sessions.max()) if n else 0)
+
+    def _set(self, symbols, avg_volume, fractions, sessions: int):
+        self.symbols = symbols
+        self.avg_volume = avg_volume
+        self.fractions = fractions
+        self.sessions = sessions
+        self._pos = {s: i for i, s in enumerate(symbols.tolist())}
+
+    # --- Persistence ---
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            np.savez_compressed(
+                self.path,
+                symbols=self.symbols,
+                avg_volume=self.avg_volume,
+                fractions=self.fractions,
+                meta=np.array([self.built_on, str(self.sessions)])
+            )
+        except Exception as e:
+            print(f"VOLUME PROFILE: Save failed: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                self._set(data["symbols"], data["avg_volume"], data["fractions"], int(data["meta"][1]))
+                self.built_on = str(data["meta"][0])
+            print(f"VOLUME PROFILE: Loaded {len(self.symbols)} profiles (built {self.built_on}).")
+        except Exception as e:
+            print(f"VOLUME PROFILE: Load failed ({e}). Flat volume averages until the next build.")
+
+volume_profiles = VolumeProfiles()
@@ -1,13 +1,19 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from typing import Optional
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from strategy_engine.models import WebhookSignal
 from executor_service.webhook_handler import process_webhook
 from configs.settings import settings
 from strategy_engine.scanner_service import scanner
+from strategy_engine.scan_store import scan_store
 from executor_service.upload_router import router as upload_router
 from executor_service.automation_router import router as automation_router
 from executor_service.debug_endpoints import router as debug_router
+from utils.execution import execution, loop_monitor
+from utils.tracing import tracer
+from utils.rate_limiter import rate_limiter
+from utils.metrics import registry as metrics_registry
 
 app = FastAPI(title="A+ Trader Agent", version="1.0.0")
 
@@ -22,8 +28,8 @@ async def verify_api_key(request: Request, call_next):
     if request.method == "OPTIONS":
         return await call_next(request)
     
-    # 2. Exempt Webhook (Has own auth) and Root Health Check
-    if request.url.path in ["/webhook", "/", "/docs", "/openapi.json"] or request.url.path.startswith("/debug"):
+    # 2. Exempt Webhook (Has own auth), Root Health Check and the Prometheus scrape
+    if request.url.path in ["/webhook", "/", "/docs", "/openapi.json", "/metrics"] or request.url.path.startswith("/debug"):
         return await call_next(request)
         
     # 3. Verify Header
@@ -40,13 +46,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Scan-Timestamp"],
 )
 
 
 
 @app.api_route("/", methods=["GET", "HEAD"])
-def health_check():
+async def health_check():
+    # Account comes from the in-memory portfolio (first call may bootstrap it on the io pool)
+    return await execution.run_io(_health_status)
+
+def _health_status():
     from executor_service.order_executor import executor
+    from executor_service.portfolio_state import portfolio
     
     conn = "connected" if executor.api else "disconnected"
     daily_pnl = 0.0
@@ -55,8 +67,8 @@ def health_check():
     
     if executor.api:
         try:
-            executor.api.get_clock()
-            acct = executor.api.get_account()
+            acct = portfolio.account
+            if not portfolio.healthy: raise RuntimeError("stale portfolio state")
             equity = float(acct.equity)
             last_equity = float(acct.last_equity)
             daily_pnl = equity - last_equity
@@ -81,7 +93,7 @@ async def debug_discord():
     """Forces a test notification to verify Webhook URL."""
     try:
         from utils.notifications import notifier
-        success = notifier.send_message("🔊 TEST", "Discord Connection Verified.", color=0x00ffff)
+        success = await execution.run_io(notifier.send_message, "🔊 TEST", "Discord Connection Verified.", color=0x00ffff)
         if success:
             return {"status": "success", "message": "Notification Sent. Check Discord."}
         else:
@@ -90,13 +102,28 @@ async def debug_discord():
         return {"status": "error", "message": str(e)}
 
 @app.get("/scan")
-async def trigger_scan():
+async def trigger_scan(response: Response):
     """
-    Triggers a fresh market scan and returns candidates categorized by section.
+    Returns candidates categorized by section.
+    Concurrent requests share one in-flight scan; recent results come from cache.
+    Scan start time is returned in the X-Scan-Timestamp header.
     """
-    results = await scanner.run_scan()
+    results, scanned_at = await scanner.get_scan()
+    response.headers["X-Scan-Timestamp"] = scanned_at.isoformat()
     return results
 
+@app.get("/scan/latest")
+async def latest_scan(since: Optional[int] = None):
+    """
+    Reads the scan result store (never starts a scan).
+    - No `since`: latest full snapshot {version, scanned_at, full, sections}.
+    - `since=<version>`: only added/changed candidates and removed keys since
+      that version (full snapshot if that version is no longer retained).
+    """
+    if since is None:
+        return scan_store.latest()
+    return scan_store.since(since)
+
 @app.post("/webhook")
 async def receive_signal(signal: WebhookSignal, background_tasks: BackgroundTasks):
     """
@@ -108,6 +135,7 @@ async def receive_signal(signal: WebhookSignal, background_tasks: BackgroundTask
     # Process immediately (await) or background? 
     # For trading execution, usually we wait to confirm receipt, but if execution is slow, background.
     # Alpaca API is usually fast enough to await.
+    # Broker/sqlite calls inside run on the io pool, the loop stays free.
     result = await process_webhook(signal)
     
     if result.get("status") == "error":
@@ -159,7 +187,7 @@ async def debug_data_connection():
         
         # Try to fetch 1 day of AAPL
         # Using IEX as per fix
-        bars = api.get_bars("AAPL", TimeFrame.Day, limit=1, feed='iex').df
+        bars = await execution.run_io(lambda: api.get_bars("AAPL", TimeFrame.Day, limit=1, feed='iex').df)
         
         if bars.empty:
             return {"status": "ERROR", "message": "Connection OK, but returned empty DataFrame for AAPL (IEX)."}
@@ -180,6 +208,42 @@ async def debug_data_connection():
             "trace": traceback.format_exc()
         }
 
+@app.get("/api/debug/loop")
+async def debug_loop_lag():
+    """Event loop lag stats (stalls above LOOP_LAG_WARN_MS)."""
+    return loop_monitor.stats()
+
+@app.get("/api/debug/triggers")
+async def debug_bar_triggers():
+    """Bar-close scan triggers: subscriptions per timeframe, last bar handled, next close."""
+    from utils.bar_clock import bar_trigger
+    return bar_trigger.stats()
+
+@app.get("/api/debug/portfolio")
+async def debug_portfolio():
+    """In-memory portfolio state (counts, trade-update events, last reconcile) and lifecycle states."""
+    from executor_service.portfolio_state import portfolio
+    from executor_service.order_lifecycle import lifecycle
+    return {**portfolio.status(), "lifecycle": lifecycle.status()}
+
+@app.get("/api/debug/broker")
+async def debug_broker_limiter():
+    """Broker rate limiter: tokens left and queued requests per priority, per bucket."""
+    return rate_limiter.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text format: latency histograms and throughput counters (see utils/metrics.py)."""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/debug/traces")
+async def debug_traces(limit: int = 20, name: Optional[str] = None):
+    """
+    Last scan / scheduler job traces, newest first: wall + CPU ms, API calls
+    and bytes (per host), and candidates per stage. Filter with name=scan or job:<id>.
+    """
+    return {"traces": tracer.recent(limit, name)}
+
 @app.get("/api/debug/force_scan")
 async def force_scan_debug():
     """
@@ -189,9 +253,11 @@ async def force_scan_debug():
     try:
         from strategy_engine.scanner_service import scanner
         print("DEBUG: Force Scan Triggered via API")
-        results = await scanner.run_scan()
+        # Fresh scan, but join one that is already running
+        results, scanned_at = await scanner.get_scan(max_age=0)
         return {
             "status": "SUCCESS",
+            "scanned_at": scanned_at.isoformat(),
             "count_swing": len(results.get("SWING", [])),
             "data": results
         }
@@ -207,13 +273,13 @@ async def force_scan_debug():
 async def journal_stats():
     """Returns Win Rate, R-Multiple, and Equity Curve."""
     from executor_service.trade_logger import trade_logger
-    return trade_logger.generate_analytics()
+    return await execution.run_cpu(trade_logger.generate_analytics)
 
 @app.get("/api/journal/history")
 async def journal_history():
     """Returns list of all trades (Open and Closed)."""
     from executor_service.trade_logger import trade_logger
-    return trade_logger.get_trade_history()
+    return await execution.run_cpu(trade_logger.get_trade_history)
 
 @app.get("/api/journal/download")
 async def download_journal():
@@ -225,7 +291,7 @@ async def download_journal():
     if not os.path.exists(path):
         from executor_service.trade_logger import trade_logger
         # Force create via hydration if missing
-        trade_logger.hydrate_history()
+        await execution.run_io(trade_logger.hydrate_history)
         
     if os.path.exists(path):
         return FileResponse(path, media_type='text/csv', filename=f"trade_journal_{datetime.now().strftime('%Y%m%d')}.csv")
@@ -289,15 +355,14 @@ async def update_journal(background_tasks: BackgroundTasks):
 
 @app.get("/api/alpaca/positions")
 async def get_alpaca_positions():
-    """Fetches LIVE positions directly from Alpaca."""
+    """LIVE positions (in-memory portfolio, kept current by the trade-updates stream)."""
     try:
         from executor_service.order_executor import executor
+        from executor_service.portfolio_state import portfolio
         if not executor.api:
             return []
         
-        # LIVE FETCH
-        raw_positions = executor.api.list_positions()
-        print(f"DEBUG: Fetched {len(raw_positions)} positions from Alpaca.")
+        raw_positions = await execution.run_io(portfolio.positions)
         
         data = []
         for p in raw_positions:
@@ -355,23 +420,25 @@ async def close_single_position(payload: dict):
             
         print(f"MANUAL CLOSE REQUEST: {symbol}")
         
-        # 1. Cancel Open Orders for Symbol First (Prevent Conflicts)
-        try:
-            # Use list_orders -> filter locally (Safer for SDK compatibility)
-            all_orders = executor.api.list_orders(status='open')
-            orders = [o for o in all_orders if o.symbol == symbol]
-            
-            for o in orders:
-                executor.api.cancel_order(o.id)
-            print(f"Cancelled {len(orders)} open orders for {symbol}")
-        except Exception as cx:
-            print(f"Warning cancelling orders for {symbol}: {cx}")
+        def _close_sync():
+            # 1. Cancel Open Orders for Symbol First (Prevent Conflicts)
+            try:
+                from executor_service.portfolio_state import portfolio
+                orders = portfolio.open_orders(symbol)
+                
+                for o in orders:
+                    executor.api.cancel_order(o.id)
+                print(f"Cancelled {len(orders)} open orders for {symbol}")
+            except Exception as cx:
+                print(f"Warning cancelling orders for {symbol}: {cx}")
+                
+            # 2. Market Close
+            executor.api.close_position(symbol)
             
-        # 2. Market Close
-        executor.api.close_position(symbol)
+            from utils.notifications import notifier
+            notifier.send_message("⚠️ MANUAL CLOSE", f"User manually closed {symbol} via Dashboard.", color=0xff7700)
         
-        from utils.notifications import notifier
-        notifier.send_message("⚠️ MANUAL CLOSE", f"User manually closed {symbol} via Dashboard.", color=0xff7700)
+        await execution.run_io(_close_sync)
         
         return {"status": "success", "message": f"Closed {symbol}"}
     except Exception as e:
@@ -383,6 +450,17 @@ from executor_service.scheduler import start_scheduler
 
 @app.on_event("startup")
 async def on_startup():
+    # Blocking work goes to the sized pools; watch the loop for anything that slips through
+    execution.install()
+    loop_monitor.start()
+    tracer.install() # Per-stage API call / byte accounting (see /api/debug/traces)
+    rate_limiter.install() # Shared Alpaca token buckets + 429/5xx retry (outside the tracer: latency excludes queueing)
+    from executor_service.portfolio_state import portfolio
+    from executor_service.order_lifecycle import lifecycle
+    lifecycle.start() # Fill / cancel events -> exit journaling, stop healing (subscribe before the stream starts)
+    await execution.run_io(portfolio.start) # Positions / orders / account in memory from here on
+    from utils.market_clock import MarketClock
+    await execution.run_io(MarketClock.load_calendar) # Holidays / early closes before the bar clock arms
     start_scheduler()
     try:
         from executor_service.trade_logger import trade_logger
@@ -390,21 +468,21 @@ async def on_startup():
         # Or just rely on the logs? 
         # We will force-run it here to get the string, since Init doesn't return it.
         # This is safe because of the Dupe Check we just added.
-        report = trade_logger.hydrate_history()
+        report = await execution.run_io(trade_logger.hydrate_history)
         
-        notifier.send_message("🦅 HARMONIC EAGLE: ONLINE", f"System Active. {report}", color=0x00ff00)
+        await execution.run_io(notifier.send_message, "🦅 HARMONIC EAGLE: ONLINE", f"System Active. {report}", color=0x00ff00)
         
         # --- IMMEDIATE SAFETY AUDIT ---
         # User requested verification of all stops (e.g. SOFI expired)
         from executor_service.order_executor import executor
-        audit = executor.ensure_protective_stops()
+        audit = await execution.run_io(executor.ensure_protective_stops)
         if audit:
-            notifier.send_message("🛡️ STARTUP AUDIT", f"Fixed Naked Positions:\n" + "\n".join(audit), color=0xffaa00)
+            await execution.run_io(notifier.send_message, "🛡️ STARTUP AUDIT", f"Fixed Naked Positions:\n" + "\n".join(audit), color=0xffaa00)
         else:
              print("🛡️ SAFE: All positions have stops.")
             
     except Exception as e:
-        notifier.send_message("🦅 HARMONIC EAGLE: ONLINE", f"System Active. Starup Error: {e}", color=0x00ff00)
+        await execution.run_io(notifier.send_message, "🦅 HARMONIC EAGLE: ONLINE", f"System Active. Starup Error: {e}", color=0x00ff00)
     
     # Internal Heartbeat Loop
     import asyncio
@@ -413,7 +491,7 @@ async def on_startup():
             await asyncio.sleep(3600) # 1 Hour
             try:
                 # Basic self-check
-                notifier.send_message("💓 SYSTEM PULSE", "API is Active. Scheduler Running.", color=0x333333)
+                await execution.run_io(notifier.send_message, "💓 SYSTEM PULSE", "API is Active. Scheduler Running.", color=0x333333)
             except: pass
             
     asyncio.create_task(heartbeat_loop())
@@ -1,123 +1,242 @@
 from alpaca_trade_api.rest import REST
 from configs.settings import settings
 from strategy_engine.models import Candidate
+from collections import OrderedDict
+from typing import Dict, List
+import threading
 import time
 import asyncio
 
 from contracts.options_adapter import options_adapter
+from executor_service.portfolio_state import portfolio
+from utils.execution import execution
+from utils.metrics import CONDOR_PHASE_SECONDS
+from utils.rate_limiter import broker_priority, ACCOUNT
+
+# Leg order statuses that end the wait (anything else is still working)
+FINAL_STATUSES = {"filled", "canceled", "expired", "rejected", "replaced", "done_for_day"}
 
 class OptionsExecutor:
+    """
+    Iron Condor execution as coroutines on a dedicated event loop thread.
+    Legs of a phase are submitted concurrently, fills come from the
+    portfolio's trade updates (no get_order polling), and each phase has a
+    deadline: CONDOR_WING_TIMEOUT_SECONDS for the wings, CONDOR_BODY_TIMEOUT_SECONDS
+    for the body. Legs still open at a deadline get one get_order check (in
+    case an event was missed) and are then cancelled.
+    Several condors run at once on the same loop (execute_condors).
+    """
+
     def __init__(self):
         self.api = None
         try:
              self.api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
         except Exception as e:
              print(f"Options Executor Connection Fail: {e}")
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._final: "OrderedDict[str, str]" = OrderedDict() # Recent final statuses (events that beat the waiter)
+        self._lock = threading.Lock()
+
+    # --- Loop + fill tracking ---
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="options-legs", daemon=True).start()
+                portfolio.subscribe(self._on_trade_update)
+            return self._loop
+
+    def _on_trade_update(self, data: dict, prev_qty: float, new_qty: float):
+        """Portfolio listener (stream thread): resolves the waiter of a leg that reached a final status."""
+        order = data["order"]
+        status = order.get("status")
+        if status not in FINAL_STATUSES: return
+        oid = order.get("id")
+        with self._lock:
+            fut = self._waiters.pop(oid, None)
+            if fut is None:
+                self._final[oid] = status
+                while len(self._final) > 500:
+                    self._final.popitem(last=False)
+        if fut is not None:
+            self._loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(status))
+
+    def _watch(self, order) -> asyncio.Future:
+        """Future resolved with the order's final status."""
+        fut = self._loop.create_future()
+        with self._lock:
+            status = self._final.pop(order.id, None)
+            if status is None and order.status in FINAL_STATUSES:
+                status = order.status
+            if status is None:
+                self._waiters[order.id] = fut
+        if status is not None:
+            fut.set_result(status)
+        return fut
+
+    async def _await_fills(self, orders: list, timeout: float) -> Dict[str, str]:
+        """Waits for every order to reach a final status, up to `timeout`. Returns {order_id: status}."""
+        futures = {o.id: self._watch(o) for o in orders}
+        await asyncio.wait(list(futures.values()), timeout=timeout)
+
+        statuses = {}
+        for oid, fut in futures.items():
+            if fut.done():
+                statuses[oid] = fut.result()
+                continue
+            with self._lock:
+                self._waiters.pop(oid, None)
+            # Deadline: one REST check in case the stream missed it
+            try:
+                statuses[oid] = (await execution.run_io(self.api.get_order, oid)).status
+            except Exception as e:
+                print(f"Leg status check failed ({oid}): {e}")
+                statuses[oid] = "unknown"
+        return statuses
+
+    async def _submit_legs(self, specs: List[dict]) -> list:
+        """Submits legs concurrently. Returns orders (or exceptions) in spec order."""
+        results = await asyncio.gather(*(execution.run_io(self.api.submit_order, **spec) for spec in specs), return_exceptions=True)
+        for r in results:
+            if not isinstance(r, Exception):
+                portfolio.track_order(r)
+        return results
+
+    async def _cancel(self, orders: list):
+        await asyncio.gather(*(execution.run_io(self.api.cancel_order, o.id) for o in orders), return_exceptions=True)
+
+    # --- Entry points ---
 
     def execute_condor(self, candidate: Candidate) -> str:
+        """Blocking wrapper (any thread except the options loop)."""
+        return self.execute_condors([candidate])[0]
+
+    def execute_condors(self, candidates: List[Candidate]) -> List[str]:
+        """Runs several condors concurrently. Results in input order."""
+        if not candidates: return []
+        loop = self._ensure_loop()
+        async def _all():
+            return await asyncio.gather(*(self._run_condor(c) for c in candidates))
+        return asyncio.run_coroutine_threadsafe(_all(), loop).result()
+
+    async def execute_condor_async(self, candidate: Candidate) -> str:
+        """For callers already on an event loop: runs on the options loop and awaits the result."""
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._run_condor(candidate), loop))
+
+    async def _run_condor(self, candidate: Candidate) -> str:
+        try:
+            return await self._condor(candidate)
+        except Exception as e:
+            print(f"Condor Error ({candidate.symbol}): {e}")
+            return f"ERROR: {e}"
+
+    async def _condor(self, candidate: Candidate) -> str:
         """
         Executes a 4-Leg Iron Condor securely with Realistic Limits.
         """
         details = candidate.options_details
         if not details or not details.legs:
             return "SKIPPED: No Legs in Candidate"
-            
+
         legs = details.legs # Expects dict: {long_put, short_put, ...}
         qty = 1 # Start small
-        
+
         print(f"🦅 OPTION EXECUTION: Processing Condor for {candidate.symbol}")
-        
+
         # --- PHASE 0: REALITY CHECK (Quotes & Limits) ---
         print(f"   Fetching Live Quotes for Limits...")
         leg_symbols = list(legs.values())
-        quotes = options_adapter.get_quotes(leg_symbols)
-        
+        quotes = await execution.run_io(broker_priority(ACCOUNT)(options_adapter.get_quotes), leg_symbols) # Entry quotes outrank scans
+
         limit_map = {}
         for sym in leg_symbols:
             q = quotes.get(sym)
             if not q or q['ask'] <= 0:
                 print(f"REALISM FAIL: No acceptable Quote for {sym}")
                 return "ABORTED: No Liquidity"
-                
+
             # Calc Limits (Conservative Realism: Pay Ask, Sell Bid)
             # Add small buffer for fill assurance in fast markets
             buy_limit = round(q['ask'] * 1.05, 2) # Max pay 5% over ask
             if buy_limit == 0: buy_limit = 0.01
-            
+
             sell_limit = round(q['bid'] * 0.95, 2) # Min accept 5% under bid
-            
+
             limit_map[sym] = {'buy': buy_limit, 'sell': sell_limit}
             print(f"   Limits {sym}: Buy<={buy_limit} | Sell>={sell_limit} (Ref: {q['ask']}/{q['bid']})")
 
-        # --- PHASE 1: SHIELDS UP (Buy Wings) ---
-        wing_orders = []
-        try:
-            # Long Put
-            sym_lp = legs['long_put']
-            o1 = self.api.submit_order(
-                symbol=sym_lp, qty=qty, side='buy', type='limit', limit_price=limit_map[sym_lp]['buy'], time_in_force='day'
-            )
-            # Long Call
-            sym_lc = legs['long_call']
-            o2 = self.api.submit_order(
-                symbol=sym_lc, qty=qty, side='buy', type='limit', limit_price=limit_map[sym_lc]['buy'], time_in_force='day'
-            )
-            wing_orders = [o1, o2]
-            print(f"Phase 1 Submitted (LIMIT): Wings {o1.symbol}, {o2.symbol}")
-        except Exception as e:
-            print(f"Phase 1 FAIL: {e}")
-            return f"ERROR: Phase 1 Failed {e}"
-
-        # --- WAIT FOR FILL ---
-        # Poll for 10 seconds
-        filled = False
-        for _ in range(10):
-            time.sleep(1)
-            statuses = [self.api.get_order(o.id).status for o in wing_orders]
-            if all(s == 'filled' for s in statuses):
-                filled = True
-                break
-        
-        if not filled:
+        # --- PHASE 1: SHIELDS UP (Buy Wings, both at once) ---
+        t0 = time.perf_counter()
+        wing_syms = [legs['long_put'], legs['long_call']]
+        results = await self._submit_legs([
+            dict(symbol=sym, qty=qty, side='buy', type='limit', limit_price=limit_map[sym]['buy'], time_in_force='day')
+            for sym in wing_syms
+        ])
+        wing_orders = [r for r in results if not isinstance(r, Exception)]
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            await self._cancel(wing_orders)
+            CONDOR_PHASE_SECONDS.observe(time.perf_counter() - t0, phase="wings", result="error")
+            print(f"Phase 1 FAIL: {errors[0]}")
+            return f"ERROR: Phase 1 Failed {errors[0]}"
+        print(f"Phase 1 Submitted (LIMIT): Wings {wing_orders[0].symbol}, {wing_orders[1].symbol}")
+
+        # --- WAIT FOR FILL (trade updates, deadline) ---
+        statuses = await self._await_fills(wing_orders, settings.CONDOR_WING_TIMEOUT_SECONDS)
+        if not all(s == 'filled' for s in statuses.values()):
             # ABORT PHASE 2
-            print("Phase 1 Timeout. Aborting Body Sell.")
-            for o in wing_orders: self.api.cancel_order(o.id)
+            print(f"Phase 1 Timeout. Aborting Body Sell. {statuses}")
+            await self._cancel([o for o in wing_orders if statuses[o.id] != 'filled'])
+            CONDOR_PHASE_SECONDS.observe(time.perf_counter() - t0, phase="wings", result="timeout")
             return "ABORTED: Wings Timeout"
-            
+        CONDOR_PHASE_SECONDS.observe(time.perf_counter() - t0, phase="wings", result="filled")
+
         # --- PHASE 1.5: VERIFY POSITIONS (Double Check) ---
-        # "Make sure we are not naked" - explicitly confirm API lists ownership
+        # "Make sure we are not naked" - the fills above already updated the portfolio;
+        # fall back to one broker listing if it doesn't show them (stream gap).
         try:
-             # Wait a beat for positions to index
-             time.sleep(1)
-             positions = self.api.list_positions()
-             held_symbols = {p.symbol for p in positions}
-             
-             wings_secure = (legs['long_put'] in held_symbols) and (legs['long_call'] in held_symbols)
-             
+             held_symbols = {p.symbol for p in portfolio.positions()}
+             if not all(sym in held_symbols for sym in wing_syms):
+                  held_symbols = {p.symbol for p in await execution.run_io(self.api.list_positions)}
+
+             wings_secure = all(sym in held_symbols for sym in wing_syms)
+
              if not wings_secure:
                   print("CRITICAL: Order filled but Position NOT found. Aborting Short Sell.")
                   return "ABORTED: Ghost Fill Protection"
         except Exception as ve:
              print(f"Verification Error: {ve}")
              return f"ABORTED: Verification Error {ve}"
-             
-        # --- PHASE 2: INCOME (Sell Body) ---
-        try:
-            # Short Put
-            sym_sp = legs['short_put']
-            o3 = self.api.submit_order(
-                symbol=sym_sp, qty=qty, side='sell', type='limit', limit_price=limit_map[sym_sp]['sell'], time_in_force='day'
-            )
-            # Short Call
-            sym_sc = legs['short_call']
-            o4 = self.api.submit_order(
-                symbol=sym_sc, qty=qty, side='sell', type='limit', limit_price=limit_map[sym_sc]['sell'], time_in_force='day'
-            )
-            print(f"Phase 2 Submitted (LIMIT): Body Sold {o3.symbol}, {o4.symbol}")
-            return "SUCCESS: Iron Condor Executed"
-        except Exception as e:
-            print(f"Phase 2 FAIL: {e}")
+
+        # --- PHASE 2: INCOME (Sell Body, both at once) ---
+        t0 = time.perf_counter()
+        body_syms = [legs['short_put'], legs['short_call']]
+        results = await self._submit_legs([
+            dict(symbol=sym, qty=qty, side='sell', type='limit', limit_price=limit_map[sym]['sell'], time_in_force='day')
+            for sym in body_syms
+        ])
+        body_orders = [r for r in results if not isinstance(r, Exception)]
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            print(f"Phase 2 FAIL: {errors[0]}")
+            await self._cancel(body_orders)
+            CONDOR_PHASE_SECONDS.observe(time.perf_counter() - t0, phase="body", result="error")
             # Alert User: Only Wings Bought (Debit Spread instead of Condor - Not terrible, just directional)
-            return f"PARTIAL: Wings Only (Phase 2 Error {e})"
+            return f"PARTIAL: Wings Only (Phase 2 Error {errors[0]})"
+        print(f"Phase 2 Submitted (LIMIT): Body Sold {body_orders[0].symbol}, {body_orders[1].symbol}")
+
+        statuses = await self._await_fills(body_orders, settings.CONDOR_BODY_TIMEOUT_SECONDS)
+        unfilled = [o for o in body_orders if statuses[o.id] != 'filled']
+        if unfilled:
+            # Wings are held, so a missing short leg leaves defined risk; don't leave it working unmanaged
+            await self._cancel(unfilled)
+            CONDOR_PHASE_SECONDS.observe(time.perf_counter() - t0, phase="body", result="timeout")
+            return f"PARTIAL: Body Unfilled ({', '.join(o.symbol for o in unfilled)})"
+        CONDOR_PHASE_SECONDS.observe(time.perf_counter() - t0, phase="body", result="filled")
+        return "SUCCESS: Iron Condor Executed"
 
 options_executor = OptionsExecutor()
@@ -1,7 +1,14 @@
 from alpaca_trade_api.rest import REST, TimeFrame
 from configs.settings import settings, TradingMode
 from strategy_engine.models import Candidate, Direction
+from utils.metrics import ORDERS_SUBMITTED
+from executor_service.portfolio_state import portfolio
+from executor_service.stop_manager import stop_manager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import contextvars
 import math
+import threading
 
 class OrderExecutor:
     def __init__(self):
@@ -17,11 +24,17 @@ class OrderExecutor:
             self.api = None
             print("EXECUTOR: Alpaca Keys Missing. Execution Disabled.")
 
+        # Concurrent order submission (execute_batch) and post-trade side effects
+        self._order_pool = ThreadPoolExecutor(max_workers=settings.ORDER_SUBMIT_WORKERS, thread_name_prefix="orders")
+        self._post_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="post-trade")
+        # One entry decision at a time: risk snapshot -> plan -> submit -> track_order,
+        # so overlapping scans / webhooks see each other's orders (no duplicate entries)
+        self._entry_lock = threading.Lock()
+
     def get_account_buying_power(self) -> float:
         if not self.api: return 0.0
         try:
-            acct = self.api.get_account()
-            return float(acct.buying_power)
+            return float(portfolio.account.buying_power)
         except Exception as e:
             print(f"Error fetching account: {e}")
             return 0.0
@@ -80,8 +93,8 @@ class OrderExecutor:
         if not self.api: return "NO_API"
         
         try:
-            # 1. Check Max Positions
-            positions = self.api.list_positions()
+            # 1. Check Max Positions (in-memory portfolio, kept current by trade updates)
+            positions = portfolio.positions()
             # Dynamic Cap from Settings
             max_pos = settings.MAX_OPEN_SWING_POSITIONS + settings.MAX_OPEN_DAY_POSITIONS
             if len(positions) >= max_pos:
@@ -91,6 +104,10 @@ class OrderExecutor:
             for pos in positions:
                 if pos.symbol == symbol:
                     return f"ALREADY_HOLDING_{symbol}"
+
+            # 3. Working entry (e.g. an unfilled GTC swing limit) - don't stack another one
+            if portfolio.open_orders(symbol):
+                return f"ENTRY_PENDING_{symbol}"
                     
             return "OK"
         except Exception as e:
@@ -106,6 +123,10 @@ class OrderExecutor:
             print(f"SKIP EXECUTION: {candidate.symbol} (Research Mode)")
             return "RESEARCH_ONLY"
 
+        with self._entry_lock:
+            return self._execute_trade(candidate)
+
+    def _execute_trade(self, candidate: Candidate) -> str:
         symbol = candidate.symbol
         
         # --- RISK GATE ---
@@ -116,294 +137,300 @@ class OrderExecutor:
 
         # --- OPTIONS ROUTING ---
         if candidate.section == "OPTIONS SETUP":
-             if not settings.OPTIONS_ENABLED:
-                 print(f"SKIP EXECUTION: {symbol} (Options Disabled)")
-                 return "SKIPPED_OPTIONS_DISABLED"
-
-             try:
-                 from executor_service.options_executor import options_executor
-                 return options_executor.execute_condor(candidate)
-             except Exception as oe:
-                 print(f"Options Routing Error: {oe}")
-                 return f"OPT_FAIL: {oe}"
+            return self._route_options(candidate)
         # -----------------------
 
-        side = "buy" if candidate.direction == Direction.LONG else "sell"
-        plan = candidate.trade_plan
-        
         # 1. Get Equity
         try:
-            acct = self.api.get_account()
-            equity = float(acct.equity)
+            equity = portfolio.equity(default=100000.0)
         except:
             equity = 100000.0
+
+        order_args, status = self._plan_order(candidate, equity)
+        if order_args is None:
+            return status
+
+        # 2. Submit Bracket Order
+        return self._submit(candidate, order_args)
+
+    def execute_batch(self, candidates: List[Candidate]) -> List[str]:
+        """
+        Auto-execution for a whole scan's candidates (same result strings as
+        execute_trade, one per candidate, in order).
+        1. One positions + open orders + account snapshot for the batch (portfolio state).
+        2. Risk gate, sizing and bracket validation for every candidate up front
+           (no I/O). Symbols held or with a working entry order are skipped.
+           Accepted orders count toward the position cap and block
+           duplicates within the batch.
+        3. Accepted orders are submitted concurrently on the order pool
+           (settings.ORDER_SUBMIT_WORKERS); condors run together on the options
+           executor's loop, so they don't hold order pool threads.
+        Discord + journal run on the post-trade thread, off the critical path.
+        Batches (and single trades) run one at a time: the next one snapshots
+        the portfolio only after this one's orders are booked.
+        """
+        if not candidates:
+            return []
+        if not self.api:
+            print(f"SKIP EXECUTION: {len(candidates)} candidates (No API)")
+            return ["FAILED_NO_API"] * len(candidates)
+        if settings.TRADING_MODE == TradingMode.RESEARCH:
+            print(f"SKIP EXECUTION: {len(candidates)} candidates (Research Mode)")
+            return ["RESEARCH_ONLY"] * len(candidates)
+
+        with self._entry_lock:
+            return self._execute_batch(candidates)
+
+    def _execute_batch(self, candidates: List[Candidate]) -> List[str]:
+        # 1. Snapshot (in-memory portfolio)
+        try:
+            positions = portfolio.positions()
+        except Exception as e:
+            print(f"Risk Check Error: {e}")
+            return ["RISK_CHECK_ERROR"] * len(candidates)
+        try:
+            equity = portfolio.equity(default=100000.0)
+        except:
+            equity = 100000.0
+
+        held = {p.symbol for p in positions}
+        # No position but an open order: a working entry (unfilled limit / stop entry)
+        pending = {o.symbol for o in portfolio.open_orders()} - held
+        open_count = len(positions)
+        max_pos = settings.MAX_OPEN_SWING_POSITIONS + settings.MAX_OPEN_DAY_POSITIONS
+
+        # 2. Plan
+        results: List[Optional[str]] = [None] * len(candidates)
+        jobs = [] # (result slot, fn, args)
+        condors = [] # result slots of options candidates
+        for i, cand in enumerate(candidates):
+            symbol = cand.symbol
+            if open_count >= max_pos:
+                risk_status = f"MAX_POSITIONS_REACHED ({open_count}/{max_pos})"
+            elif symbol in held:
+                risk_status = f"ALREADY_HOLDING_{symbol}"
+            elif symbol in pending:
+                risk_status = f"ENTRY_PENDING_{symbol}"
+            else:
+                risk_status = "OK"
+            if risk_status != "OK":
+                print(f"SKIP EXECUTION: {symbol} Risk Rejection: {risk_status}")
+                results[i] = risk_status
+                continue
+
+            if cand.section == "OPTIONS SETUP":
+                if not settings.OPTIONS_ENABLED:
+                    print(f"SKIP EXECUTION: {symbol} (Options Disabled)")
+                    results[i] = "SKIPPED_OPTIONS_DISABLED"
+                    continue
+                condors.append(i)
+            else:
+                order_args, status = self._plan_order(cand, equity)
+                if order_args is None:
+                    results[i] = status
+                    continue
+                jobs.append((i, self._submit, (cand, order_args)))
+
+            held.add(symbol)
+            open_count += 1
+
+        # 3. Submit concurrently (context copied so tracing spans follow the calls)
+        print(f"EXECUTOR: Batch of {len(candidates)} -> {len(jobs)} orders, {len(condors)} condors to submit.")
+        futures = [(i, self._order_pool.submit(contextvars.copy_context().run, fn, *args)) for i, fn, args in jobs]
+        if condors:
+            for i, res in zip(condors, self._route_condors([candidates[i] for i in condors])):
+                results[i] = res
+        for i, fut in futures:
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                print(f"EXECUTION FAILED: {candidates[i].symbol} - {e}")
+                results[i] = f"ERROR_{str(e)}"
+        return results
+
+    def _route_options(self, candidate: Candidate) -> str:
+        symbol = candidate.symbol
+        if not settings.OPTIONS_ENABLED:
+            print(f"SKIP EXECUTION: {symbol} (Options Disabled)")
+            return "SKIPPED_OPTIONS_DISABLED"
+
+        return self._route_condors([candidate])[0]
+
+    def _route_condors(self, candidates: List[Candidate]) -> List[str]:
+        try:
+            from executor_service.options_executor import options_executor
+            res_list = options_executor.execute_condors(candidates)
+        except Exception as oe:
+            print(f"Options Routing Error: {oe}")
+            return [f"OPT_FAIL: {oe}"] * len(candidates)
+        for res in res_list:
+            if res.startswith("SUCCESS"): ORDERS_SUBMITTED.inc(source="condor", result="success")
+            elif res.startswith(("ERROR", "PARTIAL")): ORDERS_SUBMITTED.inc(source="condor", result="failure")
+        return res_list
+
+    def _plan_order(self, candidate: Candidate, equity: float) -> Tuple[Optional[dict], str]:
+        """
+        Sizing + bracket validation, no broker calls.
+        Returns (order_args, "OK") or (None, rejection result string).
+        """
+        symbol = candidate.symbol
+        side = "buy" if candidate.direction == Direction.LONG else "sell"
+        plan = candidate.trade_plan
             
         qty = self.calculate_position_size(candidate, equity)
         
         if qty <= 0:
             print(f"SKIP EXECUTION: {symbol} (Calculated Qty 0)")
-            return "QTY_ZERO"
+            return None, "QTY_ZERO"
 
         print(f"EXECUTING {side.upper()} {qty} {symbol} @ {plan.entry} (Risk: ${equity * 0.015:.2f} - Aggressive)")
 
-        # 2. Submit Bracket Order
-        try:
+        type_order = 'market'
+        tif = 'day'
+        limit_price = None
+        
+        # Specific Logic for Day vs Swing
+        if candidate.section == "SWING":
+            type_order = 'limit'
+            tif = 'gtc'
+            limit_price = plan.entry # Use Entry as Limit
+        else:
+            # Day Trade: Market Entry
             type_order = 'market'
             tif = 'day'
-            limit_price = None
+        
+        # --- SAFETY SEAL: VALIDATE BRACKET ---
+        sl = plan.stop_loss
+        tp = plan.take_profit
+        en = plan.entry
+        
+        if not sl or not tp:
+            return None, f"REJECTED_SAFETY: Missing Legs (Stop: {sl}, Target: {tp})"
             
-            # Specific Logic for Day vs Swing
-            if candidate.section == "SWING":
-                type_order = 'limit'
-                tif = 'gtc'
-                limit_price = plan.entry # Use Entry as Limit
-            else:
-                # Day Trade: Market Entry
-                type_order = 'market'
-                tif = 'day'
+        # Logical Validation
+        if side == 'buy':
+            if sl >= en: return None, f"REJECTED_SAFETY: Long Stop ({sl}) >= Entry ({en})"
+            if tp <= en: return None, f"REJECTED_SAFETY: Long Target ({tp}) <= Entry ({en})"
+        else: # sell (short)
+            if sl <= en: return None, f"REJECTED_SAFETY: Short Stop ({sl}) <= Entry ({en})"
+            if tp >= en: return None, f"REJECTED_SAFETY: Short Target ({tp}) >= Entry ({en})"
+        # -------------------------------------
+
+        # Construct Args
+        order_args = {
+            "symbol": symbol,
+            "qty": qty,
+            "side": side,
+            "type": type_order,
+            "time_in_force": tif,
+            "order_class": 'bracket',
+            "take_profit": {'limit_price': tp},
+            "stop_loss": {'stop_price': sl}
+        }
+        
+        if limit_price:
+            order_args["limit_price"] = limit_price
+        return order_args, "OK"
+
+    def _submit(self, candidate: Candidate, order_args: dict) -> str:
+        symbol = candidate.symbol
+        try:
+            order = self.api.submit_order(**order_args)
+        except Exception as e:
+            ORDERS_SUBMITTED.inc(source="scanner", result="failure")
+            print(f"EXECUTION FAILED: {symbol} - {e}")
+            return f"ERROR_{str(e)}"
+        ORDERS_SUBMITTED.inc(source="scanner", result="success")
+        print(f"ORDER SUBMITTED: {order.id}") # Critical Log
+        portfolio.track_order(order)
+
+        # Discord + journal in the background (one thread, so journal appends stay ordered)
+        self._post_pool.submit(self._post_trade, candidate, order_args["side"], order_args["qty"])
+        return f"SUCCESS_{order.id}"
+
+    def _post_trade(self, candidate: Candidate, side: str, qty: int):
+        symbol = candidate.symbol
+        plan = candidate.trade_plan
+        en, sl, tp = plan.entry, plan.stop_loss, plan.take_profit
+
+        # --- DISCORD NOTIFICATION (PRIORITY) ---
+        try:
+            from utils.notifications import notifier
             
-            # --- SAFETY SEAL: VALIDATE BRACKET ---
-            sl = plan.stop_loss
-            tp = plan.take_profit
-            en = plan.entry
+            # Determine Bot Name
+            bot_name = "🦅 SWING BOT"
+            if candidate.section == "SCALP": bot_name = "⚔️ WARRIOR BOT"
+            elif candidate.section == "OPTIONS": bot_name = "🎯 OPTIONS BOT"
+            elif candidate.section == "DAY_TRADE": bot_name = "⚡ DAY BOT"
             
-            if not sl or not tp:
-                return f"REJECTED_SAFETY: Missing Legs (Stop: {sl}, Target: {tp})"
-                
-            # Logical Validation
-            if side == 'buy':
-                if sl >= en: return f"REJECTED_SAFETY: Long Stop ({sl}) >= Entry ({en})"
-                if tp <= en: return f"REJECTED_SAFETY: Long Target ({tp}) <= Entry ({en})"
-            else: # sell (short)
-                if sl <= en: return f"REJECTED_SAFETY: Short Stop ({sl}) <= Entry ({en})"
-                if tp >= en: return f"REJECTED_SAFETY: Short Target ({tp}) >= Entry ({en})"
-            # -------------------------------------
-
-            # Construct Args
-            order_args = {
-                "symbol": symbol,
-                "qty": qty,
-                "side": side,
-                "type": type_order,
-                "time_in_force": tif,
-                "order_class": 'bracket',
-                "take_profit": {'limit_price': tp},
-                "stop_loss": {'stop_price': sl}
-            }
+            # Calculate R-Risk/Reward
+            risk = abs(en - sl) if sl else 1
+            reward = abs(tp - en) if tp else 1
+            rr = reward / risk if risk > 0 else 0
             
-            if limit_price:
-                order_args["limit_price"] = limit_price
+            msg = (
+                f"**Action:** {side.upper()} {qty} shares\n"
+                f"**Entry:** ${plan.entry:.2f}\n"
+                f"**Stop:** ${plan.stop_loss:.2f}\n"
+                f"**Target:** ${plan.take_profit:.2f} ({rr:.1f}R)\n"
+                f"**Score:** {candidate.scores.overall_rank_score}/100\n"
+                f"**Setup:** {candidate.setup_name}"
+            )
             
-            order = self.api.submit_order(**order_args)
-            print(f"ORDER SUBMITTED: {order.id}") # Critical Log
+            notifier.send_message(f"🚨 {bot_name}: {symbol}", msg, color=0x00ff00)
+        except Exception as note_err:
+            print(f"DISCORD FAIL: {note_err}")
+        # ----------------------------
 
-            # --- DISCORD NOTIFICATION (PRIORITY) ---
-            try:
-                from utils.notifications import notifier
-                
-                # Determine Bot Name
-                bot_name = "🦅 SWING BOT"
-                if candidate.section == "SCALP": bot_name = "⚔️ WARRIOR BOT"
-                elif candidate.section == "OPTIONS": bot_name = "🎯 OPTIONS BOT"
-                elif candidate.section == "DAY_TRADE": bot_name = "⚡ DAY BOT"
-                
-                # Calculate R-Risk/Reward
-                risk = abs(en - sl) if sl else 1
-                reward = abs(tp - en) if tp else 1
-                rr = reward / risk if risk > 0 else 0
-                
-                msg = (
-                    f"**Action:** {side.upper()} {qty} shares\n"
-                    f"**Entry:** ${plan.entry:.2f}\n"
-                    f"**Stop:** ${plan.stop_loss:.2f}\n"
-                    f"**Target:** ${plan.take_profit:.2f} ({rr:.1f}R)\n"
-                    f"**Score:** {candidate.scores.overall_rank_score}/100\n"
-                    f"**Setup:** {candidate.setup_name}"
-                )
-                
-                notifier.send_message(f"🚨 {bot_name}: {symbol}", msg, color=0x00ff00)
-            except Exception as note_err:
-                print(f"DISCORD FAIL: {note_err}")
-            # ----------------------------
-
-            # --- JOURNAL LOGGING ---
-            try:
-                from executor_service.trade_logger import trade_logger
-                trade_logger.log_trade_entry(
-                    symbol=symbol,
-                    bucket=candidate.section,
-                    qty=qty,
-                    entry_price=plan.entry,
-                    stop=plan.stop_loss,
-                    target=plan.take_profit,
-                    score=candidate.scores.overall_rank_score,
-                    setup_name=candidate.setup_name
-                )
-            except Exception as log_err:
-                print(f"LOGGER FAIL: {log_err}")
-            # -----------------------
-            
-            return f"SUCCESS_{order.id}"
-            
-        except Exception as e:
-            print(f"EXECUTION FAILED: {symbol} - {e}")
-            return f"ERROR_{str(e)}"
+        # --- JOURNAL LOGGING ---
+        try:
+            from executor_service.trade_logger import trade_logger
+            trade_logger.log_trade_entry(
+                symbol=symbol,
+                bucket=candidate.section,
+                qty=qty,
+                entry_price=plan.entry,
+                stop=plan.stop_loss,
+                target=plan.take_profit,
+                score=candidate.scores.overall_rank_score,
+                setup_name=candidate.setup_name
+            )
+        except Exception as log_err:
+            print(f"LOGGER FAIL: {log_err}")
+        # -----------------------
 
     def ensure_protective_stops(self) -> list:
         """
-        Safety Net: Scans for open positions without active Stop Loss orders.
-        If found, places an emergency Stop Loss at 2.0% risk from CURRENT price.
-        Returns list of actions taken.
+        Safety Net: heals open positions without an active Stop Loss
+        (emergency stop 2.0% from CURRENT price). Returns list of actions taken.
+        (Backstop: stop-outs/cancels are normally healed from trade events, see order_lifecycle.)
         """
         if not self.api: return []
-        
-        actions = []
         try:
-            positions = self.api.list_positions()
-            open_orders = self.api.list_orders(status='open')
-            
-            # Build map of covered symbols (Checking for Stop types)
-            covered = set()
-            for o in open_orders:
-                if o.type in ['stop', 'stop_limit', 'trailing_stop']:
-                    covered.add(o.symbol)
-                    
-            for p in positions:
-                if p.symbol not in covered:
-                    # NAKED POSITION FOUND
-                    sym = p.symbol
-                    qty_val = float(p.qty)
-                    qty_int = abs(int(qty_val))
-                    curr = float(p.current_price)
-                    side = 'sell' if qty_val > 0 else 'buy'
-                    
-                    dist = curr * 0.02
-                    stop_price = round(curr - dist, 2) if side == 'sell' else round(curr + dist, 2)
-                    
-                    try:
-                        self.api.submit_order(
-                            symbol=sym,
-                            qty=qty_int,
-                            side=side,
-                            type='stop',
-                            time_in_force='gtc',
-                            stop_price=stop_price
-                        )
-                        # NOTIFICATION
-                        msg = f"🛡️ AUTO-HEALED: {sym} (No Stop Found)\nAction: Placed Safety Stop @ {stop_price}"
-                        actions.append(msg)
-                        print(msg)
-                        
-                        try:
-                            from utils.notifications import notifier
-                            notifier.send_message(f"🛡️ RISK WATCHDOG: {sym}", msg, color=0xffaa00)
-                        except: pass
-                        
-                    except Exception as e:
-                        err = f"❌ FAILED TO HEAL {sym}: {e}"
-                        actions.append(err)
-                        print(err)
-                        try:
-                            from utils.notifications import notifier
-                            notifier.send_message(f"🛡️ RISK WATCHDOG FAILED: {sym}", err, color=0xff0000)
-                        except: pass
+            return stop_manager.run(ratchet=False)
         except Exception as cx:
             print(f"Watchdog Error: {cx}")
-            
-        return actions
+            return []
 
-    async def manage_peak_exits(self):
+    def protect_position(self, p) -> str:
+        """Emergency stop for one position (no-op message if it already has one)."""
+        actions = stop_manager.run(ratchet=False, positions=[p])
+        return actions[0] if actions else f"🛡️ {p.symbol} already protected"
+
+    def manage_stops(self) -> list:
         """
-        PROFIT PROTECTOR:
-        Loops through active LONG positions.
-        Checks for 'Peak Exhaustion' (Price rising, Volume falling).
-        If detected, TIGHTENS the Stop Loss (aggregates to a Trailing Stop).
+        PROFIT PROTECTOR + SAFETY NET in one pass (stop_manager): heal naked
+        positions, trail LONG stops at 2.0 ATR, tighten to 0.5 ATR on 'Peak
+        Exhaustion' (Price rising, Volume falling), drop redundant stops.
+        One 5Min bar fetch for the book, only the changed orders are sent.
         """
-        if not self.api: return
-        
-        from strategy_engine.data_loader import DataLoader
-        dl = DataLoader()
-        
+        if not self.api: return []
         print("🦅 CHECKING FOR PEAK EXHAUSTION...")
-        
         try:
-            positions = self.api.list_positions()
-            for p in positions:
-                if p.side != 'long': continue # Only managing Longs for now
-                
-                symbol = p.symbol
-                qty = float(p.qty)
-                current_price = float(p.current_price)
-                
-                # 1. Fetch Data (5min candles for sensitivity)
-                data_map = dl.fetch_intraday_snapshot([symbol], timeframe='5Min')
-                if symbol not in data_map: continue
-                
-                df = data_map[symbol].get('intraday_df')
-                if df is None or df.empty: continue
-                
-                # 2. Calc Exhaustion Logic
-                # (Replicating backtest logic)
-                df['avg_vol'] = df['volume'].rolling(20).mean()
-                df['vol_ratio'] = df['volume'] / df['avg_vol']
-                df['high_low'] = df['high'] - df['low']
-                df['atr'] = df['high_low'].rolling(14).mean()
-                
-                curr = df.iloc[-1]
-                prev = df.iloc[-2]
-                
-                # Signal: Price Up, Volume Weak (< 90% avg)
-                price_up = curr['close'] > prev['close']
-                vol_weak = curr['vol_ratio'] < 0.9
-                is_exhausted = price_up and vol_weak
-                
-                # 3. Determine 'Tight Stop' Price
-                atr = curr['atr'] if curr['atr'] > 0 else (current_price * 0.01)
-                
-                if is_exhausted:
-                    # TIGHTEN: 0.5 ATR Trail
-                    proposed_stop = current_price - (0.5 * atr)
-                    mode = "EXHAUSTION (Tight)"
-                else:
-                    # STANDARD TRAIL: 2.0 ATR (Standard Wave Ride)
-                    proposed_stop = current_price - (2.0 * atr)
-                    mode = "STANDARD (Wide)"
-                    
-                proposed_stop = round(proposed_stop, 2)
-                
-                # 4. Update Existing Stop Order
-                # Find the open stop order
-                orders = self.api.list_orders(status='open', symbol=symbol)
-                stop_order = None
-                for o in orders:
-                    if o.type in ['stop', 'stop_limit', 'trailing_stop']:
-                        stop_order = o
-                        break
-                
-                if stop_order:
-                    current_stop_price = float(stop_order.stop_price) if stop_order.stop_price else 0
-                    
-                    # RATCHET LOGIC: Only move UP
-                    if proposed_stop > current_stop_price:
-                        # Safety Check: Don't move stop ABOVE current price
-                        if proposed_stop < current_price:
-                            print(f"🌊 RATCHET: {symbol} [{mode}] | Moving Stop {current_stop_price} -> {proposed_stop}")
-                            try:
-                                self.api.replace_order(
-                                    order_id=stop_order.id,
-                                    stop_price=proposed_stop
-                                )
-                                from utils.notifications import notifier
-                                notifier.send_message(
-                                    f"🌊 PEAK MANAGER: {symbol}",
-                                    f"Locked Profit. Stop moved to ${proposed_stop} ({mode}).\nPrice: ${current_price}",
-                                    color=0x00ff00
-                                )
-                            except Exception as replace_err:
-                                print(f"Generic Replace Error: {replace_err}")
-
+            return stop_manager.run()
         except Exception as e:
             print(f"Peak Manager Error: {e}")
+            return []
             
 # Global Instance
 executor = OrderExecutor()
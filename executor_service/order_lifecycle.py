@@ -0,0 +1,153 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Set
+import pandas as pd
+from configs.settings import settings
+from executor_service.portfolio_state import portfolio, FILL_EVENTS, CLOSED_STATUSES
+from executor_service.order_executor import executor
+from executor_service.stop_manager import STOP_TYPES
+from utils.metrics import LIFECYCLE_REACTION_SECONDS
+
+# Position states (per symbol)
+FLAT = "FLAT"
+UNPROTECTED = "UNPROTECTED" # Position open, no live stop order
+PROTECTED = "PROTECTED"     # Position open with a stop / stop_limit / trailing_stop working
+
+def notify_closed_trade(t: dict):
+    """Discord card for a journaled exit (event-driven or from the backstop poller)."""
+    from utils.notifications import notifier
+    pnl = t.get('pnl_dollars', 0)
+    pct = t.get('pnl_percent', 0) * 100
+    symbol = t.get('symbol')
+
+    emoji = "🟢" if pnl >= 0 else "🔴"
+    title = f"{emoji} TRADE CLOSED: {symbol}"
+
+    msg = (
+        f"**Result:** ${pnl:.2f} ({pct:.2f}%)\n"
+        f"**Exit Price:** ${t.get('exit_price', 0):.2f}\n"
+        f"**Hold Time:** {t.get('holding_minutes', 0):.1f} mins"
+    )
+
+    color = 0x00ff00 if pnl >= 0 else 0xff0000
+    notifier.send_message(title, msg, color)
+
+class OrderLifecycle:
+    """
+    Order/position state machine driven by the portfolio's trade updates.
+
+      FLAT        --entry fill-->                  PROTECTED (bracket stop live) / UNPROTECTED
+      PROTECTED   --stop canceled/expired/rejected--> UNPROTECTED
+      UNPROTECTED --no stop after PROTECT_GRACE_SECONDS--> emergency stop --> PROTECTED
+      any         --fill to flat-->                FLAT (exit journaled + notified)
+
+    Reactions run on one worker thread (serialized, never on the stream thread).
+    The grace period lets a replacement stop or a bracket leg land before healing.
+    The 5-minute pollers become a LIFECYCLE_BACKSTOP_MINUTES reconciliation backstop.
+    """
+
+    def __init__(self):
+        self.states: Dict[str, str] = {}
+        self._pending: Set[str] = set() # Symbols with a protect check scheduled
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lifecycle")
+        self.started = False
+
+    def start(self):
+        if self.started: return
+        portfolio.subscribe(self.on_event)
+        self.started = True
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"states": dict(self.states), "pending_protect": sorted(self._pending)}
+
+    def _set(self, symbol: str, state: str):
+        with self._lock:
+            if state == FLAT:
+                self.states.pop(symbol, None)
+            else:
+                self.states[symbol] = state
+
+    @staticmethod
+    def _has_stop(symbol: str) -> bool:
+        return any(o.type in STOP_TYPES for o in portfolio.open_orders(symbol))
+
+    # --- Transitions (stream thread: decide, then hand off) ---
+
+    def on_event(self, data: dict, prev_qty: float, new_qty: float):
+        t0 = time.perf_counter()
+        order = data["order"]
+        symbol = order.get("symbol")
+
+        # 1. Fills that move the position
+        if data.get("event") in FILL_EVENTS and new_qty != prev_qty:
+            if new_qty == 0:
+                self._set(symbol, FLAT)
+                self._pool.submit(self._journal_exit, symbol, data, t0)
+            elif self._has_stop(symbol):
+                self._set(symbol, PROTECTED)
+            else:
+                self._set(symbol, UNPROTECTED)
+                self._schedule_protect(symbol, t0)
+            return
+
+        # 2. Stop orders on a live position
+        if order.get("type") not in STOP_TYPES or new_qty == 0:
+            return
+        status = order.get("status")
+        if status not in CLOSED_STATUSES:
+            self._set(symbol, PROTECTED)
+        elif status != "filled" and not self._has_stop(symbol):
+            print(f"LIFECYCLE: {symbol} stop {status}. Position unprotected.")
+            self._set(symbol, UNPROTECTED)
+            self._schedule_protect(symbol, t0)
+
+    def _schedule_protect(self, symbol: str, t0: float):
+        with self._lock:
+            if symbol in self._pending: return
+            self._pending.add(symbol)
+        timer = threading.Timer(settings.PROTECT_GRACE_SECONDS, self._pool.submit, args=(self._protect, symbol, t0))
+        timer.daemon = True
+        timer.start()
+
+    # --- Reactions (lifecycle thread) ---
+
+    def _protect(self, symbol: str, t0: float):
+        with self._lock:
+            self._pending.discard(symbol)
+        pos = portfolio.position(symbol)
+        if pos is None:
+            self._set(symbol, FLAT)
+            return
+        if self._has_stop(symbol):
+            self._set(symbol, PROTECTED)
+            return
+
+        msg = executor.protect_position(pos)
+        healed = not msg.startswith("❌")
+        self._set(symbol, PROTECTED if healed else UNPROTECTED)
+        LIFECYCLE_REACTION_SECONDS.observe(time.perf_counter() - t0, action="protect", result="ok" if healed else "error")
+
+    def _journal_exit(self, symbol: str, data: dict, t0: float):
+        order = data["order"]
+        result = "ok"
+        try:
+            from executor_service.trade_logger import trade_logger
+            price = float(data.get("price") or order.get("filled_avg_price"))
+            ts = pd.Timestamp(data.get("timestamp") or order.get("filled_at") or datetime.utcnow())
+            if ts.tzinfo is not None:
+                ts = ts.tz_convert("UTC").tz_localize(None) # Journal times are naive UTC
+            closed = trade_logger.log_trade_exit(symbol, price, ts.to_pydatetime())
+            if not closed:
+                print(f"LIFECYCLE: {symbol} flat @ {price}, no open journal entry (backstop will reconcile).")
+            for t in closed:
+                notify_closed_trade(t)
+        except Exception as e:
+            result = "error"
+            print(f"LIFECYCLE: Exit journaling failed for {symbol}: {e}")
+        LIFECYCLE_REACTION_SECONDS.observe(time.perf_counter() - t0, action="exit", result=result)
+
+lifecycle = OrderLifecycle()
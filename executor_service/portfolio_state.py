@@ -0,0 +1,322 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+import alpaca_trade_api as tradeapi
+from alpaca_trade_api.entity import Account, Entity, Order, Position
+from configs.settings import settings
+from utils.metrics import PORTFOLIO_EVENTS, PORTFOLIO_DRIFT
+
+# Order statuses that take an order out of the open book
+CLOSED_STATUSES = {"filled", "canceled", "expired", "rejected", "replaced", "done_for_day"}
+FILL_EVENTS = {"fill", "partial_fill"}
+
+def _raw(obj) -> dict:
+    """Plain dict behind an Alpaca entity (stream payloads and REST objects alike)."""
+    return getattr(obj, "_raw", obj)
+
+class ReplayStream:
+    """
+    Local stand-in for the broker's trade-updates websocket: feeds recorded
+    events (dicts, or a JSONL file of them) to the subscribed handler in order.
+    Same subscribe_trade_updates / run / stop surface as alpaca's Stream.
+    """
+
+    def __init__(self, events: Union[str, Iterable[dict]], delay: float = 0.0):
+        self.events = events
+        self.delay = delay
+        self._handler = None
+        self._stopped = False
+
+    def subscribe_trade_updates(self, handler):
+        self._handler = handler
+
+    def _load(self) -> List[dict]:
+        if not isinstance(self.events, str):
+            return list(self.events)
+        with open(self.events) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def run(self):
+        async def _feed():
+            for event in self._load():
+                if self._stopped: break
+                # The live stream hands over {"stream": "trade_updates", "data": {...}} as Entity(data)
+                await self._handler(Entity(event.get("data", event)))
+                if self.delay: await asyncio.sleep(self.delay)
+        asyncio.run(_feed())
+
+    def stop(self):
+        self._stopped = True
+
+class PortfolioState:
+    """
+    In-memory positions, open orders and account for every consumer (risk
+    gate, watchdog, peak manager, journal sync, dashboard, health check).
+
+    1. Bootstrap: one get_account / list_positions / list_orders snapshot.
+    2. Trade updates (websocket) apply new/fill/cancel/replace events as they happen.
+    3. Reconcile every PORTFOLIO_RECONCILE_SECONDS: fresh snapshot replaces the
+       state, events that arrived while it was fetched are re-applied on top,
+       and any disagreement with the event-built state is counted as drift.
+    Position prices/PnL move with our fills and are re-marked on reconcile;
+    account equity is as of the last reconcile.
+    """
+
+    def __init__(self):
+        self.api = None
+        if settings.APCA_API_KEY_ID and settings.APCA_API_SECRET_KEY:
+            self.api = tradeapi.REST(
+                settings.APCA_API_KEY_ID,
+                settings.APCA_API_SECRET_KEY,
+                settings.APCA_API_BASE_URL,
+                api_version='v2'
+            )
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._positions: Dict[str, Position] = {}
+        self._orders: Dict[str, Order] = {}
+        self._account: Optional[Account] = None
+        self._replay: Optional[List[dict]] = None # Events seen while a reconcile snapshot is in flight
+        self._stream = None
+        self._listeners: List[Callable] = []
+        self.healthy = False
+        self.events = 0
+        self.last_event_at = None
+        self.last_reconcile_at = None
+
+    # --- Reads (consumers) ---
+
+    def positions(self) -> List[Position]:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._positions.values())
+
+    def position(self, symbol: str) -> Optional[Position]:
+        self._ensure_loaded()
+        with self._lock:
+            return self._positions.get(symbol)
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+        self._ensure_loaded()
+        with self._lock:
+            return [o for o in self._orders.values() if symbol is None or o.symbol == symbol]
+
+    @property
+    def account(self) -> Optional[Account]:
+        self._ensure_loaded()
+        return self._account
+
+    def equity(self, default: float = 0.0) -> float:
+        acct = self.account
+        try:
+            return float(acct.equity)
+        except (AttributeError, TypeError, ValueError):
+            return default
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "healthy": self.healthy,
+                "positions": len(self._positions),
+                "open_orders": len(self._orders),
+                "events": self.events,
+                "last_event_at": self.last_event_at,
+                "last_reconcile_at": self.last_reconcile_at,
+                "stream": type(self._stream).__name__ if self._stream else None,
+            }
+
+    # --- Writes (stream + our own submissions) ---
+
+    def subscribe(self, listener: Callable):
+        """
+        listener(event, prev_qty, new_qty) runs after each trade update is applied,
+        on the stream thread: it must hand real work off, not block.
+        prev_qty/new_qty are the order symbol's signed position before and after.
+        """
+        self._listeners.append(listener)
+
+    def track_order(self, order):
+        """Books an order we just submitted/replaced before its stream event arrives."""
+        if order is None: return
+        with self._lock:
+            self._apply_order(dict(_raw(order)))
+
+    def apply_event(self, event):
+        """One trade-updates message: {"event", "order", "price", "qty", "position_qty", ...}."""
+        data = _raw(event)
+        order = data.get("order")
+        if not order: return
+        name = data.get("event", "unknown")
+        PORTFOLIO_EVENTS.inc(event=name)
+        symbol = order.get("symbol")
+        with self._lock:
+            prev = self._positions.get(symbol)
+            if self._replay is not None:
+                self._replay.append(data)
+            self._apply(data)
+            self.events += 1
+            self.last_event_at = time.time()
+            new = self._positions.get(symbol)
+
+        prev_qty = float(prev.qty) if prev else 0.0
+        new_qty = float(new.qty) if new else 0.0
+        for listener in self._listeners:
+            try:
+                listener(data, prev_qty, new_qty)
+            except Exception as e:
+                print(f"PORTFOLIO: Listener error ({e})")
+
+    def _apply(self, data: dict):
+        order = dict(data["order"])
+        self._apply_order(order)
+        if data.get("event") in FILL_EVENTS and data.get("position_qty") is not None:
+            self._apply_fill(order, float(data.get("price") or order.get("filled_avg_price") or 0), float(data["position_qty"]))
+
+    def _apply_order(self, order: dict):
+        oid = order.get("id")
+        if not oid: return
+        if order.get("status") in CLOSED_STATUSES:
+            self._orders.pop(oid, None)
+        else:
+            self._orders[oid] = Order(order)
+        # Bracket / OCO legs (stop loss, take profit) are open orders of their own
+        for leg in order.get("legs") or []:
+            self._apply_order(dict(leg))
+        # Replacement: the old order leaves the book, its replacement arrives with its own events
+        if order.get("replaces"):
+            self._orders.pop(order["replaces"], None)
+
+    def _apply_fill(self, order: dict, price: float, new_qty: float):
+        symbol = order["symbol"]
+        old = self._positions.get(symbol)
+        if new_qty == 0:
+            self._positions.pop(symbol, None)
+            return
+
+        old_qty = float(old.qty) if old else 0.0
+        old_avg = float(old.avg_entry_price) if old else price
+        if old_qty == 0 or (old_qty > 0) != (new_qty > 0):
+            avg = price # New or flipped
+        elif abs(new_qty) > abs(old_qty):
+            avg = (old_avg * abs(old_qty) + price * (abs(new_qty) - abs(old_qty))) / abs(new_qty)
+        else:
+            avg = old_avg # Reduced: cost basis per share unchanged
+
+        raw = dict(_raw(old)) if old else {
+            "symbol": symbol,
+            "asset_id": order.get("asset_id"),
+            "asset_class": order.get("asset_class", "us_equity"),
+        }
+        mult = 100 if raw.get("asset_class") == "us_option" else 1
+        cost = avg * new_qty * mult
+        pl = (price - avg) * new_qty * mult
+        raw.update({
+            "qty": str(new_qty if new_qty % 1 else int(new_qty)),
+            "side": "long" if new_qty > 0 else "short",
+            "avg_entry_price": str(avg),
+            "current_price": str(price),
+            "market_value": str(price * new_qty * mult),
+            "cost_basis": str(cost),
+            "unrealized_pl": str(pl),
+            "unrealized_plpc": str(pl / abs(cost) if cost else 0.0),
+        })
+        self._positions[symbol] = Position(raw)
+
+    # --- Bootstrap / reconcile ---
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.reconcile()
+        if not self._loaded and self.api:
+            raise RuntimeError("Portfolio state unavailable (broker snapshot failed)")
+
+    def reconcile(self) -> Dict[str, int]:
+        """Replaces the state with a fresh broker snapshot. Returns drift counts {kind: n}."""
+        if not self.api:
+            self._loaded = True # Nothing to mirror
+            return {}
+
+        with self._lock:
+            self._replay = []
+        try:
+            account = self.api.get_account()
+            positions = self.api.list_positions()
+            orders = self.api.list_orders(status="open", limit=500)
+        except Exception as e:
+            with self._lock:
+                self._replay = None
+            self.healthy = False
+            print(f"PORTFOLIO: Reconcile failed: {e}")
+            return {}
+
+        with self._lock:
+            drift = self._drift(positions, orders) if self._loaded else {}
+            self._account = account
+            self._positions = {p.symbol: p for p in positions}
+            self._orders = {o.id: o for o in orders}
+            for data in self._replay:
+                self._apply(data)
+            self._replay = None
+            self._loaded = True
+            self.healthy = True
+            self.last_reconcile_at = time.time()
+
+        for kind, n in drift.items():
+            PORTFOLIO_DRIFT.inc(n, kind=kind)
+        if drift:
+            print(f"PORTFOLIO: Reconcile corrected drift {drift}")
+        return drift
+
+    def _drift(self, positions, orders) -> Dict[str, int]:
+        live = {p.symbol: float(p.qty) for p in positions}
+        mine = {s: float(p.qty) for s, p in self._positions.items()}
+        drift = {}
+        pos = sum(1 for s in set(live) | set(mine) if live.get(s) != mine.get(s))
+        if pos: drift["position"] = pos
+        order = len({o.id for o in orders} ^ set(self._orders))
+        if order: drift["order"] = order
+        return drift
+
+    # --- Stream ---
+
+    def start(self, stream=None):
+        """
+        Bootstraps and subscribes to trade updates on a daemon thread.
+        `stream`: anything with subscribe_trade_updates/run (ReplayStream for
+        dry runs); default is the broker websocket, or TRADE_UPDATES_REPLAY.
+        """
+        self.reconcile()
+        if stream is None:
+            if settings.TRADE_UPDATES_REPLAY:
+                stream = ReplayStream(settings.TRADE_UPDATES_REPLAY)
+            elif self.api:
+                from alpaca_trade_api.stream import Stream
+                stream = Stream(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, settings.APCA_API_BASE_URL)
+            else:
+                print("PORTFOLIO: No API keys. Trade-updates stream disabled.")
+                return
+
+        async def on_trade_update(data):
+            try:
+                self.apply_event(data)
+            except Exception as e:
+                print(f"PORTFOLIO: Bad trade update ({e}): {data}")
+
+        stream.subscribe_trade_updates(on_trade_update)
+        self._stream = stream
+        threading.Thread(target=self._run_stream, args=(stream,), name="trade-updates", daemon=True).start()
+        print(f"PORTFOLIO: Tracking {len(self._positions)} positions / {len(self._orders)} open orders from trade updates.")
+
+    def _run_stream(self, stream):
+        try:
+            stream.run()
+        except Exception as e:
+            print(f"PORTFOLIO: Trade-updates stream stopped: {e}. Reconcile keeps state current.")
+
+portfolio = PortfolioState()
@@ -1,58 +1,52 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from strategy_engine.scanner_service import scanner
+from strategy_engine.scanner_service import scanner, TIMEFRAME_ENGINES, ALL_ENGINES, STATUS_SYMBOLS
 from utils.market_clock import MarketClock
 from utils.notifications import notifier
 from executor_service.order_executor import executor
+from utils.execution import execution
+from utils.tracing import tracer
+from utils.metrics import SCHEDULER_JOB_OVERLAPS
+from utils.bar_clock import bar_clock, bar_trigger, TIMEFRAMES
+from configs.settings import settings
+from datetime import datetime
+from datetime import time as dtime
 import pytz
 
 # Initialize Scheduler
 scheduler = AsyncIOScheduler()
 
-async def scheduled_market_scan(scan_name: str):
+@tracer.job("market_scan")
+async def scheduled_market_scan(scan_name: str, engines=ALL_ENGINES, report: bool = True, execute: bool = True,
+                                session_gate: bool = True):
     """
-    Job that runs at specific times.
-    Checks if market is open, runs scan, alerts results, EXECUTES TRADES.
+    Job that runs on bar closes (see on_scan_bar_close / on_daily_close).
+    Runs the engines due on the bar, alerts results; the scan itself EXECUTES TRADES
+    (scanner auto-execution) unless execute=False.
+    report=False only notifies when something was found.
+    session_gate=False is for the completed daily bar: no market-open check and
+    no intraday segment rules.
     """
-    print(f"SCHEDULER: Starting {scan_name}...")
+    print(f"SCHEDULER: Starting {scan_name} ({', '.join(engines)})...")
     
-    # 1. Market Status Check
-    if not MarketClock.is_market_open():
-        # Optional: check if pre/post market rules allow?
-        # For now, strict:
-        print("Market Closed. Use force override if needed.")
-        # We might still run scan to get data, but not execute?
+    # 1. Market Status Check (holidays / early closes from the broker calendar)
+    if session_gate and not MarketClock.is_market_open():
+        print("SCHEDULER: Market Closed. Skipping scan.")
+        return
     
-    # 2. Run Scan
-    # The scan run checks MarketClock internally for "Can Trade" permissions
-    # But filters candidates.
-    results = await scanner.run_scan()
-    
-
+    # 2. Run Scan (only the due engines, only symbols with a new bar)
+    with tracer.timed("scan"):
+        results, scanned_at = await scanner.scan_engines(engines, execute=execute, gate=session_gate)
 
     # 3. Process Results for Notification
-    # We want to know how many trades were found.
+    # We want to know how many trades were found (status cards aren't signals).
     swings = results.get("Swing", [])
     options = results.get("Options", [])
     days = results.get("Day Trade", [])
     
-    all_candidates = swings + options + days
-    
-    # --- AUTO EXECUTION ---
-    from configs.settings import settings
-    if settings.AUTO_EXECUTION_ENABLED:
-        print(f"SCHEDULER: Auto-Execution Enabled. Processing {len(all_candidates)} candidates...")
-        for cand in all_candidates:
-            try:
-                # Check Compliance & Execute
-                # executor handles risk checks internally
-                res = executor.execute_trade(cand)
-                print(f"EXECUTION RESULT ({cand.symbol}): {res}")
-            except Exception as e:
-                print(f"Failed to execute {cand.symbol}: {e}")
-    else:
-        print("SCHEDULER: Auto-Execution DISABLED. Signaling only.")
-    # ----------------------
+    all_candidates = [c for c in swings + options + days if c.symbol not in STATUS_SYMBOLS]
+    for c in all_candidates:
+        print(f"SIGNAL ({c.symbol}): {c.setup_name}") # Execution result is appended to setup_name
     
     # GROUP BY STRATEGY
     from collections import defaultdict
@@ -63,7 +57,7 @@ async def scheduled_market_scan(scan_name: str):
         # We group by the first word or full name
         strat_counts[c.setup_name].append(c)
     
-    msg_lines = [f"**{scan_name} Report**"]
+    msg_lines = [f"**{scan_name} Report** (scan @ {scanned_at.strftime('%H:%M:%S')})"]
     
     if not all_candidates:
         msg_lines.append("💤 No Signals Found.")
@@ -86,45 +80,37 @@ async def scheduled_market_scan(scan_name: str):
             if len(c_list) > 3:
                  msg_lines.append(f"   • ... and {len(c_list)-3} more")
 
-    # Send
+    # Send (intraday bar-close scans stay quiet unless they found something)
+    if not report and not all_candidates:
+        return
     color = 0x00ff00 if all_candidates else 0xcccccc
-    notifier.send_message(f"📡 Bot Scan: {scan_name}", "\n".join(msg_lines), color)
+    with tracer.timed("notify") as span:
+        await execution.run_io(tracer.bind(span, notifier.send_message), f"📡 Bot Scan: {scan_name}", "\n".join(msg_lines), color)
 
+@tracer.job("exit_poller")
 def check_trade_exits():
     """
-    Polls the trade logger to see if any open trades have closed.
-    If so, sends a notification.
+    Backstop: polls the trade logger for open trades that have closed without
+    a fill event (stream gap, restart). If so, sends a notification.
     """
     try:
         from executor_service.trade_logger import trade_logger
+        from executor_service.order_lifecycle import notify_closed_trade
         # Returns list of dicts
         closed_trades = trade_logger.update_closed_trades()
         
         if closed_trades:
             print(f"SCHEDULER: Found {len(closed_trades)} closed trades.")
             for t in closed_trades:
-                # Format Message
-                pnl = t.get('pnl_dollars', 0)
-                pct = t.get('pnl_percent', 0) * 100
-                symbol = t.get('symbol')
-                
-                emoji = "🟢" if pnl >= 0 else "🔴"
-                title = f"{emoji} TRADE CLOSED: {symbol}"
-                
-                msg = (
-                    f"**Result:** ${pnl:.2f} ({pct:.2f}%)\n"
-                    f"**Exit Price:** ${t.get('exit_price', 0):.2f}\n"
-                    f"**Hold Time:** {t.get('holding_minutes', 0):.1f} mins"
-                )
-                
-                color = 0x00ff00 if pnl >= 0 else 0xff0000
-                notifier.send_message(title, msg, color)
+                notify_closed_trade(t)
     except Exception as e:
         print(f"Error checking exits: {e}")
 
+@tracer.job("risk_watchdog")
 def risk_watchdog():
     """
-    Periodically checks for NAKED positions (No Stops) and heals them.
+    Backstop: checks for NAKED positions (No Stops) and heals them.
+    Stop cancels / unprotected fills are normally healed by order_lifecycle within seconds.
     """
     try:
         from executor_service.order_executor import executor
@@ -135,68 +121,120 @@ def risk_watchdog():
     except Exception as e:
         print(f"Watchdog Fail: {e}")
 
+# Bar closes that keep the old fixed-time report names (all on 5-minute boundaries)
+CHECKPOINTS = {
+    dtime(9, 45): "Morning Prep",
+    dtime(10, 0): "Money Window Open",
+    dtime(10, 30): "Options/Stabilization",
+    dtime(12, 0): "Midday Check",
+    dtime(15, 0): "Power Hour",
+}
+
+def engines_for_close(close: datetime) -> tuple:
+    """
+    Engines of every intraday timeframe whose bar closed at `close` (at least as
+    coarse as SCAN_TRIGGER_TIMEFRAME): a 5Min trigger runs the 5Min engines, a
+    1Min trigger runs the 1Min engines every minute plus the 5Min ones on :x0/:x5.
+    """
+    elapsed = (close - bar_clock.session_open(close.date())).total_seconds()
+    base = TIMEFRAMES[settings.SCAN_TRIGGER_TIMEFRAME]
+    engines = []
+    for tf, names in TIMEFRAME_ENGINES.items():
+        step = TIMEFRAMES.get(tf)
+        if step is None or step < base or elapsed % step:
+            continue
+        engines.extend(names)
+    return tuple(dict.fromkeys(engines))
+
+async def on_scan_bar_close(close: datetime):
+    # The session close belongs to on_daily_close (no auto-execution after the bell)
+    if close >= bar_clock.session_close(close.date()):
+        return
+    name = CHECKPOINTS.get(close.time())
+    # Named checkpoints (the old fixed scan times) also run the daily-bar engines (swing, options, FGD)
+    engines = ALL_ENGINES if name else engines_for_close(close)
+    await scheduled_market_scan(name or f"{settings.SCAN_TRIGGER_TIMEFRAME} Close {close.strftime('%H:%M')}",
+                                engines=engines, report=name is not None)
+
+manage_stops = tracer.job("stop_manager")(executor.manage_stops)
+
+async def on_stop_bar_close(close: datetime):
+    # Heal + ratchet stops on the bar the exhaustion signal is computed from
+    await execution.run_io(manage_stops)
+
+async def on_daily_close(close: datetime):
+    # Completed daily bar: daily-bar engines only, outside the intraday segment rules, signal only
+    await scheduled_market_scan("Daily Close", engines=TIMEFRAME_ENGINES["1Day"], execute=False, session_gate=False)
+
 def start_scheduler():
     # New York Time
     ny_tz = pytz.timezone("America/New_York")
     from apscheduler.triggers.interval import IntervalTrigger
     
-    # 0. Exit Poller (Every 5 mins)
+    # 0. Exit Poller (backstop; exits are journaled from fill events by order_lifecycle)
     scheduler.add_job(
         check_trade_exits,
-        IntervalTrigger(minutes=5),
+        IntervalTrigger(minutes=settings.LIFECYCLE_BACKSTOP_MINUTES),
         id="exit_poller"
     )
     
-    # 0.5 Risk Watchdog (Every 5 mins, offset by 2 mins?)
-    # We can just run it every 5 mins.
+    # 0.5 Risk Watchdog (backstop; naked positions are healed from trade events)
     scheduler.add_job(
         risk_watchdog,
-        IntervalTrigger(minutes=5),
+        IntervalTrigger(minutes=settings.LIFECYCLE_BACKSTOP_MINUTES),
         id="risk_watchdog"
     )
 
-    # 0.75 Peak Exit Manager (Every 5 mins)
-    executor.api # Ensure connection
-    scheduler.add_job(
-        executor.manage_peak_exits,
-        IntervalTrigger(minutes=5),
-        id="peak_manager"
-    )
-    
-    # 1. Morning Prep (9:45 AM)
-    scheduler.add_job(
-        scheduled_market_scan, 
-        CronTrigger(hour=9, minute=45, timezone=ny_tz),
-        args=["Morning Prep"]
-    )
+    # 0.75 Stop Manager: heal + trail + tighten in one pass (every 5Min bar close, on the io pool)
+    bar_trigger.subscribe("stop_manager", "5Min", on_stop_bar_close)
     
-    # 2. Money Window (10:00 AM)
+    # 0.8 Portfolio Reconcile (full broker snapshot vs. the trade-updates state)
+    from executor_service.portfolio_state import portfolio
     scheduler.add_job(
-        scheduled_market_scan, 
-        CronTrigger(hour=10, minute=0, timezone=ny_tz),
-        args=["Money Window Open"]
+        tracer.job("portfolio_reconcile")(portfolio.reconcile),
+        IntervalTrigger(seconds=settings.PORTFOLIO_RECONCILE_SECONDS),
+        id="portfolio_reconcile"
     )
-    
-    # 3. Options Window (10:30 AM)
+
+    # 0.85 Trading Calendar (holidays / early closes for the bar clock), daily before the open
     scheduler.add_job(
-        scheduled_market_scan, 
-        CronTrigger(hour=10, minute=30, timezone=ny_tz),
-        args=["Options/Stabilization"]
+        tracer.job("market_calendar")(MarketClock.load_calendar),
+        CronTrigger(hour=7, minute=55, timezone=ny_tz),
+        id="market_calendar"
     )
-    
-    # 4. Midday Check (12:00 PM)
+
+    # 0.9 Asset Index Refresh (8:00 AM, before the first scan)
+    from data_adapters.asset_index import asset_index
     scheduler.add_job(
-        scheduled_market_scan, 
-        CronTrigger(hour=12, minute=0, timezone=ny_tz),
-        args=["Midday Check"]
+        tracer.job("asset_index_refresh")(asset_index.refresh),
+        CronTrigger(hour=8, minute=0, timezone=ny_tz),
+        id="asset_index_refresh"
     )
-    
-    # 5. Power Hour (3:00 PM)
+
+    # 0.95 Volume Profile Build (8:00 PM weeknights, after the session's bars are final)
+    from data_adapters.volume_profile import volume_profiles
     scheduler.add_job(
-        scheduled_market_scan, 
-        CronTrigger(hour=15, minute=0, timezone=ny_tz),
-        args=["Power Hour"]
+        tracer.job("volume_profile_refresh")(volume_profiles.refresh),
+        CronTrigger(day_of_week="mon-fri", hour=20, minute=0, timezone=ny_tz),
+        id="volume_profile_refresh"
     )
 
+    # 1. Market Scan on every SCAN_TRIGGER_TIMEFRAME bar close (9:35 ... 15:55)
+    #    Each close runs the engines of the timeframes that closed (engines_for_close);
+    #    named checkpoints run every engine with a full report, other closes only report finds.
+    bar_trigger.subscribe("market_scan", settings.SCAN_TRIGGER_TIMEFRAME, on_scan_bar_close,
+                          min_interval=settings.SCAN_TRIGGER_MIN_SECONDS)
+
+    # 2. Daily Close (session close): completed daily bar, daily engines, report only
+    bar_trigger.subscribe("daily_close", "1Day", on_daily_close)
+    bar_trigger.start()
+
+    # Runs dropped because the previous run of the same job was still going
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+    def on_max_instances(event):
+        # Job ids match the tracer.job names, so overlaps join with scheduler_job_duration_seconds
+        SCHEDULER_JOB_OVERLAPS.inc(job=event.job_id, kind="skipped")
+    scheduler.add_listener(on_max_instances, EVENT_JOB_MAX_INSTANCES)
+
     scheduler.start()
     print("SCHEDULER: Online and waiting for market triggers.")
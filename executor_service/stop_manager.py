@@ -0,0 +1,226 @@
+import contextvars
+from typing import Dict, List, Optional
+import numpy as np
+from executor_service.portfolio_state import portfolio
+from utils.rate_limiter import broker_priority, ACCOUNT
+
+STOP_TYPES = ('stop', 'stop_limit', 'trailing_stop')
+EMERGENCY_STOP_PCT = 0.02 # Heal: stop 2% from CURRENT price
+TIGHT_ATR = 0.5           # Trail on peak exhaustion (price up, volume weak)
+WIDE_ATR = 2.0            # Standard trail (Standard Wave Ride)
+
+class StopPlan:
+    """The diff between the book's stop orders and the desired stops."""
+
+    def __init__(self):
+        self.heals: List[dict] = []    # New stop for a naked position
+        self.moves: List[dict] = []    # replace_order on an existing stop
+        self.cancels: List[dict] = []  # Redundant standalone stop (stops would over-cover the position)
+
+    def __len__(self) -> int:
+        return len(self.heals) + len(self.moves) + len(self.cancels)
+
+class StopManager:
+    """
+    One pass over the whole book: positions and open orders from the portfolio
+    snapshot, stop orders indexed by symbol, desired stops computed for every
+    position at once (NumPy), and only the diff sent to the broker:
+    - heal:    position without a stop -> emergency stop
+    - ratchet: LONG with a stop -> trail at 2.0 ATR (0.5 ATR on peak exhaustion),
+               only ever UP and never above the current price
+    - cancel:  extra standalone stops (e.g. an emergency stop that raced a bracket
+               leg) while the stops together cover more than the position
+    The diff calls go out concurrently on the executor's order pool.
+    """
+
+    @property
+    def api(self):
+        from executor_service.order_executor import executor
+        return executor.api
+
+    # --- Plan (pure) ---
+
+    def plan(self, positions: list, orders: list, frame=None, ratchet: bool = True) -> StopPlan:
+        """
+        positions/orders: Alpaca entities. frame: 5Min BarFrame for the
+        positions (exhaustion + ATR); ratcheting is skipped without it.
+        """
+        plan = StopPlan()
+        if not positions:
+            return plan
+        symbols = [p.symbol for p in positions]
+        qty = np.array([float(p.qty) for p in positions])
+
+        # 1. Index protective stops by symbol (closing side; held bracket legs count as protection)
+        close_side = {s: 'sell' if q > 0 else 'buy' for s, q in zip(symbols, qty)}
+        by_symbol: Dict[str, list] = {}
+        for o in orders:
+            if o.type in STOP_TYPES and close_side.get(o.symbol) == o.side:
+                by_symbol.setdefault(o.symbol, []).append(o)
+
+        stops: Dict[str, object] = {}
+        for s, q in zip(symbols, qty):
+            covering = by_symbol.get(s, [])
+            if len(covering) > 1:
+                # Over-covered: drop standalone stops, loosest first, while the rest still cover the position
+                total = sum(float(o.qty) for o in covering)
+                loosest = sorted(
+                    (o for o in covering if getattr(o, "order_class", "simple") in ("simple", "", None)),
+                    key=lambda o: float(o.stop_price or 0) * (1 if q > 0 else -1)
+                )
+                for o in loosest:
+                    if len(covering) == 1 or total - float(o.qty) < abs(q): break
+                    plan.cancels.append({"symbol": s, "order_id": o.id})
+                    covering.remove(o)
+                    total -= float(o.qty)
+            if covering:
+                stops[s] = covering[0]
+
+        price = np.array([float(p.current_price) for p in positions])
+        is_long = qty > 0
+        has_stop = np.array([s in stops for s in symbols], dtype=bool)
+
+        # 2. Heal: emergency stop on the protective side
+        heal_price = np.round(np.where(is_long, price * (1 - EMERGENCY_STOP_PCT), price * (1 + EMERGENCY_STOP_PCT)), 2)
+        for i in np.flatnonzero(~has_stop):
+            plan.heals.append({
+                "symbol": symbols[i],
+                "qty": abs(int(qty[i])),
+                "side": 'sell' if is_long[i] else 'buy',
+                "stop_price": float(heal_price[i]),
+            })
+
+        if not ratchet or frame is None or frame.empty:
+            return plan
+
+        # 3. Ratchet (Replicating backtest logic: rolling(20) volume, rolling(14) high-low ATR)
+        avg_vol = frame.tail_mean('volume', 20)
+        high_low = frame.columns['high'] - frame.columns['low']
+        atr = frame.tail_mean(high_low, 14)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol_ratio = frame.last('volume') / avg_vol
+        # Signal: Price Up, Volume Weak (< 90% avg). NaN compares False.
+        exhausted = (frame.last('close') > frame.last('close', offset=1)) & (vol_ratio < 0.9)
+
+        # Frame order -> position order (symbols without bars get NaN and never move)
+        pos = {s: i for i, s in enumerate(frame.symbols)}
+        take = np.array([pos.get(s, -1) for s in symbols], dtype=np.int64)
+        has_bars = take >= 0
+        atr_p = np.where(has_bars, atr[take], np.nan)
+        exhausted_p = has_bars & np.where(has_bars, exhausted[take], False)
+        atr_p = np.where(atr_p > 0, atr_p, price * 0.01)
+        atr_p[~has_bars] = np.nan
+
+        proposed = np.round(price - np.where(exhausted_p, TIGHT_ATR, WIDE_ATR) * atr_p, 2)
+        current_stop = np.array([
+            float(stops[s].stop_price) if s in stops and stops[s].stop_price else 0.0
+            for s in symbols
+        ])
+        trailing = np.array([s in stops and stops[s].type == 'trailing_stop' for s in symbols], dtype=bool)
+
+        # RATCHET LOGIC: Only move UP, never ABOVE current price (trailing_stop orders trail themselves)
+        move = has_stop & is_long & ~trailing & (proposed > current_stop) & (proposed < price)
+        for i in np.flatnonzero(move):
+            plan.moves.append({
+                "symbol": symbols[i],
+                "order_id": stops[symbols[i]].id,
+                "stop_price": float(proposed[i]),
+                "old": float(current_stop[i]),
+                "price": float(price[i]),
+                "mode": "EXHAUSTION (Tight)" if exhausted_p[i] else "STANDARD (Wide)",
+            })
+        return plan
+
+    # --- Run ---
+
+    def run(self, ratchet: bool = True, positions: Optional[list] = None) -> List[str]:
+        """
+        Snapshot -> plan -> apply. ratchet=False heals/cancels only (no bar fetch).
+        `positions` limits the pass to those positions.
+        Returns the action messages.
+        """
+        if not self.api: return []
+        if positions is None:
+            positions = portfolio.positions()
+        orders = portfolio.open_orders()
+
+        frame = None
+        longs = [p.symbol for p in positions if float(p.qty) > 0]
+        if ratchet and longs:
+            from strategy_engine.data_loader import data_loader
+            # One batched 5Min bar fetch for the book (ahead of scan traffic)
+            with broker_priority(ACCOUNT):
+                frame = data_loader.fetch_intraday_frame(longs, timeframe='5Min', limit=None)
+
+        return self.apply(self.plan(positions, orders, frame, ratchet=ratchet))
+
+    def apply(self, plan: StopPlan) -> List[str]:
+        """Sends the diff concurrently; notifications as before (per heal, one summary per ratchet pass)."""
+        if not len(plan): return []
+        from executor_service.order_executor import executor
+        calls = [(self._heal, h) for h in plan.heals] + [(self._move, m) for m in plan.moves] + [(self._cancel, c) for c in plan.cancels]
+        futures = [executor._order_pool.submit(contextvars.copy_context().run, fn, item) for fn, item in calls]
+        results = [f.result() for f in futures]
+
+        heals = results[:len(plan.heals)]
+        moved = [r for r in results[len(plan.heals):len(plan.heals) + len(plan.moves)] if r]
+        cancelled = [r for r in results[len(plan.heals) + len(plan.moves):] if r]
+        try:
+            from utils.notifications import notifier
+            if moved:
+                notifier.send_message("🌊 PEAK MANAGER", "Locked Profit. Stops moved:\n" + "\n".join(moved), color=0x00ff00)
+            if cancelled:
+                notifier.send_message("🧹 STOP MANAGER", "Cancelled redundant stops:\n" + "\n".join(cancelled), color=0xffaa00)
+        except Exception as e:
+            print(f"Stop Manager notify failed: {e}")
+        return heals + moved + cancelled
+
+    def _heal(self, h: dict) -> str:
+        sym, stop_price = h["symbol"], h["stop_price"]
+        try:
+            stop_order = self.api.submit_order(
+                symbol=sym,
+                qty=h["qty"],
+                side=h["side"],
+                type='stop',
+                time_in_force='gtc',
+                stop_price=stop_price
+            )
+            portfolio.track_order(stop_order)
+            # NOTIFICATION
+            msg = f"🛡️ AUTO-HEALED: {sym} (No Stop Found)\nAction: Placed Safety Stop @ {stop_price}"
+            print(msg)
+            try:
+                from utils.notifications import notifier
+                notifier.send_message(f"🛡️ RISK WATCHDOG: {sym}", msg, color=0xffaa00)
+            except: pass
+            return msg
+        except Exception as e:
+            err = f"❌ FAILED TO HEAL {sym}: {e}"
+            print(err)
+            try:
+                from utils.notifications import notifier
+                notifier.send_message(f"🛡️ RISK WATCHDOG FAILED: {sym}", err, color=0xff0000)
+            except: pass
+            return err
+
+    def _move(self, m: dict) -> Optional[str]:
+        print(f"🌊 RATCHET: {m['symbol']} [{m['mode']}] | Moving Stop {m['old']} -> {m['stop_price']}")
+        try:
+            replaced = self.api.replace_order(order_id=m["order_id"], stop_price=m["stop_price"])
+            portfolio.track_order(replaced)
+            return f"{m['symbol']}: ${m['stop_price']} ({m['mode']}) | Price: ${m['price']}"
+        except Exception as replace_err:
+            print(f"Generic Replace Error: {replace_err}")
+            return None
+
+    def _cancel(self, c: dict) -> Optional[str]:
+        try:
+            self.api.cancel_order(c["order_id"])
+            print(f"🧹 CANCELLED REDUNDANT STOP: {c['symbol']} ({c['order_id']})")
+            return f"{c['symbol']} ({c['order_id']})"
+        except Exception as e:
+            print(f"Cancel Error {c['symbol']}: {e}")
+            return None
+
+stop_manager = StopManager()
@@ -1,9 +1,12 @@
 import uuid
+import threading
 from datetime import datetime
 import pandas as pd
 import os
 from configs.settings import settings
 import alpaca_trade_api as tradeapi
+from utils.metrics import JOURNAL_WRITE_SECONDS
+from utils.rate_limiter import broker_priority, ANALYTICS
 
 # Path to the persistent journal
 JOURNAL_FILE = "uploads/trade_journal.csv"
@@ -16,6 +19,8 @@ print(f"📂 JOURNAL PATH: {os.path.abspath(JOURNAL_FILE)}")
 class TradeLogger:
     def __init__(self):
         self.api = None
+        # Journal read-modify-writes: exit poller, event-driven exits, entries from the post-trade thread
+        self._lock = threading.RLock()
         try:
             self.api = tradeapi.REST(
                 settings.APCA_API_KEY_ID,
@@ -28,6 +33,7 @@ class TradeLogger:
         except Exception as e:
             print(f"Logger Init Error: {e}")
 
+    @broker_priority(ANALYTICS)
     def hydrate_history(self):
         """
         Rebuilds Journal from Alpaca Closed Orders.
@@ -187,7 +193,8 @@ class TradeLogger:
                     journal = pd.concat([journal, df], ignore_index=True)
                 else:
                     journal = df
-                journal.to_csv(JOURNAL_FILE, index=False)
+                with JOURNAL_WRITE_SECONDS.time(op="hydrate"):
+                    journal.to_csv(JOURNAL_FILE, index=False)
                 print(f"✅ HYDRATED {len(new_rows)} historical records.")
                 self.generate_analytics()
                 msg += f" Added {len(new_rows)} trades."
@@ -233,18 +240,20 @@ class TradeLogger:
         df = pd.DataFrame([trade])
         # Append to CSV
         header = not os.path.exists(JOURNAL_FILE)
-        df.to_csv(JOURNAL_FILE, mode='a', header=header, index=False)
+        with self._lock, JOURNAL_WRITE_SECONDS.time(op="entry"):
+            df.to_csv(JOURNAL_FILE, mode='a', header=header, index=False)
         print(f"📝 LOGGED ENTRY: {symbol} ({bucket}) - Score: {score}")
 
 
     def sync_open_positions(self):
         """
-        SELF-HEAL: Fetches live Alpaca positions and ensures they are in the journal.
+        SELF-HEAL: Reads live positions (portfolio state) and ensures they are in the journal.
         If a position exists in Alpaca but not the Journal (e.g. after restart), it 'seeds' it.
         """
         if not self.api: return
         try:
-            positions = self.api.list_positions()
+            from executor_service.portfolio_state import portfolio
+            positions = portfolio.positions()
         except: return
 
         # Load or Create Journal
@@ -301,14 +310,20 @@ class TradeLogger:
             else:
                 journal = df_new
                 
-            journal.to_csv(JOURNAL_FILE, index=False)
+            with JOURNAL_WRITE_SECONDS.time(op="sync"):
+                journal.to_csv(JOURNAL_FILE, index=False)
             print(f"✅ SYNC: Recovered {len(new_trades)} positions into Journal.")
 
     def update_closed_trades(self):
         """
         Reconciles OPEN trades with Alpaca Order History to enable PnL tracking.
         Also triggers Sync to catch orphans.
+        (Backstop: exits are normally journaled from fill events, see log_trade_exit.)
         """
+        with self._lock:
+            return self._update_closed_trades()
+
+    def _update_closed_trades(self):
         # First, ensure we track everything we hold
         self.sync_open_positions()
 
@@ -326,13 +341,13 @@ class TradeLogger:
 
         # Get All Open Positions to quickly check what's still alive
         try:
-            positions = {p.symbol: p for p in self.api.list_positions()}
+            from executor_service.portfolio_state import portfolio
+            positions = {p.symbol: p for p in portfolio.positions()}
         except: return
 
         updated_count = 0
         for idx, trade in open_trades.iterrows():
             symbol = trade["symbol"]
-            qty = float(trade["qty"])
 
             # If symbol is still in active positions, skip (it's still open)
             if symbol in positions:
@@ -362,25 +377,12 @@ class TradeLogger:
             # Found the exit!
             exit_price = float(fill.filled_avg_price)
             exit_time = fill.filled_at.replace(tzinfo=None) # Make naive for CSV
-            
-            entry_price = float(trade["entry_price"])
-            pnl = (exit_price - entry_price) * qty
-            pnl_pct = pnl / (entry_price * qty)
-            risk = float(trade["risk_dollars"])
-            r_mult = pnl / risk if risk > 0 else 0
-            hold_min = (exit_time - trade["entry_time"]).total_seconds() / 60
-
-            journal.loc[idx, "exit_price"] = exit_price
-            journal.loc[idx, "exit_time"] = exit_time
-            journal.loc[idx, "pnl_dollars"] = pnl
-            journal.loc[idx, "pnl_percent"] = pnl_pct
-            journal.loc[idx, "r_multiple"] = r_mult
-            journal.loc[idx, "holding_minutes"] = hold_min
-            journal.loc[idx, "status"] = "CLOSED"
+            self._close_row(journal, idx, exit_price, exit_time)
             updated_count += 1
 
         if updated_count > 0:
-            journal.to_csv(JOURNAL_FILE, index=False)
+            with JOURNAL_WRITE_SECONDS.time(op="close"):
+                journal.to_csv(JOURNAL_FILE, index=False)
             print(f"📝 UPDATED {updated_count} CLOSED TRADES.")
             # Trigger Stats Re-Calc
             self.generate_analytics()
@@ -396,6 +398,48 @@ class TradeLogger:
             
         return []
 
+    def log_trade_exit(self, symbol: str, exit_price: float, exit_time: datetime) -> list:
+        """
+        Closes the symbol's OPEN journal rows at a fill (event-driven exit).
+        exit_time is naive UTC like entry_time. Returns the closed rows (dicts).
+        """
+        with self._lock:
+            if not os.path.exists(JOURNAL_FILE): return []
+            journal = pd.read_csv(JOURNAL_FILE)
+            journal["entry_time"] = pd.to_datetime(journal["entry_time"])
+            mask = (journal["status"] == "OPEN") & (journal["symbol"] == symbol) & (journal["entry_time"] < exit_time)
+            if not mask.any(): return []
+
+            for idx in journal.index[mask]:
+                self._close_row(journal, idx, exit_price, exit_time)
+            with JOURNAL_WRITE_SECONDS.time(op="close"):
+                journal.to_csv(JOURNAL_FILE, index=False)
+        print(f"📝 LOGGED EXIT: {symbol} @ {exit_price}")
+        self.generate_analytics()
+        return [journal.loc[idx].to_dict() for idx in journal.index[mask]]
+
+    @staticmethod
+    def _close_row(journal: pd.DataFrame, idx, exit_price: float, exit_time: datetime):
+        trade = journal.loc[idx]
+        qty = float(trade["qty"])
+        entry_price = float(trade["entry_price"])
+        pnl = (exit_price - entry_price) * qty
+        pnl_pct = pnl / (entry_price * qty)
+        risk = float(trade["risk_dollars"])
+        r_mult = pnl / risk if risk > 0 else 0
+        hold_min = (exit_time - trade["entry_time"]).total_seconds() / 60
+
+        # An all-empty exit_time column reads back as float
+        if journal["exit_time"].dtype != object:
+            journal["exit_time"] = journal["exit_time"].astype(object)
+        journal.loc[idx, "exit_price"] = exit_price
+        journal.loc[idx, "exit_time"] = exit_time
+        journal.loc[idx, "pnl_dollars"] = pnl
+        journal.loc[idx, "pnl_percent"] = pnl_pct
+        journal.loc[idx, "r_multiple"] = r_mult
+        journal.loc[idx, "holding_minutes"] = hold_min
+        journal.loc[idx, "status"] = "CLOSED"
+
     def generate_analytics(self) -> dict:
         """
         Calculates Win Rate, R-Multiple, and Equity Curve.
@@ -3,19 +3,23 @@ from configs.settings import settings
 from strategy_engine.models import WebhookSignal
 from executor_service.idempotency import idempotency
 from data_adapters.alpaca_adapter import alpaca_client
+from utils.execution import execution
+from utils.metrics import WEBHOOK_ORDER_SECONDS, ORDERS_SUBMITTED
+import time
 
 # Setup structured logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("executor")
 
 async def process_webhook(signal: WebhookSignal):
+    received = time.perf_counter()
     # 1. Validate Token (Redundant if done in FastAPI dep, but safe)
     if signal.auth_token != settings.WEBHOOK_TOKEN:
         logger.warning(f"Unauthorized signal attempt. Token: {signal.auth_token[:5]}...")
         return {"status": "error", "message": "Unauthorized"}
         
     # 2. Idempotency
-    if idempotency.is_processed(signal.signal_id):
+    if await execution.run_io(idempotency.is_processed, signal.signal_id):
         logger.info(f"Signal {signal.signal_id} already processed. Skipping.")
         return {"status": "ignored", "reason": "duplicate", "signal_id": signal.signal_id}
 
@@ -32,7 +36,8 @@ async def process_webhook(signal: WebhookSignal):
 
     # 5. Execution
     try:
-        response = alpaca_client.place_order(
+        response = await execution.run_io(
+            alpaca_client.place_order,
             symbol=signal.symbol,
             qty=signal.qty,
             side=signal.action.lower(),  # buy/sell
@@ -42,13 +47,18 @@ async def process_webhook(signal: WebhookSignal):
             take_profit=signal.bracket.take_profit,
             stop_loss=signal.bracket.stop_loss
         )
+        result = "failure" if response.get("status") == "error" else ("simulated" if response.get("status") == "simulated" else "success")
+        WEBHOOK_ORDER_SECONDS.observe(time.perf_counter() - received, result=result)
+        ORDERS_SUBMITTED.inc(source="webhook", result=result)
         
         # 6. Mark Processed (ONLY if successful or non-retriable error)
-        idempotency.mark_processed(signal.signal_id)
+        await execution.run_io(idempotency.mark_processed, signal.signal_id)
         
         logger.info(f"Order processed successfully: {response}")
         return {"status": "success", "order_id": response.get("id")}
         
     except Exception as e:
+        WEBHOOK_ORDER_SECONDS.observe(time.perf_counter() - received, result="failure")
+        ORDERS_SUBMITTED.inc(source="webhook", result="failure")
         logger.error(f"Execution failed: {str(e)}")
         return {"status": "error", "message": str(e)}
@@ -5,7 +5,7 @@ import os
 # Ensure project root is in path
 sys.path.append(os.getcwd())
 
-from strategy_engine.backtest_engine import BacktestEngine
+from strategy_engine.backtest_engine import BacktestEngine, fetch_shared_data
 
 def main():
     print("Initializing CLASSIC STRATEGIES Backtest...")
@@ -15,12 +15,16 @@ def main():
         "NVDA", "TSLA", "AAPL", "AMD", "AMZN", "META", "GOOGL", "MSFT", "PLTR", "UBER"
     ]
     
+    # Fetch once for both tests (union of their declared lookbacks/indicators)
+    data = fetch_shared_data(tech_universe, 365, ["RSI2", "DONCHIAN"])
+    daily = data.get("1Day", {})
+    
     # 1. TEST RSI2 (Mean Reversion)
     # Expected: High Win Rate, smaller gains.
     print("\n\n=== TEST 1: RSI(2) Mean Reversion ===")
     try:
         engine_rsi = BacktestEngine(strategy_type='RSI2')
-        engine_rsi.run(tech_universe, days=365)
+        engine_rsi.run(tech_universe, days=365, data_map=daily)
     except Exception as e:
         print(f"RSI2 Failed: {e}")
 
@@ -29,7 +33,7 @@ def main():
     print("\n\n=== TEST 2: Donchian Breakout (20/10) ===")
     try:
         engine_donchian = BacktestEngine(strategy_type='DONCHIAN')
-        engine_donchian.run(tech_universe, days=365)
+        engine_donchian.run(tech_universe, days=365, data_map=daily)
     except Exception as e:
         print(f"Donchian Failed: {e}")
 
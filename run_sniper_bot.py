@@ -10,11 +10,12 @@ sys.path.append(os.getcwd())
 
 from strategy_engine.scanner_service import scanner
 from utils.notifications import notifier
-from utils.market_clock import MarketClock
+from utils.bar_clock import bar_clock
+from utils.execution import execution
 
 async def run_sniper_bot():
     print("🔫 SNIPER BOT: ONLINE. Scanning for Intraday Volatility Options Setups...")
-    notifier.send_message("SNIPER BOT ACTIVE", "Scanning 18 Tickers every 5 minutes for Volatility Surges.", color=0xffff00)
+    notifier.send_message("SNIPER BOT ACTIVE", "Scanning 18 Tickers on every 1-minute bar close for Volatility Surges.", color=0xffff00)
     
     universe = [
         "NVDA", "TSLA", "AMD", "META", "AMZN", "AAPL", "MSFT", "PLTR", "COIN", "MARA",
@@ -25,17 +26,15 @@ async def run_sniper_bot():
 
     while True:
         try:
-            # 1. Market Check
-            if not MarketClock.is_market_open():
-                print("Market Closed. Sleeping...")
-                await asyncio.sleep(300)
-                continue
+            # 1. Wait for the next 1Min bar close (exchange time, session only)
+            #    A scan that overruns a minute just picks up the newest bar next.
+            bar_close = await bar_clock.wait_for_close("1Min")
                 
             now_ts = datetime.now()
-            print(f"\n--- SCANNING @ {now_ts.strftime('%H:%M:%S')} ---")
+            print(f"\n--- SCANNING {bar_close.strftime('%H:%M')} bar @ {now_ts.strftime('%H:%M:%S')} ---")
             
-            # 2. Run Scan
-            candidates = scanner.run_sniper_scan(universe)
+            # 2. Run Scan (off the loop)
+            candidates = await execution.run_io(scanner.run_sniper_scan, universe)
             
             # 3. Process Alerts
             for c in candidates:
@@ -80,9 +79,6 @@ async def run_sniper_bot():
             
             if not candidates:
                 print("No targets found.")
-                
-            # Sleep 1 Minute (Match One Box 1M bars)
-            await asyncio.sleep(60)
             
         except KeyboardInterrupt:
             print("Sniper Bot stopping...")
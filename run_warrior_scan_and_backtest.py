@@ -4,6 +4,8 @@ import os
 import asyncio
 from alpaca_trade_api.rest import REST, TimeFrame
 from strategy_engine.backtest_engine import BacktestEngine
+from data_adapters.asset_index import asset_index
+from strategy_engine.snapshot_frame import SnapshotFrame
 from configs.settings import settings
 
 # Force sync for simplified script
@@ -13,54 +15,20 @@ nest_asyncio.apply()
 api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
 
 def get_top_gappers(limit=10):
-    print("🔍 SCANNING: Fetching Active Assets...")
-    assets = api.list_assets(status='active', asset_class='us_equity')
-    
-    # Filter for potential small caps (reduce universe size for snapshot limits)
-    # Alpaca snapshot limit is generous but let's be efficient.
-    # We can't filter by price easily without snapshot, so we grab snapshots for a large chunk?
-    # Better: Use Alpaca screener logic if available, or just iterate common exchanges.
-    
-    symbols = [a.symbol for a in assets if a.exchange in ['NASDAQ', 'NYSE', 'AMEX'] and a.tradable]
+    print("🔍 SCANNING: Loading Asset Index...")
+    # Daily index already holds tradable NASDAQ/NYSE/AMEX names bucketed by last close
+    symbols = asset_index.candidates("warrior")
     print(f"   Found {len(symbols)} symbols. Fetching Snapshots (Batched)...")
     
-    # Batch request (1000 per call usually safe limit)
-    chunk_size = 1000
-    gappers = []
+    # Batched snapshots -> NumPy columns
+    snaps = SnapshotFrame.fetch(api, symbols)
     
-    for i in range(0, len(symbols), chunk_size):
-        chunk = symbols[i:i+chunk_size]
-        try:
-            snapshots = api.get_snapshots(chunk)
-            for sym, snap in snapshots.items():
-                if not snap.daily_bar: continue
-                
-                price = snap.daily_bar.c
-                open_price = snap.daily_bar.o
-                prev_close = snap.prev_daily_bar.c
-                
-                if not (2.0 <= price <= 20.0): continue # Price Filter
-                
-                # Gap Calculation (Open vs Prev Close OR Current vs Prev Close for movers)
-                # Ross likes Pre-market Gap. Current vs Prev Close roughly approximates "Today's Mover"
-                pct_change = (price - prev_close) / prev_close
-                
-                if pct_change >= 0.10: # +10% Gapper
-                    vol = snap.daily_bar.v
-                    gappers.append({
-                        "symbol": sym,
-                        "price": price,
-                        "change": pct_change,
-                        "volume": vol
-                    })
-        except Exception as e:
-            print(f"   Error fetching chunk {i}: {e}")
-            
-    # Sort by Top Gainers
-    gappers.sort(key=lambda x: x['change'], reverse=True)
+    # Current vs Prev Close roughly approximates "Today's Mover" (Ross likes Pre-market Gap)
+    gappers = snaps.mask(min_price=2.0, max_price=20.0, min_change=0.10) # +10% Gapper, $2-20
     
-    print(f"✅ FOUND {len(gappers)} GAPPERS meeting criteria ($2-20, >10%).")
-    return [g['symbol'] for g in gappers[:limit]]
+    print(f"✅ FOUND {int(gappers.sum())} GAPPERS meeting criteria ($2-20, >10%).")
+    # Top Gainers first
+    return snaps.top_k(snaps.change, limit, mask=gappers)
 
 def main():
     print("=== WARRIOR 'HUNTER' BACKTEST ===")
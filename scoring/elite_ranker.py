@@ -1,152 +1,106 @@
 from typing import List, Dict, Tuple
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+from strategy_engine.factor_engine import factor_engine
+
+# Factor weights (applied to min-max normalized factors)
+DAY_WEIGHTS = np.array([
+    0.30, # rel_vol
+    0.20, # vwap_dist
+    0.20, # roc_5m
+    0.15, # atr_expand
+    0.15, # orb
+])
+SWING_WEIGHTS = np.array([
+    0.35, # ma_sep
+    0.20, # pullback
+    0.15, # rel_vol
+    0.30, # vol_compress (Combined Weekly/Compression weight)
+])
+
+def _minmax(factors: np.ndarray) -> np.ndarray:
+    """
+    Per-column (x - min) / (max - min); constant columns become 0. NaN-aware
+    like MinMaxScaler: a missing value stays NaN and doesn't set the range.
+    """
+    lo = np.fmin.reduce(factors, axis=0)
+    span = np.fmax.reduce(factors, axis=0) - lo
+    span[span == 0] = 1.0
+    return (factors - lo) / span
+
+def _top(symbols: np.ndarray, scores: np.ndarray, n: int) -> List[str]:
+    """Best `n` by score, descending (ties keep input order, NaN scores last)."""
+    key = np.where(np.isnan(scores), np.inf, -scores)
+    if len(scores) > n:
+        idx = np.argpartition(key, n - 1)[:n]
+    else:
+        idx = np.arange(len(scores))
+    idx = idx[np.lexsort((idx, key[idx]))]
+    return symbols[idx].tolist()
 
 class EliteRanker:
     """
     Advanced Ranking System to select Top 3 Day & Top 3 Swing Trades.
-    Uses scikit-learn for normalization and strict Hard Gates.
+    Columnar: factors come from the shared factor engine, Hard Gates are
+    boolean masks, normalization is NumPy min-max and selection is argpartition.
     """
-    
-    def rank_candidates(self, market_data: Dict[str, dict]) -> Tuple[List[str], List[str]]:
+
+    def rank_candidates(self, market_data: Dict[str, dict], top_n: int = 3) -> Tuple[List[str], List[str]]:
         """
         Returns (top_3_day_symbols, top_3_swing_symbols)
         """
         if not market_data:
             return [], []
 
-        day_candidates = []
-        swing_candidates = []
-        
-        # 1. Feature Extraction
-        for sym, data in market_data.items():
-            try:
-                # --- DATA PREP ---
-                daily = pd.DataFrame([data]) # Only 1 row usually passed in dict? No, MarketData dict has scalars.
-                # Wait, data_loader returns dictionary of scalars + 'intraday_df'.
-                # We need historical series for some calc.
-                # But 'market_data' usually has minimal info.
-                # Actually, data_loader calculates indicators already (ema20, sma50, atr).
-                
-                # We need Intraday DF for Day Trading check
-                intraday = data.get('intraday_df')
-                
-                # Quote data for spread? (Not currently in data_loader, assuming small spread for Active 50)
-                # We can skip Spread check or assume valid if in Top 50 Vol.
-                
-                price = data.get('close')
-                vwap = data.get('vwap')
-                volume = data.get('volume')
-                avg_vol = data.get('volume') # Placeholder, data_loader doesn't pass avg_vol? 
-                # (We should update data_loader to pass 'vol_avg_20')
-                vol_avg_20 = data.get('volume') * 1.0 # Hack if missing
-                
-                ema20 = data.get('ema20')
-                sma50 = data.get('sma50')
-                atr = data.get('atr')
-                
-                # --- DAY EVALUATION ---
-                # Hard Gates
-                is_day_valid = True
-                if price < vwap: is_day_valid = False # Price below VWAP (Longs)
-                # if rel_vol < 1.5: is_day_valid = False (Checked later)
-                if (atr / price) < 0.012: is_day_valid = False # ATR% < 1.2%
-                
-                if is_day_valid and intraday is not None and not intraday.empty:
-                    # Calc Day Factors
-                    rel_vol = volume / vol_avg_20 if vol_avg_20 > 0 else 1.0
-                    if rel_vol < 1.5: continue # Hard Gate
-                    
-                    # 5-min Momentum (Last 5 mins ROC)
-                    roc_5m = 0
-                    if len(intraday) >= 6:
-                        roc_5m = (intraday.iloc[-1]['close'] / intraday.iloc[-6]['close']) - 1
-                        
-                    vwap_dist = (price - vwap) / vwap
-                    
-                    # ORB (Opening Range Break) - Check if price > High of first 30 mins
-                    # tough without exact timestamps, skip ORB strict calc for now, use Price > Open
-                    orb_score = 1.0 if price > data.get('open') else 0.0
-                    
-                    day_candidates.append({
-                        "symbol": sym,
-                        "rel_vol": rel_vol,
-                        "vwap_dist": vwap_dist,
-                        "roc_5m": roc_5m,
-                        "atr_expand": data.get('atr') / price,
-                        "orb": orb_score
-                    })
+        # 1. Factors (one vectorized pass over the snapshot's bars, cached per bar)
+        factors = factor_engine.for_snapshot(market_data)
+        if not len(factors):
+            return [], []
+        symbols = np.array(factors.symbols, dtype=object)
+        price, vwap, ema20, sma50 = factors["close"], factors["vwap"], factors["ema20"], factors["sma50"]
+        atr_pct = factors["atr_pct"]
+        # RVOL: volume so far vs. expected by this time of day (a partial daily bar against a
+        # full-session average would fail the gate until the afternoon); 20-day RVOL when there
+        # are no regular-session intraday bars, neutral with a short history
+        rel_vol = np.where(np.isfinite(factors["rvol_tod"]), factors["rvol_tod"], factors["rvol_20d"])
+        rel_vol = np.where(np.isfinite(rel_vol), rel_vol, 1.0)
+
+        # --- DAY EVALUATION ---
+        # Hard Gates: Price >= VWAP (Longs), ATR% >= 1.2%, RVOL >= 1.5, intraday bars present
+        day_idx = np.flatnonzero((factors["intraday_bars"] > 0) & (price >= vwap) & (atr_pct >= 0.012) & (rel_vol >= 1.5))
 
-                # --- SWING EVALUATION ---
-                # Hard Gates
-                is_swing_valid = True
-                if ema20 <= sma50: is_swing_valid = False # Trend Invalid
-                # Price extended > 12% above SMA20
-                if price > (ema20 * 1.12): is_swing_valid = False 
-                
-                if is_swing_valid:
-                    valid_rel_vol = volume / vol_avg_20 if vol_avg_20 > 0 else 1.0
-                    
-                    # Trend Strength
-                    ma_sep = (ema20 - sma50) / price
-                    
-                    # Pullback (Closer to EMA20 is better)
-                    pullback_dist = abs(price - ema20) / price
-                    pullback_score = 1.0 - (pullback_dist * 10) # Higher is better (closer)
-                    
-                    swing_candidates.append({
-                        "symbol": sym,
-                        "ma_sep": ma_sep,
-                        "pullback": pullback_score,
-                        "rel_vol": valid_rel_vol,
-                        "vol_compress": 1.0 - (atr / price) # Lower ATR% = more compression
-                    })
-                    
-            except Exception as e:
-                continue
+        # ORB proxy: Price > Open (no exact first-30-min range here)
+        day_factors = np.column_stack([
+            rel_vol[day_idx],
+            factors["vwap_dist"][day_idx],
+            np.nan_to_num(factors["roc_5m"][day_idx]), # 5-min Momentum, 0 with < 6 bars
+            atr_pct[day_idx],
+            (price[day_idx] > factors["open"][day_idx]).astype(float),
+        ])
 
-        # 2. Normalization & Scoring (Day)
+        # --- SWING EVALUATION ---
+        # Hard Gates: Trend (EMA20 > SMA50), not extended > 12% above EMA20 (a gate
+        # only fails on a known value). Independent of the day gates.
+        swing_idx = np.flatnonzero(~(ema20 <= sma50) & ~(price > ema20 * 1.12))
+        p = price[swing_idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            swing_factors = np.column_stack([
+                factors["ma_sep"][swing_idx],                     # Trend Strength
+                1.0 - (np.abs(p - ema20[swing_idx]) / p * 10),    # Pullback (closer to EMA20 is better)
+                rel_vol[swing_idx],
+                1.0 - atr_pct[swing_idx],                         # Lower ATR% = more compression
+            ])
+
+        # 2. Normalization & Scoring (a row with a missing factor scores NaN and ranks last)
         top_day = []
-        if day_candidates:
-            df_day = pd.DataFrame(day_candidates)
-            scaler = MinMaxScaler()
-            cols = ["rel_vol", "vwap_dist", "roc_5m", "atr_expand", "orb"]
-            # Scale
-            scaled_data = scaler.fit_transform(df_day[cols])
-            df_scaled = pd.DataFrame(scaled_data, columns=cols)
-            
-            # Score formula
-            df_day["score"] = (
-                0.30 * df_scaled["rel_vol"] +
-                0.20 * df_scaled["vwap_dist"] +
-                0.20 * df_scaled["roc_5m"] +
-                0.15 * df_scaled["atr_expand"] +
-                0.15 * df_scaled["orb"]
-            )
-            
-            top_day = df_day.sort_values("score", ascending=False).head(3)["symbol"].tolist()
+        if len(day_idx):
+            scores = _minmax(day_factors) @ DAY_WEIGHTS
+            top_day = _top(symbols[day_idx], scores, top_n)
 
-        # 3. Normalization & Scoring (Swing)
         top_swing = []
-        if swing_candidates:
-            df_swing = pd.DataFrame(swing_candidates)
-            scaler = MinMaxScaler()
-            cols = ["ma_sep", "pullback", "rel_vol", "vol_compress"]
-            
-            scaled_data = scaler.fit_transform(df_swing[cols])
-            df_scaled = pd.DataFrame(scaled_data, columns=cols)
-            
-            # Score formula
-            df_swing["score"] = (
-                0.35 * df_scaled["ma_sep"] +
-                0.20 * df_scaled["pullback"] +
-                0.15 * df_scaled["rel_vol"] +
-                0.30 * df_scaled["vol_compress"] # Combined Weekly/Compression weight
-            )
-            
-            top_swing = df_swing.sort_values("score", ascending=False).head(3)["symbol"].tolist()
-            
+        if len(swing_idx):
+            scores = _minmax(swing_factors) @ SWING_WEIGHTS
+            top_swing = _top(symbols[swing_idx], scores, top_n)
+
         return top_day, top_swing
 
 elite_ranker = EliteRanker()
@@ -6,18 +6,10 @@ from datetime import datetime, timedelta, time
 from typing import List, Dict, Any
 from alpaca_trade_api.rest import REST, TimeFrame
 from configs.settings import settings
-from strategy_engine.swing_setups import SwingSetup_20_50
-from strategy_engine.day_trade_strategy import DayTradeEngine
-from strategy_engine.experimental_strategies import DonchianBreakoutStrategy, RSI2MeanReversionStrategy
-from strategy_engine.elite_strategy import SwingSetup_Elite
-from strategy_engine.kellog_strategy import KellogStrategy
-from strategy_engine.congress_strategy import CongressStrategy
-from strategy_engine.buffett_strategy import BuffettStrategy
-from strategy_engine.rsi_bands_strategy import RSIBandsStrategy
-from strategy_engine.warrior_strategy import WarriorStrategy
-from strategy_engine.ema_strategy import EMA3Strategy
-from strategy_engine.sykes_strategies import FirstGreenDayStrategy, MorningPanicStrategy
 from strategy_engine.models import Direction
+from strategy_engine.bar_frame import BarFrame
+from strategy_engine.strategy_registry import DataRequirement, get_strategy, merge_requirements
+from strategy_engine.indicators.columns import compute_indicators
 import warnings
 
 # Suppress pandas future warnings
@@ -36,38 +28,9 @@ class BacktestEngine:
         )
         self.strategy_type = strategy_type
         
-        if strategy_type == 'SWING':
-            self.setup = SwingSetup_20_50()
-        elif strategy_type == 'DAY':
-            self.setup = DayTradeEngine()
-        elif strategy_type == 'DONCHIAN':
-            self.setup = DonchianBreakoutStrategy()
-        elif strategy_type == 'RSI2':
-            self.setup = RSI2MeanReversionStrategy()
-        elif strategy_type == 'ELITE':
-            self.setup = SwingSetup_Elite()
-        elif strategy_type == 'OPTIONS_SIM':
-            self.setup = SwingSetup_Elite() # Signals from Elite, Execution is Options
-        elif strategy_type == 'OPTIONS_INVERSE':
-            self.setup = SwingSetup_Elite() # Signals from Elite, Inverted Execution
-        elif strategy_type == 'SNIPER_OPTIONS':
-            self.setup = DayTradeEngine() # Signals from Day Trade, Execution is Options
-        elif strategy_type == 'KELLOG':
-            self.setup = KellogStrategy()
-        elif strategy_type == 'CONGRESS':
-            self.setup = CongressStrategy()
-        elif strategy_type == 'BUFFETT':
-            self.setup = BuffettStrategy()
-        elif strategy_type == 'RSI_BANDS':
-            self.setup = RSIBandsStrategy()
-        elif strategy_type == 'WARRIOR':
-            self.setup = WarriorStrategy()
-        elif strategy_type == 'EMA3':
-             self.setup = EMA3Strategy()
-        elif strategy_type == 'FGD':
-             self.setup = FirstGreenDayStrategy()
-        elif strategy_type == 'MPDB':
-             self.setup = MorningPanicStrategy()
+        # Strategy + declared data requirements (timeframe, lookback, indicator columns)
+        self.spec = get_strategy(strategy_type)
+        self.setup = self.spec.factory()
             
         self.initial_capital = 100000.0
         self.cash = self.initial_capital
@@ -75,209 +38,33 @@ class BacktestEngine:
         self.trade_log = [] # List of closed trades
         self.equity_curve = [] # List of {date, equity}
         
-    def fetch_backtest_data(self, symbols: List[str], days: int, timeframe_str='1Day') -> Dict[str, pd.DataFrame]:
+    def fetch_backtest_data(self, symbols: List[str], days: int, timeframe_str: str = None) -> Dict[str, pd.DataFrame]:
         """
-        Fetches historical data.
-        If '1Day', computes vectorized swing indicators.
-        If '5Min', returns raw data for DayTradeEngine to process iteratively.
+        Fetches historical data for the strategy's primary timeframe (or `timeframe_str`)
+        and computes the indicator columns its registry entry declares.
         """
-        print(f"BACKTEST: Fetching {days} days of history ({timeframe_str}) for {len(symbols)} symbols...")
+        tf = timeframe_str or self.spec.primary.timeframe
+        req = next((r for r in self.spec.requirements if r.timeframe == tf), DataRequirement(tf, 0))
+        results = fetch_bars_with_indicators(self.api, symbols, days, req)
         
-        # Calculate start date
-        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        
-        # Determine TimeFrame object
-        tf = TimeFrame.Day
-        if timeframe_str == '5Min':
-             # We use string directly in get_bars usually, but let's try strict object if needed
-             # For simplicity, passing string '5Min' is supported by get_bars
-             tf = '5Min'
-
-        # Batch Fetch
-        try:
-            bars = self.api.get_bars(
-                symbols,
-                tf,
-                start=start_date,
-                end=end_date,
-                adjustment='raw',
-                feed='iex'
-            ).df
-        except Exception as e:
-            print(f"BACKTEST ERROR: API Fetch failed: {e}")
-            return {}
-
-        results = {}
-        
-        if bars.empty:
-            return results
-
-        # Process per symbol
-        unique_syms = bars.index.get_level_values(0).unique() if isinstance(bars.index, pd.MultiIndex) else bars['symbol'].unique()
-        
-        for sym in unique_syms:
-            # Extract DF
-            if isinstance(bars.index, pd.MultiIndex):
-                df = bars.xs(sym).copy()
-            else:
-                df = bars[bars['symbol'] == sym].copy()
-                # If index is already timestamp, great.
-                pass
-            
-            # Ensure sorted
-            df.sort_index(inplace=True)
-            
-            if self.strategy_type == 'SWING':
-                # --- SWING INDICATORS (Vectorized) ---
-                df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
-                df['sma50'] = df['close'].rolling(window=50).mean()
-                
-                # ATR
-                high_low = df['high'] - df['low']
-                high_close = (df['high'] - df['close'].shift()).abs()
-                low_close = (df['low'] - df['close'].shift()).abs()
-                ranges = pd.concat([high_low, high_close, low_close], axis=1)
-                true_range = np.max(ranges, axis=1)
-                df['atr'] = true_range.rolling(14).mean()
-                
-                # Helpers
-                df['vol_avg_20'] = df['volume'].rolling(20).mean()
-                df['prev_close'] = df['close'].shift(1)
-                
-                # Patterns
-                body = (df['close'] - df['open']).abs()
-                lower_wick = np.minimum(df['close'], df['open']) - df['low']
-                upper_wick = df['high'] - np.maximum(df['close'], df['open'])
-                df['is_hammer'] = (lower_wick > (2 * body)) & (upper_wick < body)
-                df['candle_pattern'] = np.where(df['is_hammer'], 'hammer', 'normal')
-                df['volume_dry_up'] = df['volume'] < (df['vol_avg_20'] * 0.7)
-                df['sector_rs'] = False 
-                
-            elif self.strategy_type == 'KELLOG':
-                # Need VWAP, ATR, and Volume Average for exits
-                # VWAP (Cumulative calculation, typically intraday)
-                # For daily bars, a simple approximation or using a different indicator might be needed.
-                # Assuming 'vwap' is available or calculated by the strategy engine for intraday.
-                # For daily, we'll use a simple moving average as a proxy if VWAP isn't directly available.
-                df['vwap'] = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
-                
-                # ATR (14-period)
-                high_low = df['high'] - df['low']
-                high_close = (df['high'] - df['close'].shift()).abs()
-                low_close = (df['low'] - df['close'].shift()).abs()
-                ranges = pd.concat([high_low, high_close, low_close], axis=1)
-                true_range = np.max(ranges, axis=1)
-                df['atr'] = true_range.rolling(14).mean()
-                
-                # Volume Average (e.g., 20-period)
-                df['vol_avg'] = df['volume'].rolling(20).mean()
-                         
-            elif self.strategy_type == 'DONCHIAN':
-                # Donchian Channels (20 High, 10 Low)
-                # Shift by 1 so we compare Close vs Previous Highs
-                df['high_20'] = df['high'].rolling(20).max().shift(1)
-                df['low_10'] = df['low'].rolling(10).min().shift(1)
-                
-            elif self.strategy_type == 'RSI2':
-                # SMA 200, SMA 5
-                df['sma200'] = df['close'].rolling(200).mean()
-                df['sma5'] = df['close'].rolling(5).mean()
-                
-                # RSI 2
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(2).mean() # Simple RSI for 2 period approximation
-                loss = (-delta.where(delta < 0, 0)).rolling(2).mean()
-                rs = gain / loss
-                df['rsi2'] = 100 - (100 / (1 + rs))
-                # Fix NaNs or Inf
-                df['rsi2'] = df['rsi2'].fillna(50)
-
-            elif self.strategy_type == 'RSI_BANDS':
-                # Bollinger Bands (20, 2)
-                df['sma20'] = df['close'].rolling(window=20).mean()
-                std20 = df['close'].rolling(window=20).std()
-                df['upper_bb'] = df['sma20'] + (std20 * 2)
-                df['lower_bb'] = df['sma20'] - (std20 * 2)
-                
-                # SMA 50
-                df['sma50'] = df['close'].rolling(window=50).mean()
-                
-                # RSI 14
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                df['rsi'] = 100 - (100 / (1 + rs))
-                df['rsi'] = df['rsi'].fillna(50)
-            
-            elif self.strategy_type == 'ELITE' or self.strategy_type == 'OPTIONS_SIM' or self.strategy_type == 'OPTIONS_INVERSE':
-                # Need ADX(14) and RSI(14)
-                
-                # RSI 14
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                df['rsi'] = 100 - (100 / (1 + rs))
-                df['rsi'] = df['rsi'].fillna(50)
-                
-                # ADX 14 (Vectorized approximation)
-                high = df['high']
-                low = df['low']
-                close = df['close']
-                
-                # TR
-                tr1 = high - low
-                tr2 = (high - close.shift()).abs()
-                tr3 = (low - close.shift()).abs()
-                tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-                
-                # DM
-                up_move = high - high.shift()
-                down_move = low.shift() - low
-                
-                plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-                minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
-                
-                # Convert to Series for rolling
-                tr_s = pd.Series(tr, index=df.index)
-                plus_dm_s = pd.Series(plus_dm, index=df.index)
-                minus_dm_s = pd.Series(minus_dm, index=df.index)
-                
-                # Wilder's Smoothing (Approx via rolling mean for speed, or ewm)
-                # ADX usually uses Wilder which is alpha=1/14. ewm(alpha=1/14)
-                atr14 = tr_s.ewm(alpha=1/14, adjust=False).mean()
-                plus_di = 100 * (plus_dm_s.ewm(alpha=1/14, adjust=False).mean() / atr14)
-                minus_di = 100 * (minus_dm_s.ewm(alpha=1/14, adjust=False).mean() / atr14)
-                
-                dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-                df['adx'] = dx.ewm(alpha=1/14, adjust=False).mean()
-                
-                # Base Swing Indicators as well
-                df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
-                df['sma50'] = df['close'].rolling(window=50).mean()
-                df['atr'] = atr14 # Re-use
-
-            results[sym] = df
-            
-            # CACHE DATA
+        # CACHE DATA
+        for sym, df in results.items():
             os.makedirs(f"data_cache_{self.strategy_type}", exist_ok=True)
             df.to_csv(f"data_cache_{self.strategy_type}/{sym}.csv")
             
-        print(f"BACKTEST: Data processed for {len(results)} symbols.")
         return results
 
-    def run(self, symbols: List[str], days=252):
+    def run(self, symbols: List[str], days=252, data_map: Dict[str, pd.DataFrame] = None):
+        """
+        Runs the backtest. `data_map` lets several strategies share one fetch
+        (see fetch_shared_data); otherwise data is fetched for this strategy alone.
+        """
         print(f"\n--- 🦅 HARMONIC EAGLE BACKTESTER ---\nStrategy: {self.strategy_type}\nPeriod: Last {days} Days\nCapital: ${self.initial_capital:,.2f}\n")
-        # Select Timeframe
-        tf_str = '1Day'
-        if self.strategy_type in ['DAY', 'SNIPER_OPTIONS', 'KELLOG', 'WARRIOR', 'MPDB']:
-             tf_str = '5Min'
-        
-        # CONGRESS and BUFFETT use 1Day default
-             
-        data_map = self.fetch_backtest_data(symbols, days, timeframe_str=tf_str)
+        # Primary timeframe comes from the registry (e.g. 5Min for DAY/WARRIOR, 1Day for SWING)
+        if data_map is None:
+            data_map = self.fetch_backtest_data(symbols, days)
+        else:
+            data_map = {s: data_map[s] for s in symbols if s in data_map}
 
         if not data_map:
             print("No data availability.")
@@ -511,12 +298,15 @@ class BacktestEngine:
             
             # Map index/special fields if needed
             # (row.to_dict handles close, high, low, ema20, rsi2, etc automatically)
+            for key, col in self.spec.aliases.items():
+                feature_dict[key] = feature_dict.get(col)
             
-            if self.strategy_type in ['DAY', 'SNIPER_OPTIONS', 'KELLOG', 'WARRIOR', 'MPDB']:
+            window = self.spec.window
+            if window:
                  idx_pos = df.index.get_loc(current_time)
                  if isinstance(idx_pos, slice): idx_pos = idx_pos.start
-                 if idx_pos < 50: continue
-                 subset = df.iloc[idx_pos-50 : idx_pos+1]
+                 if idx_pos < window: continue
+                 subset = df.iloc[idx_pos-window : idx_pos+1]
                  feature_dict['intraday_df'] = subset
 
             # Analyze
@@ -573,3 +363,54 @@ class BacktestEngine:
         print(f"Final Equity: ${final_equity:,.2f} ({roi:+.2f}%)")
         print("\nLast 5 Trades:")
         print(df.tail(5)[['date', 'symbol', 'side', 'result', 'pnl']].to_string(index=False))
+
+def fetch_bars_with_indicators(api, symbols: List[str], days: int, req: DataRequirement) -> Dict[str, pd.DataFrame]:
+    """
+    One multi-symbol fetch of `days` of history at req.timeframe, split per symbol
+    (BarFrame views are already sorted by timestamp) with req.indicators computed once each.
+    """
+    print(f"BACKTEST: Fetching {days} days of history ({req.timeframe}) for {len(symbols)} symbols...")
+    
+    # Calculate start date
+    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    
+    # Passing a string ('5Min') is supported by get_bars for intraday
+    tf = TimeFrame.Day if req.is_daily else req.timeframe
+
+    # Batch Fetch
+    try:
+        bars = api.get_bars(
+            symbols,
+            tf,
+            start=start_date,
+            end=end_date,
+            adjustment='raw',
+            feed='iex'
+        ).df
+    except Exception as e:
+        print(f"BACKTEST ERROR: API Fetch failed: {e}")
+        return {}
+
+    results = {}
+    if bars.empty:
+        return results
+
+    frame = BarFrame(bars)
+    for sym, df in frame.items():
+        results[sym] = compute_indicators(df, req.indicators)
+        
+    print(f"BACKTEST: Data processed for {len(results)} symbols.")
+    return results
+
+def fetch_shared_data(symbols: List[str], days: int, strategy_types: List[str]) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Fetches once for several backtests: one request per timeframe in the union of
+    the strategies' requirements, with every declared indicator computed once per symbol.
+    Returns {timeframe: {symbol: df}}; pass data[spec.primary.timeframe] to run(data_map=...).
+    """
+    api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
+    return {
+        tf: fetch_bars_with_indicators(api, symbols, days, req)
+        for tf, req in merge_requirements(strategy_types).items()
+    }
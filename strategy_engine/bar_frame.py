@@ -0,0 +1,197 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+
+class BarFrame:
+    """
+    Columnar container for a multi-symbol Alpaca bars response.
+
+    Sorts the response once by (symbol, timestamp) into contiguous NumPy
+    columns and records a (start, stop) offset range per symbol. `get(sym)`
+    returns a DataFrame built on slices of those columns (no copy), so
+    splitting N symbols costs O(N) instead of one xs()/mask + copy each.
+
+    Views share memory with the frame: engines may add columns freely, but
+    must not write into the existing OHLCV columns in place.
+    """
+
+    def __init__(self, bars: Optional[pd.DataFrame]):
+        self.columns: Dict[str, np.ndarray] = {}
+        self.index = pd.DatetimeIndex([], name="timestamp")
+        self.ranges: Dict[str, Tuple[int, int]] = {}
+        self.starts = np.array([], dtype=np.int64)
+        self.stops = np.array([], dtype=np.int64)
+
+        if bars is None or bars.empty:
+            return
+
+        if isinstance(bars.index, pd.MultiIndex):
+            sym_values = bars.index.get_level_values(0)
+            ts = bars.index.get_level_values(-1)
+            data = bars
+        elif 'symbol' in bars.columns:
+            sym_values = bars['symbol']
+            ts = bars.index
+            data = bars.drop(columns='symbol')
+        else:
+            raise ValueError("BarFrame expects a MultiIndex or a 'symbol' column.")
+
+        codes, uniques = pd.factorize(sym_values)
+        ts_i8 = np.asarray(ts.asi8 if hasattr(ts, 'asi8') else ts.view('i8'))
+
+        # Single sort for the whole response (skipped if already grouped & ordered)
+        order = np.lexsort((ts_i8, codes))
+        in_order = bool(np.all(order[1:] > order[:-1]))
+
+        for col in data.columns:
+            arr = data[col].to_numpy()
+            self.columns[col] = np.ascontiguousarray(arr if in_order else arr[order])
+
+        sorted_ts = ts if in_order else ts[order]
+        self.index = pd.DatetimeIndex(sorted_ts, name="timestamp")
+
+        sorted_codes = codes if in_order else codes[order]
+        bounds = np.searchsorted(sorted_codes, np.arange(len(uniques) + 1))
+        self.starts = bounds[:-1].astype(np.int64)
+        self.stops = bounds[1:].astype(np.int64)
+        for i, sym in enumerate(uniques):
+            self.ranges[str(sym)] = (int(bounds[i]), int(bounds[i + 1]))
+
+    @classmethod
+    def _from_parts(cls, columns: Dict[str, np.ndarray], index: pd.DatetimeIndex,
+                    ranges: Dict[str, Tuple[int, int]]) -> "BarFrame":
+        frame = cls(None)
+        frame.columns = columns
+        frame.index = index
+        frame.ranges = ranges
+        frame.starts = np.array([start for start, _ in ranges.values()], dtype=np.int64)
+        frame.stops = np.array([stop for _, stop in ranges.values()], dtype=np.int64)
+        return frame
+
+    @classmethod
+    def concat(cls, frames: Iterable["BarFrame"]) -> "BarFrame":
+        """One frame from several (e.g. chunked responses). First occurrence of a symbol wins."""
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return cls(None)
+        if len(frames) == 1:
+            return frames[0]
+        cols = [c for c in frames[0].columns if all(c in f.columns for f in frames)]
+        columns = {c: np.concatenate([f.columns[c] for f in frames]) for c in cols}
+        index = frames[0].index.append([f.index for f in frames[1:]])
+        ranges: Dict[str, Tuple[int, int]] = {}
+        offset = 0
+        for f in frames:
+            for sym, (start, stop) in f.ranges.items():
+                ranges.setdefault(sym, (start + offset, stop + offset))
+            offset += len(f.index)
+        return cls._from_parts(columns, index, ranges)
+
+    def tail(self, n: int) -> "BarFrame":
+        """Last n bars per symbol (shares the columns, only the ranges change)."""
+        ranges = {sym: (max(start, stop - n), stop) for sym, (start, stop) in self.ranges.items()}
+        return self._from_parts(self.columns, self.index, ranges)
+
+    # --- Shared memory (process-pool scans) ---
+
+    def to_shared(self) -> Tuple[SharedMemory, dict]:
+        """
+        Copies the numeric columns and the index into one shared memory block.
+        Returns (block, descriptor); the caller owns the block (close + unlink).
+        The descriptor is small and picklable: block name, column layout, ranges.
+        """
+        unit = getattr(self.index, "unit", "ns")
+        arrays = [(c, a) for c, a in self.columns.items() if a.dtype.kind in "biuf"]
+        arrays.append(("__index__", np.asarray(self.index.asi8)))
+
+        layout, offset = [], 0
+        for name, arr in arrays:
+            layout.append((name, arr.dtype.str, offset, len(arr)))
+            offset += -(-arr.nbytes // 8) * 8 # 8-byte aligned
+        shm = SharedMemory(create=True, size=max(offset, 8))
+        for (name, dtype, off, n), (_, arr) in zip(layout, arrays):
+            np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=off)[:] = arr
+
+        tz = str(self.index.tz) if self.index.tz is not None else None
+        return shm, {"shm": shm.name, "layout": layout, "unit": unit, "tz": tz, "ranges": dict(self.ranges)}
+
+    @classmethod
+    def from_shared(cls, shm: SharedMemory, desc: dict) -> "BarFrame":
+        """Frame whose columns are views on an attached block (no copy)."""
+        arrays = {name: np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=off)
+                  for name, dtype, off, n in desc["layout"]}
+        i8 = arrays.pop("__index__")
+        index = pd.DatetimeIndex(i8.view(f"M8[{desc['unit']}]"), name="timestamp")
+        if desc["tz"]:
+            index = index.tz_localize("UTC").tz_convert(desc["tz"])
+        return cls._from_parts(arrays, index, dict(desc["ranges"]))
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.ranges
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.ranges.keys())
+
+    @property
+    def empty(self) -> bool:
+        return not self.ranges
+
+    def get(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Zero-copy per-symbol view (timestamp-indexed, sorted ascending)."""
+        rng = self.ranges.get(symbol)
+        if rng is None:
+            return None
+        start, stop = rng
+        return pd.DataFrame(
+            {col: arr[start:stop] for col, arr in self.columns.items()},
+            index=self.index[start:stop],
+            copy=False
+        )
+
+    def items(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        for sym in self.ranges:
+            yield sym, self.get(sym)
+
+    def lengths(self) -> Dict[str, int]:
+        return {sym: stop - start for sym, (start, stop) in self.ranges.items()}
+
+    # --- Cross-sectional helpers (one value per symbol, in `symbols` order) ---
+
+    def last(self, column: str, offset: int = 0) -> np.ndarray:
+        """Value `offset` bars before each symbol's last bar (NaN if history is too short)."""
+        pos = self.stops - 1 - offset
+        ok = pos >= self.starts
+        out = np.full(len(pos), np.nan)
+        out[ok] = self.columns[column][pos[ok]]
+        return out
+
+    def tail_mean(self, values, window: int) -> np.ndarray:
+        """
+        Mean of the last `window` bars per symbol, i.e. rolling(window).mean().iloc[-1]
+        for every symbol at once. `values` is a column name or an array aligned to the frame.
+        """
+        arr = self.columns[values] if isinstance(values, str) else values
+        csum = np.concatenate(([0.0], np.cumsum(arr, dtype=np.float64)))
+        ok = (self.stops - self.starts) >= window
+        out = np.full(len(self.stops), np.nan)
+        out[ok] = (csum[self.stops[ok]] - csum[self.stops[ok] - window]) / window
+        return out
+
+    def window(self, values, n: int) -> np.ndarray:
+        """
+        Last `n` bars of every symbol as an (n_symbols, n) float matrix, right-aligned
+        (column -1 is the latest bar) and NaN-padded on the left for short histories.
+        `values` is a column name or an array aligned to the frame.
+        """
+        arr = self.columns[values] if isinstance(values, str) else values
+        pos = self.stops[:, None] - n + np.arange(n)[None, :]
+        ok = pos >= self.starts[:, None]
+        out = np.full(pos.shape, np.nan)
+        if len(arr):
+            out[ok] = arr[pos[ok]]
+        return out
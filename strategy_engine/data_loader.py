@@ -3,7 +3,47 @@ from configs.settings import settings
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from strategy_engine.bar_frame import BarFrame
+from strategy_engine.strategy_registry import SCANNER_STRATEGIES, SWING_DAILY as SWING_INDICATORS, BARS_PER_DAY, merge_requirements
+from strategy_engine.indicators.columns import feature_row
+from strategy_engine.factor_engine import FactorMatrix, factor_engine
+
+class Snapshot(dict):
+    """
+    fetch_snapshot() result: {symbol: feature_dict} as before, plus the columnar
+    bars it was built from, so cross-sectional consumers (rankers) read the
+    universe-wide factor matrix instead of walking the per-symbol dicts.
+    """
+
+    def __init__(self, data=(), daily: Optional[BarFrame] = None, intraday: Optional[BarFrame] = None, timeframe: str = "1Min"):
+        super().__init__(data)
+        self.daily = daily if daily is not None else BarFrame(None)
+        self.intraday = intraday
+        self.timeframe = timeframe
+
+    @property
+    def factors(self) -> Optional[FactorMatrix]:
+        """Factor matrix for this snapshot's bars (cached per bar by factor_engine)."""
+        if self.daily.empty:
+            return None
+        return factor_engine.compute(self.daily, self.intraday, self.timeframe)
+
+def snapshot_features(daily_bars: pd.DataFrame, intraday_bars: Optional[pd.DataFrame], indicators) -> Dict[str, Any]:
+    """
+    One symbol's fetch_snapshot() entry: latest daily row with the indicator
+    columns flattened, the daily bars as 'df' and the intraday bars as 'intraday_df'.
+    Shared with the sharded scan workers so both build identical dicts.
+    """
+    # Ensure sorted (BarFrame views already are)
+    if not daily_bars.index.is_monotonic_increasing:
+        daily_bars = daily_bars.sort_index()
+    features = feature_row(daily_bars, indicators)
+    features['df'] = daily_bars # Attach Daily DF for strategies needing history
+    features['intraday_df'] = intraday_bars
+    return features
 
 class DataLoader:
     def __init__(self):
@@ -17,21 +57,37 @@ class DataLoader:
             self.api = None
             print("DATA LOAD ERROR: No Alpaca Keys. Real data disabled.")
 
-    def fetch_snapshot(self, symbols: List[str]) -> Dict[str, Any]:
+        # Concurrent chunk requests for fetch_bars_chunked
+        self._fetch_pool = ThreadPoolExecutor(max_workers=settings.BAR_FETCH_WORKERS, thread_name_prefix="bars")
+
+    def fetch_snapshot(self, symbols: List[str], strategies=SCANNER_STRATEGIES) -> Snapshot:
         """
-        Fetches daily bars for the last 100 days to calculate indicators.
-        Returns a dictionary of symbol -> feature_dict.
+        Fetches the union of the data the given registered strategies declare
+        (default: the live scanner's), once per symbol:
+        - daily bars for the longest daily lookback, with every declared indicator
+          column computed once (latest row flattened into the feature dict),
+        - intraday bars for the finest intraday timeframe, trimmed to its lookback.
+        Returns a Snapshot: symbol -> feature_dict, plus the combined bar frames
+        (snapshot.factors is the cross-sectional factor matrix).
         """
         if not self.api:
-            return {}
+            return Snapshot()
 
         results = {}
+        daily_frames, intra_frames = [], []
+        reqs = merge_requirements(strategies)
+        daily_req = reqs.get("1Day")
+        intra_reqs = sorted((r for r in reqs.values() if not r.is_daily), key=lambda r: BARS_PER_DAY.get(r.timeframe, 0), reverse=True)
+        intra_req = intra_reqs[0] if intra_reqs else None
+        if not daily_req:
+            return Snapshot()
         
-        # Determine date range (enough for 50 SMA)
+        # Determine date range from the declared lookbacks
         end_date = (datetime.now()).strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=200)).strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=daily_req.lookback_days())).strftime('%Y-%m-%d')
 
-        print(f"DEBUG: Fetching data for {len(symbols)} symbols...")
+        print(f"DEBUG: Fetching data for {len(symbols)} symbols... (daily {daily_req.lookback} bars, "
+              f"{len(daily_req.indicators)} indicators{f', {intra_req.timeframe} x{intra_req.lookback}' if intra_req else ''})")
         
         # Alpaca allows chunking, but for <100 symbols one call might work or we loop
         # We'll batch to be safe and prevent timeouts on Render Free Tier
@@ -52,58 +108,43 @@ class DataLoader:
                     feed='iex'
                 ).df
                 
-                # 2. Fetch Intraday Bars (for Day Trading) - Last 5 days of 1Min
-                intra_start = (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d')
-                intraday_bars = self.api.get_bars(
-                    chunk,
-                    TimeFrame.Minute, # 1Min
-                    start=intra_start,
-                    limit=1000, # Enough for indicators
-                    adjustment='raw',
-                    feed='iex'
-                ).df
+                # 2. Fetch Intraday Bars (for Day Trading)
+                # No request limit: Alpaca's limit spans all symbols in the chunk. Trim per symbol instead.
+                intraday_bars = None
+                if intra_req:
+                    intra_start = (datetime.now() - timedelta(days=intra_req.lookback_days())).strftime('%Y-%m-%d')
+                    intraday_bars = self.api.get_bars(
+                        chunk,
+                        intra_req.timeframe,
+                        start=intra_start,
+                        adjustment='raw',
+                        feed='iex'
+                    ).df
                 
                 if bars.empty:
                     print("DEBUG: Chunk returned empty.")
                     continue
 
+                # Columnar split: one sort per response, zero-copy per-symbol views
+                daily_frame = BarFrame(bars)
+                intra_frame = BarFrame(intraday_bars)
+                if intra_req:
+                    intra_frame = intra_frame.tail(intra_req.lookback)
+                daily_frames.append(daily_frame)
+                intra_frames.append(intra_frame)
+
                 # Process per symbol
                 for symbol in chunk:
-                    # Handle MultiIndex logic for Daily
-                    sym_data = None
-                    if isinstance(bars.index, pd.MultiIndex):
-                        try:
-                            sym_data = bars.xs(symbol)
-                        except KeyError:
-                             pass
-                    elif 'symbol' in bars.columns:
-                        sym_data = bars[bars['symbol'] == symbol].copy()
-                        
+                    sym_data = daily_frame.get(symbol)
                     if sym_data is None: continue
 
-                    # Handle MultiIndex for Intraday
-                    intra_data = None
-                    if not intraday_bars.empty:
-                        if isinstance(intraday_bars.index, pd.MultiIndex):
-                            try:
-                                intra_data = intraday_bars.xs(symbol)
-                            except KeyError:
-                                pass
-                        elif 'symbol' in intraday_bars.columns:
-                            intra_data = intraday_bars[intraday_bars['symbol'] == symbol].copy()
+                    intra_data = intra_frame.get(symbol)
 
                     if len(sym_data) < 20: 
                         print(f"DEBUG: Dropping {symbol} - Insufficient History ({len(sym_data)} < 20)")
                         continue 
 
-                    processed_data = self._calculate_technicals(sym_data)
-                    processed_data['df'] = sym_data # Attach Daily DF for strategies needing history
-
-                    
-                    # Attach Intraday DF
-                    processed_data['intraday_df'] = intra_data
-                    
-                    results[symbol] = processed_data
+                    results[symbol] = snapshot_features(sym_data, intra_data, daily_req.indicators)
 
 
                     
@@ -111,66 +152,78 @@ class DataLoader:
                 print(f"Data Fetch Error (Chunk): {e}")
                 continue # Skip bad chunk, keep going
             
-        return results
+        return Snapshot(
+            results,
+            daily=BarFrame.concat(daily_frames),
+            intraday=BarFrame.concat(intra_frames) if intra_req else None,
+            timeframe=intra_req.timeframe if intra_req else "1Min"
+        )
 
-    def _calculate_technicals(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_technicals(self, df: pd.DataFrame, indicators=SWING_INDICATORS) -> Dict[str, Any]:
         """
-        Computes EMA20, SMA50, ATR, Volume Profile.
-        Takes the last row as the 'current' state.
+        Computes the declared indicator columns (EMA20, SMA50, ATR, Volume Profile, ...)
+        and takes the last row as the 'current' state.
         """
-        # Ensure sorted
-        df = df.sort_index()
+        # Ensure sorted (BarFrame views already are)
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
 
-        # Close
-        close = df['close']
-        
-        # Indicators
-        df['ema20'] = close.ewm(span=20, adjust=False).mean()
-        df['sma50'] = close.rolling(window=50).mean()
-        
-        # ATR (14)
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = np.max(ranges, axis=1)
-        df['atr'] = true_range.rolling(14).mean()
+        return feature_row(df, indicators)
+
+    def fetch_intraday_frame(self, symbols: List[str], timeframe='5Min', days: int = 5, limit=1000) -> BarFrame:
+        """
+        Single multi-symbol intraday bar request, returned columnar.
+        Pass limit=None when fetching many symbols (Alpaca's limit is across all of them).
+        """
+        if not self.api or not symbols: return BarFrame(None)
         
-        # Volume
-        df['vol_avg_20'] = df['volume'].rolling(20).mean()
+        intra_start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        bars = self.api.get_bars(
+            symbols,
+            timeframe,
+            start=intra_start,
+            limit=limit,
+            adjustment='raw',
+            feed='iex'
+        ).df
+        return BarFrame(bars)
+
+    def fetch_frame_chunked(self, symbols: List[str], timeframe: str, days: int,
+                            tail: Optional[int] = None, feed: Optional[str] = 'iex') -> BarFrame:
+        """
+        Multi-symbol bars for a large symbol list: split into BAR_FETCH_CHUNK-symbol
+        requests that run concurrently, each split columnar via BarFrame, then
+        concatenated into one frame (chunk order).
+        `tail` keeps only the last N bars per symbol (what a per-symbol `limit=N` used to give).
+        feed=None uses the account's default feed.
+        Symbols without bars (or in a failed chunk) are absent.
+        """
+        if not self.api or not symbols: return BarFrame(None)
         
-        # Get latest row
-        curr = df.iloc[-1]
-        prev = df.iloc[-2]
+        start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        size = settings.BAR_FETCH_CHUNK
+        chunks = [list(symbols[i:i + size]) for i in range(0, len(symbols), size)]
         
-        # Patterns
-        is_hammer = False
-        body = abs(curr['close'] - curr['open'])
-        lower_wick = min(curr['close'], curr['open']) - curr['low']
-        upper_wick = curr['high'] - max(curr['close'], curr['open'])
-        if lower_wick > (2 * body) and upper_wick < body:
-            is_hammer = True
-            
-        # Volume Check
-        vol_dry_up = curr['volume'] < curr['vol_avg_20'] * 0.7
+        def _fetch(chunk):
+            kwargs = {"start": start, "adjustment": 'raw'}
+            if feed: kwargs["feed"] = feed
+            return BarFrame(self.api.get_bars(chunk, timeframe, **kwargs).df)
         
-        return {
-            "close": float(curr['close']),
-            "open": float(curr['open']),
-            "high": float(curr['high']),
-            "low": float(curr['low']),
-            "volume": int(curr['volume']),
-            "ema20": float(curr['ema20']),
-            "sma50": float(curr['sma50']),
-            "atr": float(curr['atr']),
-            "candle_pattern": "hammer" if is_hammer else "normal",
-            "volume_dry_up": bool(vol_dry_up),
-            # Helpers for logic
-            "prev_close": float(prev['close']),
-            "current_date": curr.name
-        }
+        frames = []
+        # Each chunk runs in a copy of the caller's context (keeps scan tracing attribution)
+        futures = [self._fetch_pool.submit(contextvars.copy_context().run, _fetch, c) for c in chunks]
+        for chunk, fut in zip(chunks, futures):
+            try:
+                frames.append(fut.result())
+            except Exception as e:
+                print(f"Bar Fetch Error ({timeframe}, {len(chunk)} symbols): {e}")
+        frame = BarFrame.concat(frames)
+        return frame.tail(tail) if tail else frame
 
-        return results
+    def fetch_bars_chunked(self, symbols: List[str], timeframe: str, days: int,
+                           tail: Optional[int] = None, feed: Optional[str] = 'iex') -> Dict[str, pd.DataFrame]:
+        """fetch_frame_chunked split per symbol: {symbol: DataFrame}."""
+        return dict(self.fetch_frame_chunked(symbols, timeframe, days, tail=tail, feed=feed).items())
 
     def fetch_intraday_snapshot(self, symbols: List[str], timeframe='5Min') -> Dict[str, Any]:
         """
@@ -180,7 +233,6 @@ class DataLoader:
         if not self.api: return {}
         
         results = {}
-        intra_start = (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d')
         
         # Use string '5Min' or '1Min' for simplicity as per backtest
         tf = timeframe
@@ -189,25 +241,11 @@ class DataLoader:
         
         try:
              # Fetch all at once (or chunk if large)
-             bars = self.api.get_bars(
-                symbols,
-                tf,
-                start=intra_start,
-                limit=1000,
-                adjustment='raw', 
-                feed='iex'
-             ).df
-             
-             if bars.empty: return {}
+             frame = self.fetch_intraday_frame(symbols, tf)
+             if frame.empty: return {}
              
              for sym in symbols:
-                df = None
-                if isinstance(bars.index, pd.MultiIndex):
-                    try: df = bars.xs(sym).copy()
-                    except: pass
-                elif 'symbol' in bars.columns:
-                    df = bars[bars['symbol'] == sym].copy()
-                
+                df = frame.get(sym)
                 if df is not None:
                      results[sym] = {'intraday_df': df}
                      
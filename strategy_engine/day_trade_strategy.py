@@ -1,12 +1,29 @@
 from typing import List, Optional, Dict
+import numpy as np
 from strategy_engine.models import Candidate, Section, Direction, TradePlan, Scores, Compliance
 from configs.settings import settings
+from data_adapters.volume_profile import volume_profiles
+from strategy_engine.factor_engine import FactorMatrix
 
 class DayTradeEngine:
     """
     Focus: A+ Momentum, RVOL, VWAP.
     Strategies: ORB, VWAP Reclaim.
+    profile_rvol: vol_ratio is the bar's volume vs. the same minutes of an average
+    session (nightly volume profile) instead of the last 20 bars, so the open/close
+    volume smile doesn't fake or hide surges. Live scans only: the profile is built
+    from recent history, so backtests keep the flat average.
+    bar_minutes: length of the bars the engine is fed (the profile window per bar).
     """
+
+    def __init__(self, profile_rvol: bool = False, bar_minutes: int = 1):
+        self.profile_rvol = profile_rvol
+        self.bar_minutes = bar_minutes
+
+    @staticmethod
+    def screen(factors: FactorMatrix) -> List[str]:
+        """Symbols (in matrix order) with enough intraday bars for analyze()."""
+        return [s for s, n in zip(factors.symbols, factors["intraday_bars"]) if n >= 50]
     
     def analyze(self, symbol: str, data: Dict[str, any]) -> Optional[Candidate]:
         # Expecting 'intraday_df' in data for this logic
@@ -18,6 +35,10 @@ class DayTradeEngine:
         # 1. Indicators
         df['vol_avg'] = df['volume'].rolling(20).mean()
         df['vol_ratio'] = df['volume'] / df['vol_avg']
+        if self.profile_rvol:
+            tod = volume_profiles.bar_rvol(symbol, df['volume'].to_numpy(), df.index, self.bar_minutes)
+            if tod is not None:
+                df['vol_ratio'] = np.where(np.isfinite(tod), tod, df['vol_ratio'])
         df['ema9'] = df['close'].ewm(span=9).mean()
         df['ema20'] = df['close'].ewm(span=20).mean()
         df['high_20'] = df['high'].rolling(20).max().shift(1) # Don't look ahead, use prev 20
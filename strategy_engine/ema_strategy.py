@@ -15,6 +15,11 @@ class EMA3Strategy:
       - TARGET: 2R.
     """
 
+    @staticmethod
+    def screen(factors) -> np.ndarray:
+        """Row mask of symbols with enough daily history (FactorMatrix)."""
+        return factors["daily_bars"] >= 100
+
     def analyze(self, symbol: str, features: Dict[str, any]) -> Optional[Candidate]:
         full_df = features.get('df')
         current_date = features.get('current_date')
@@ -0,0 +1,235 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional
+import numpy as np
+import pandas as pd
+from strategy_engine.bar_frame import BarFrame
+from data_adapters.volume_profile import volume_profiles
+
+# Universe-wide factor matrix shared by the rankers and engines.
+# One vectorized pass over the columnar daily + intraday bars, cached per bar.
+
+FACTORS = (
+    "close", "open", "vwap", "volume",
+    "adv20",          # Mean daily volume of the 20 sessions before today
+    "ema20", "sma50", "atr",
+    "atr_pct",        # ATR(14) / close
+    "ma_sep",         # (EMA20 - SMA50) / close
+    "vwap_dist",      # (close - VWAP) / VWAP
+    "rvol_20d",       # Today's volume / adv20
+    "rvol_tod",       # Today's volume so far / volume expected by this time of day (volume profile)
+    "roc_5m", "roc_15m", "roc_60m",
+    "intraday_bars",  # Intraday bars available (0 = none)
+    "daily_bars",     # Daily bars available
+)
+
+SESSION_OPEN_MIN = 9 * 60 + 30 # Minutes after midnight, exchange time
+SESSION_MINUTES = 390
+BAR_MINUTES = {"1Min": 1, "5Min": 5, "15Min": 15, "1Hour": 60}
+_NS_PER_DAY = 86_400 * 10**9
+_NS_PER_MIN = 60 * 10**9
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Last value of ewm(span, adjust=False) per row of a right-aligned, NaN-padded matrix."""
+    alpha = 2.0 / (span + 1)
+    ema = np.full(values.shape[0], np.nan)
+    for x in values.T:
+        ema = np.where(np.isnan(ema), x, alpha * x + (1 - alpha) * ema)
+    return ema
+
+def _exchange_minutes(index: pd.DatetimeIndex) -> np.ndarray:
+    """Bar timestamps as nanoseconds of New York wall-clock time."""
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    wall = index.tz_convert("America/New_York").tz_localize(None)
+    return wall.values.astype("datetime64[ns]").view("i8")
+
+class FactorMatrix:
+    """
+    One row per symbol, one float column per factor (NaN = not enough data).
+    `bar` is the latest bar timestamp the matrix was computed from.
+    """
+
+    def __init__(self, symbols: List[str], columns: Dict[str, np.ndarray], bar: Optional[pd.Timestamp] = None):
+        self.symbols = list(symbols)
+        self.columns = columns
+        self.bar = bar
+        self._pos = {s: i for i, s in enumerate(self.symbols)}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._pos
+
+    def __getitem__(self, factor: str) -> np.ndarray:
+        return self.columns[factor]
+
+    def take(self, symbols) -> "FactorMatrix":
+        """Rows for `symbols`, in that order (unknown symbols are skipped)."""
+        symbols = [s for s in symbols if s in self._pos]
+        idx = np.array([self._pos[s] for s in symbols], dtype=np.int64)
+        return FactorMatrix(symbols, {f: col[idx] for f, col in self.columns.items()}, self.bar)
+
+    def row(self, symbol: str) -> Dict[str, float]:
+        i = self._pos[symbol]
+        return {f: float(col[i]) for f, col in self.columns.items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns, index=pd.Index(self.symbols, name="symbol"))
+
+class FactorEngine:
+    """
+    Computes the FactorMatrix for a daily BarFrame (plus an optional intraday
+    BarFrame) with whole-universe NumPy ops: per-symbol histories are laid out
+    as right-aligned matrices (BarFrame.window) so every factor is one
+    expression over all symbols.
+
+    Results are cached per bar: the key is the universe plus the latest daily
+    and intraday bar timestamps, so every ranker/engine reading the same
+    snapshot (or a refetch before the next bar closes) shares one matrix.
+    """
+
+    def __init__(self, keep: int = 4):
+        self.keep = keep
+        self._cache: "OrderedDict[tuple, FactorMatrix]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compute(self, daily: BarFrame, intraday: Optional[BarFrame] = None, timeframe: str = "1Min") -> FactorMatrix:
+        key = (self._frame_key(daily), self._frame_key(intraday), timeframe)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+
+        matrix = self._compute(daily, intraday, timeframe)
+        with self._lock:
+            self._cache[key] = matrix
+            while len(self._cache) > self.keep:
+                self._cache.popitem(last=False)
+        return matrix
+
+    def for_snapshot(self, market_data: Mapping[str, dict]) -> FactorMatrix:
+        """
+        Factors for the symbols of a fetch_snapshot() result, in its order.
+        Uses the snapshot's bar frames; a plain {symbol: features} dict is
+        rebuilt from its 'df' / 'intraday_df' entries.
+        """
+        matrix = getattr(market_data, "factors", None)
+        if matrix is None:
+            daily = {s: d["df"] for s, d in market_data.items() if d.get("df") is not None}
+            intra = {s: d["intraday_df"] for s, d in market_data.items() if d.get("intraday_df") is not None}
+            matrix = self.compute(self._to_frame(daily), self._to_frame(intra) if intra else None)
+        return matrix.take(market_data.keys())
+
+    @staticmethod
+    def _to_frame(dfs: Dict[str, pd.DataFrame]) -> BarFrame:
+        if not dfs:
+            return BarFrame(None)
+        return BarFrame(pd.concat(dfs, names=["symbol", "timestamp"]))
+
+    @staticmethod
+    def _last_ts(frame: Optional[BarFrame]) -> Optional[pd.Timestamp]:
+        """Latest bar timestamp in the frame (UTC)."""
+        if frame is None or frame.empty:
+            return None
+        nonempty = frame.stops > frame.starts
+        if not nonempty.any():
+            return None
+        index = frame.index if frame.index.tz is not None else frame.index.tz_localize("UTC")
+        return index[frame.stops[nonempty] - 1].max().tz_convert("UTC")
+
+    def _frame_key(self, frame: Optional[BarFrame]):
+        if frame is None or frame.empty:
+            return None
+        ranges = tuple(frame.ranges.items())
+        return (hash(ranges), len(ranges), self._last_ts(frame))
+
+    def _compute(self, daily: BarFrame, intraday: Optional[BarFrame], timeframe: str) -> FactorMatrix:
+        symbols = daily.symbols
+        n = len(symbols)
+        nan = np.full(n, np.nan)
+        cols: Dict[str, np.ndarray] = {}
+
+        # --- Daily factors ---
+        if n:
+            longest = int((daily.stops - daily.starts).max())
+            close = daily.last("close")
+            cols["close"] = close
+            cols["open"] = daily.last("open")
+            cols["vwap"] = daily.last("vwap") if "vwap" in daily.columns else nan
+            cols["volume"] = daily.last("volume")
+
+            cols["adv20"] = daily.window("volume", 21)[:, :-1].mean(axis=1)
+            cols["ema20"] = _ema(daily.window("close", longest), 20)
+            cols["sma50"] = daily.window("close", 50).mean(axis=1)
+
+            # ATR(14): simple mean of True Range; a symbol's first bar has no previous close (TR = H - L)
+            c, h, l = (daily.window(col, 15) for col in ("close", "high", "low"))
+            prev, h, l = c[:, :-1], h[:, 1:], l[:, 1:]
+            tr = np.fmax(h - l, np.fmax(np.abs(h - prev), np.abs(l - prev)))
+            cols["atr"] = tr.mean(axis=1)
+            cols["daily_bars"] = (daily.stops - daily.starts).astype(float)
+        else:
+            for f in ("close", "open", "vwap", "volume", "adv20", "ema20", "sma50", "atr", "daily_bars"):
+                cols[f] = nan
+
+        close = cols["close"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cols["atr_pct"] = cols["atr"] / close
+            cols["ma_sep"] = (cols["ema20"] - cols["sma50"]) / close
+            cols["vwap_dist"] = (close - cols["vwap"]) / cols["vwap"]
+            cols["rvol_20d"] = np.where(cols["adv20"] > 0, cols["volume"] / cols["adv20"], np.nan)
+
+        # --- Intraday factors (computed in intraday order, scattered into daily order) ---
+        for f in ("rvol_tod", "roc_5m", "roc_15m", "roc_60m"):
+            cols[f] = nan.copy()
+        cols["intraday_bars"] = np.zeros(n)
+
+        if intraday is not None and not intraday.empty and n:
+            step = BAR_MINUTES.get(timeframe, 1)
+            ipos = {s: i for i, s in enumerate(intraday.symbols)}
+            take = np.array([ipos.get(s, -1) for s in symbols], dtype=np.int64)
+            has = take >= 0
+
+            def scatter(values: np.ndarray) -> np.ndarray:
+                out = nan.copy()
+                out[has] = values[take[has]]
+                return out
+
+            lengths = (intraday.stops - intraday.starts).astype(float)
+            cols["intraday_bars"] = np.nan_to_num(scatter(lengths))
+
+            last = intraday.last("close")
+            with np.errstate(divide="ignore", invalid="ignore"):
+                for minutes in (5, 15, 60):
+                    if minutes % step == 0:
+                        cols[f"roc_{minutes}m"] = scatter(last / intraday.last("close", minutes // step) - 1)
+
+            # Time-of-day RVOL: regular-session volume so far today vs. the volume expected by
+            # the end of the last bar - from the nightly volume profile, else an even share of adv20.
+            wall = _exchange_minutes(intraday.index)
+            day, minute = wall // _NS_PER_DAY, (wall % _NS_PER_DAY) // _NS_PER_MIN
+            in_session = (minute >= SESSION_OPEN_MIN) & (minute < SESSION_OPEN_MIN + SESSION_MINUTES)
+            width = SESSION_MINUTES // step
+            day_w = intraday.window(np.where(in_session, day, -1).astype(float), width)
+            vol_w = intraday.window(intraday.columns["volume"].astype(float), width)
+
+            last_pos = np.maximum(intraday.stops - 1, 0)
+            live = (lengths > 0) & in_session[last_pos] # Last bar is a regular-session bar
+            volume_today = np.where(day_w == day[last_pos][:, None].astype(float), vol_w, 0.0).sum(axis=1)
+            elapsed = np.clip(minute[last_pos] - SESSION_OPEN_MIN + step, step, SESSION_MINUTES)
+
+            adv20 = np.full(len(lengths), np.nan)
+            adv20[take[has]] = cols["adv20"][has]
+            expected = volume_profiles.expected_many(intraday.symbols, elapsed - 1)
+            expected = np.where(np.isfinite(expected), expected, adv20 * elapsed / SESSION_MINUTES)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cols["rvol_tod"] = scatter(np.where(live & (expected > 0), volume_today / expected, np.nan))
+
+        stamps = [ts for ts in (self._last_ts(daily), self._last_ts(intraday)) if ts is not None]
+        bar = max(stamps) if stamps else None
+        return FactorMatrix(symbols, {f: cols[f] for f in FACTORS}, bar)
+
+factor_engine = FactorEngine()
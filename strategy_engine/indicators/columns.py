@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Indicator columns shared by the scanner and the backtester.
+# Each function adds its columns to a bar DataFrame (open/high/low/close/volume) in place.
+
+def _true_range(df: pd.DataFrame) -> pd.Series:
+    high_low = df['high'] - df['low']
+    high_close = (df['high'] - df['close'].shift()).abs()
+    low_close = (df['low'] - df['close'].shift()).abs()
+    return pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+
+def _rsi(close: pd.Series, period: int) -> pd.Series:
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
+    rs = gain / loss
+    return (100 - (100 / (1 + rs))).fillna(50)
+
+def ema20(df):
+    df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
+
+def sma(period: int) -> Callable:
+    def _sma(df):
+        df[f'sma{period}'] = df['close'].rolling(window=period).mean()
+    return _sma
+
+def atr(df):
+    """ATR(14), simple rolling mean of True Range."""
+    df['atr'] = _true_range(df).rolling(14).mean()
+
+def vol_avg_20(df):
+    df['vol_avg_20'] = df['volume'].rolling(20).mean()
+
+def vol_avg(df):
+    """Same 20-bar average under the key intraday strategies (Warrior/Kellog) read."""
+    df['vol_avg'] = df['volume'].rolling(20).mean()
+
+def prev_close(df):
+    df['prev_close'] = df['close'].shift(1)
+
+def candle_patterns(df):
+    body = (df['close'] - df['open']).abs()
+    lower_wick = np.minimum(df['close'], df['open']) - df['low']
+    upper_wick = df['high'] - np.maximum(df['close'], df['open'])
+    df['is_hammer'] = (lower_wick > (2 * body)) & (upper_wick < body)
+    df['candle_pattern'] = np.where(df['is_hammer'], 'hammer', 'normal')
+    df['volume_dry_up'] = df['volume'] < (df['vol_avg_20'] * 0.7)
+    df['sector_rs'] = False
+
+def vwap_cum(df):
+    """Cumulative VWAP over the whole frame (daily-bar proxy)."""
+    df['vwap'] = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
+
+def donchian(df):
+    # Shift by 1 so we compare Close vs Previous Highs
+    df['high_20'] = df['high'].rolling(20).max().shift(1)
+    df['low_10'] = df['low'].rolling(10).min().shift(1)
+
+def rsi2(df):
+    # Simple RSI for 2 period approximation
+    df['rsi2'] = _rsi(df['close'], 2)
+
+def rsi14(df):
+    df['rsi'] = _rsi(df['close'], 14)
+
+def bollinger(df):
+    """Bollinger Bands (20, 2) around sma20."""
+    std20 = df['close'].rolling(window=20).std()
+    df['upper_bb'] = df['sma20'] + (std20 * 2)
+    df['lower_bb'] = df['sma20'] - (std20 * 2)
+
+def adx(df):
+    """ADX(14) with Wilder smoothing. Also leaves the Wilder ATR in 'atr_wilder'."""
+    high, low, close = df['high'], df['low'], df['close']
+    tr = _true_range(df)
+    up_move = high - high.shift()
+    down_move = low.shift() - low
+    plus_dm = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0.0), index=df.index)
+    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0.0), index=df.index)
+
+    atr14 = tr.ewm(alpha=1/14, adjust=False).mean()
+    plus_di = 100 * (plus_dm.ewm(alpha=1/14, adjust=False).mean() / atr14)
+    minus_di = 100 * (minus_dm.ewm(alpha=1/14, adjust=False).mean() / atr14)
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    df['adx'] = dx.ewm(alpha=1/14, adjust=False).mean()
+    df['atr_wilder'] = atr14
+
+# name -> (function, indicators it depends on, columns it adds)
+INDICATORS: Dict[str, Tuple[Callable, Tuple[str, ...], Tuple[str, ...]]] = {
+    "ema20": (ema20, (), ("ema20",)),
+    "sma5": (sma(5), (), ("sma5",)),
+    "sma20": (sma(20), (), ("sma20",)),
+    "sma50": (sma(50), (), ("sma50",)),
+    "sma200": (sma(200), (), ("sma200",)),
+    "atr": (atr, (), ("atr",)),
+    "vol_avg_20": (vol_avg_20, (), ("vol_avg_20",)),
+    "vol_avg": (vol_avg, (), ("vol_avg",)),
+    "prev_close": (prev_close, (), ("prev_close",)),
+    "candle_patterns": (candle_patterns, ("vol_avg_20",), ("is_hammer", "candle_pattern", "volume_dry_up", "sector_rs")),
+    "vwap_cum": (vwap_cum, (), ("vwap",)),
+    "donchian": (donchian, (), ("high_20", "low_10")),
+    "rsi2": (rsi2, (), ("rsi2",)),
+    "rsi14": (rsi14, (), ("rsi",)),
+    "bollinger": (bollinger, ("sma20",), ("upper_bb", "lower_bb")),
+    "adx": (adx, (), ("adx", "atr_wilder")),
+}
+
+def resolve(names: Iterable[str]) -> List[str]:
+    """Indicator names plus their dependencies, deduplicated, dependencies first."""
+    ordered: List[str] = []
+    def visit(name):
+        if name in ordered: return
+        if name not in INDICATORS:
+            raise KeyError(f"Unknown indicator: {name}")
+        for dep in INDICATORS[name][1]:
+            visit(dep)
+        ordered.append(name)
+    for n in names:
+        visit(n)
+    return ordered
+
+def compute_indicators(df: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+    """Adds every requested indicator column (and its dependencies) to df, each exactly once."""
+    for name in resolve(names):
+        INDICATORS[name][0](df)
+    return df
+
+def output_columns(names: Iterable[str]) -> List[str]:
+    cols: List[str] = []
+    for name in resolve(names):
+        cols.extend(INDICATORS[name][2])
+    return cols
+
+def feature_row(df: pd.DataFrame, names: Iterable[str]) -> Dict[str, object]:
+    """
+    Computes the indicators and flattens the last bar into a feature dict
+    (OHLCV + indicator columns as plain Python scalars, plus 'current_date').
+    """
+    compute_indicators(df, names)
+    curr = df.iloc[-1]
+    
+    features = {
+        "close": float(curr['close']),
+        "open": float(curr['open']),
+        "high": float(curr['high']),
+        "low": float(curr['low']),
+        "volume": int(curr['volume']),
+    }
+    for col in output_columns(names):
+        v = curr[col]
+        if isinstance(v, (bool, np.bool_)): features[col] = bool(v)
+        elif isinstance(v, str): features[col] = v
+        else: features[col] = float(v)
+    features.pop("is_hammer", None) # Internal to candle_pattern
+    # Helpers for logic
+    features["current_date"] = curr.name
+    return features
@@ -17,6 +17,7 @@ except ImportError:
     StockBarsRequest = None
 
 from configs.settings import settings
+from strategy_engine.snapshot_frame import SnapshotFrame
 
 class MarketHunter:
     """
@@ -84,72 +85,32 @@ class MarketHunter:
             if not raw_symbols:
                  return self.fallback_universe[:50]
 
-            # 2. Fetch Snapshots to get Price Change (Gainers/Losers)
-            # Chunking to be safe (though 200 is usually fine)
-            snapshots = {}
-            chunk_size = 100
-            for i in range(0, len(raw_symbols), chunk_size):
-                chunk = raw_symbols[i:i+chunk_size]
-                try:
-                    snaps = self.api.get_snapshots(chunk)
-                    snapshots.update(snaps)
-                except Exception as e:
-                    print(f"hunter: Snapshot error: {e}")
+            # 2. Fetch Snapshots to get Price Change (Gainers/Losers), as NumPy columns
+            snaps = SnapshotFrame.fetch(self.api, raw_symbols, chunk_size=100)
 
-            # 3. Sort Candidates
-            candidates = []
-            for sym, snap in snapshots.items():
-                if not snap.daily_bar: continue
-                
-                price = snap.daily_bar.c
-                prev_close = snap.prev_daily_bar.c
-                volume = snap.daily_bar.v
-                
-                if price < 5 or price > 1000: continue # Filter noise/expensive
-                if not prev_close: continue
-                
-                pct_change = (price - prev_close) / prev_close
-                
-                candidates.append({
-                    "symbol": sym,
-                    "change": pct_change,
-                    "abs_change": abs(pct_change),
-                    "volume": volume,
-                    "price": price
-                })
+            # 3. Filter noise/expensive ($5-$1000, needs prev close)
+            ok = snaps.mask(min_price=5, max_price=1000)
+            if not ok.any(): return self.fallback_universe[:50]
 
-            # 4. Bucketing (The "Yahoo Finance" Import Logic)
-            df = pd.DataFrame(candidates)
-            if df.empty: return self.fallback_universe[:50]
-            
-            # A. Top Losers (Bottom 10)
-            top_losers = df.sort_values("change", ascending=True).head(15)
-            print(f"hunter: Found Top Losers: {top_losers['symbol'].tolist()}")
+            # 4. Bucketing (The "Yahoo Finance" Import Logic) - argpartition top-k per bucket
+            # A. Top Losers (Bottom 15)
+            top_losers = snaps.top_k(snaps.change, 15, mask=ok, largest=False)
+            print(f"hunter: Found Top Losers: {top_losers}")
 
-            # B. Top Gainers (Top 10 - Trending)
-            top_gainers = df.sort_values("change", ascending=False).head(15)
+            # B. Top Gainers (Top 15 - Trending)
+            top_gainers = snaps.top_k(snaps.change, 15, mask=ok)
             
             # C. Most Active (Top 15 by Volume) -- redundant as source is active, but ensures coverage
-            most_active = df.sort_values("volume", ascending=False).head(15)
+            most_active = snaps.top_k(snaps.volume, 15, mask=ok)
             
             # Combine Sets
-            final_set = set()
-            final_set.update(top_losers['symbol'].tolist())
-            final_set.update(top_gainers['symbol'].tolist())
-            final_set.update(most_active['symbol'].tolist())
+            final_set = set(top_losers) | set(top_gainers) | set(most_active)
             
-            # Backfill with original "Smart Quality" Logic if needed to reach 50
-            # (Re-using simplified score logic on the rest)
+            # Backfill with high volume leftovers (volume as proxy for quality) to reach 50
             remaining_needed = 50 - len(final_set)
             if remaining_needed > 0:
-                # Simple Smart Score: MovAvg Trend
-                # Only need 60 days bars for the candidates not yet chosen
-                # Optimization: Just pick high volume leftovers
-                leftovers = df[~df['symbol'].isin(final_set)]
-                if not leftovers.empty:
-                    # Sort by volume as proxy for quality
-                    fillers = leftovers.sort_values("volume", ascending=False).head(remaining_needed)
-                    final_set.update(fillers['symbol'].tolist())
+                leftovers = ok & ~np.isin(snaps.symbols, list(final_set))
+                final_set.update(snaps.top_k(snaps.volume, remaining_needed, mask=leftovers))
 
             final_list = list(final_set)
             
@@ -1,6 +1,11 @@
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
+from collections.abc import Mapping
+import datetime
+import math
+import numpy as np
 from pydantic import BaseModel, Field
+from pydantic_core import core_schema
 
 class Section(str, Enum):
     SWING = "SWING GRADE SETUP"
@@ -66,6 +71,83 @@ class Compliance(BaseModel):
     passed_thresholds: bool
     reasons_failed: List[str] = []
 
+def json_scalar(v):
+    """JSON-safe form of a feature value, or Features.DROP for frames/containers/objects."""
+    if v is None or isinstance(v, (bool, str)):
+        return v
+    if isinstance(v, np.bool_):
+        return bool(v)
+    if isinstance(v, (int, np.integer)):
+        return int(v)
+    if isinstance(v, (float, np.floating)):
+        v = float(v)
+        return v if math.isfinite(v) else None
+    if isinstance(v, (datetime.datetime, datetime.date)):
+        return None if v != v else v.isoformat() # NaT
+    return Features.DROP
+
+class Features(Mapping):
+    """
+    Read-only view over a strategy's feature dict.
+
+    The dict is held by reference: no copy and no per-value validation when a
+    Candidate is built, and in-process consumers (ranker, executor) still see
+    the daily `df` / `intraday_df` frames. Serialization emits only JSON-safe
+    scalars (NaN -> None, timestamps -> ISO strings, frames dropped), computed
+    once on demand. release() swaps the source for that scalar dict so a cached
+    scan result no longer pins the bar frames.
+    """
+    DROP = object()
+    __slots__ = ("_src", "_json")
+
+    def __init__(self, src: Optional[Dict[str, Any]] = None):
+        self._src = src if src is not None else {}
+        self._json: Optional[Dict[str, Any]] = None
+
+    def __getitem__(self, key):
+        return self._src[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._src)
+
+    def __len__(self) -> int:
+        return len(self._src)
+
+    def __repr__(self):
+        return f"Features({len(self._src)} keys)"
+
+    def to_json(self) -> Dict[str, Any]:
+        if self._json is None:
+            out = {}
+            for k, v in self._src.items():
+                v = json_scalar(v)
+                if v is not Features.DROP:
+                    out[k] = v
+            self._json = out
+        return self._json
+
+    def release(self) -> "Features":
+        self._src = self.to_json()
+        return self
+
+    @classmethod
+    def _coerce(cls, v):
+        if isinstance(v, Features): return v
+        if v is None: return cls()
+        if isinstance(v, Mapping): return cls(v if isinstance(v, dict) else dict(v))
+        raise ValueError("features must be a mapping")
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_plain_validator_function(
+            cls._coerce,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda v: v.to_json()),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {"type": "object"}
+
 class Candidate(BaseModel):
     section: Section
     symbol: str
@@ -73,7 +155,7 @@ class Candidate(BaseModel):
     setup_name: str
     direction: Direction
     thesis: str
-    features: Dict[str, Any]
+    features: Features # Lazy: JSON-safe scalars only when dumped
     trade_plan: TradePlan
     options_details: Optional[OptionsDetails] = None
     scores: Scores
@@ -2,8 +2,19 @@ from alpaca.data.historical.news import NewsClient
 from alpaca.data.requests import NewsRequest
 from configs.settings import settings
 from datetime import datetime, timedelta
+from typing import Dict, List
+import re
+import threading
+import time
 
 class NewsEngine:
+    # Articles fetched per symbol in a batched request (old per-symbol limit was 5)
+    ITEMS_PER_SYMBOL = 5
+    # Symbols per NewsRequest (keeps the comma-joined query string short)
+    BATCH_SIZE = 100
+    # Re-queries for symbols crowded out of a full page by busier tickers
+    MAX_ROUNDS = 4
+
     def __init__(self):
         try:
             self.client = NewsClient(
@@ -17,53 +28,111 @@ class NewsEngine:
 
         # Keywords that immediately flag caution
         self.red_flags = [
-            "bankruptcy", "fraud", "sec investigation", "subpoena", 
-            "lawsuit", "delisting", "offering", "dilution", 
+            "bankruptcy", "fraud", "sec investigation", "subpoena",
+            "lawsuit", "delisting", "offering", "dilution",
             "earnings miss", "rating downgrade"
         ]
+        # One pass over the headline instead of one `in` check per keyword
+        self._red_flag_re = re.compile("|".join(re.escape(f) for f in self.red_flags), re.IGNORECASE)
+
+        # symbol -> (expires_at monotonic, sentiment dict)
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def classify(self, headline: str) -> str:
+        return "NEGATIVE" if self._red_flag_re.search(headline) else "NEUTRAL"
 
     def get_market_sentiment(self, symbol: str) -> dict:
         """
-        Fetches latest 5 news items.
+        Latest headline + red-flag check for one symbol.
         Returns: {
-            "sentiment": "NEUTRAL" | "NEGATIVE", 
+            "sentiment": "NEUTRAL" | "NEGATIVE",
             "latest_headline": str,
             "url": str
         }
         """
+        return self.get_sentiments([symbol])[symbol]
+
+    def get_sentiments(self, symbols: List[str]) -> Dict[str, dict]:
+        """
+        Batched get_market_sentiment: one NewsRequest for every symbol not in the
+        TTL cache (settings.NEWS_CACHE_SECONDS). Headlines and their red-flag
+        classification are cached per symbol, so repeat scans cost nothing.
+        """
+        symbols = list(dict.fromkeys(symbols))
         if not self.client:
-            return {"sentiment": "UNKNOWN", "latest_headline": "News API Offline", "url": "#"}
+            return {s: {"sentiment": "UNKNOWN", "latest_headline": "News API Offline", "url": "#"} for s in symbols}
 
-        try:
-            # Fetch last 24h news
-            req = NewsRequest(
-                symbols=symbol,
-                limit=5,
-                start=datetime.now() - timedelta(days=2) # 48h window
-            )
-            news_items = self.client.get_news(req)
-            
-            if not news_items or len(news_items.news) == 0:
-                 return {"sentiment": "NEUTRAL", "latest_headline": "No Recent News", "url": "#"}
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for s in symbols:
+                hit = self._cache.get(s)
+                if hit and hit[0] > now:
+                    out[s] = hit[1]
+        missing = [s for s in symbols if s not in out]
+        if not missing:
+            return out
 
-            latest = news_items.news[0]
-            headline = latest.headline.lower()
-            
-            # Simple Sentiment Check
-            sentiment = "NEUTRAL"
-            for flag in self.red_flags:
-                if flag in headline:
-                    sentiment = "NEGATIVE"
-                    break
-            
-            return {
-                "sentiment": sentiment,
-                "latest_headline": latest.headline,
-                "url": latest.url
-            }
+        fetched = {}
+        for i in range(0, len(missing), self.BATCH_SIZE):
+            fetched.update(self._fetch_batch(missing[i:i + self.BATCH_SIZE]))
 
-        except Exception as e:
-            print(f"News Fetch Error ({symbol}): {e}")
-            return {"sentiment": "UNKNOWN", "latest_headline": "Fetch Error", "url": "#"}
+        expires = time.monotonic() + settings.NEWS_CACHE_SECONDS
+        with self._lock:
+            for s, res in fetched.items():
+                if res["sentiment"] != "UNKNOWN": # Don't cache fetch errors
+                    self._cache[s] = (expires, res)
+        out.update(fetched)
+        return out
+
+    def _fetch_batch(self, symbols: List[str]) -> Dict[str, dict]:
+        """
+        Latest headline per symbol. One request returns the newest articles across
+        all symbols up to `limit`, so a few busy tickers can fill it: when a page
+        comes back full, the symbols it didn't cover are re-queried on their own
+        (each round covers at least one more symbol). "No Recent News" is only
+        reported for symbols absent from a response that wasn't cut off.
+        """
+        out = {}
+        pending = list(symbols)
+        for _ in range(self.MAX_ROUNDS):
+            limit = max(50, self.ITEMS_PER_SYMBOL * len(pending))
+            try:
+                # Newest first across all symbols, 48h window
+                req = NewsRequest(
+                    symbols=",".join(pending),
+                    limit=limit,
+                    start=datetime.now() - timedelta(days=2)
+                )
+                news_set = self.client.get_news(req)
+                articles = news_set.data.get("news", [])
+            except Exception as e:
+                print(f"News Fetch Error ({len(pending)} symbols): {e}")
+                break
+
+            wanted = set(pending)
+            for article in articles:
+                for s in article.symbols:
+                    if s in wanted and s not in out:
+                        out[s] = {
+                            "sentiment": self.classify(article.headline),
+                            "latest_headline": article.headline,
+                            "url": article.url
+                        }
+
+            pending = [s for s in pending if s not in out]
+            if len(articles) < limit:
+                # Complete answer: whoever is still missing has no news in the window
+                for s in pending:
+                    out[s] = {"sentiment": "NEUTRAL", "latest_headline": "No Recent News", "url": "#"}
+                return out
+            if not pending:
+                return out
+
+        # Fetch error or still capped after MAX_ROUNDS: unknown (not cached, retried next scan)
+        for s in pending:
+            out[s] = {"sentiment": "UNKNOWN", "latest_headline": "Fetch Error", "url": "#"}
+        return out
 
 news_engine = NewsEngine()
@@ -0,0 +1,138 @@
+from typing import Dict, List
+from collections import OrderedDict
+import datetime
+import glob
+import json
+import os
+import threading
+from configs.settings import settings
+from strategy_engine.models import Candidate
+
+# Versioned scan snapshots (one JSON file per scan)
+SNAPSHOT_DIR = "uploads/scan_snapshots"
+
+def candidate_key(c: dict) -> str:
+    """
+    Stable identity of a candidate across scans: symbol + setup.
+    Auto-execution appends " [result]" to setup_name, which is not part of the identity.
+    """
+    setup = str(c.get("setup_name", "")).split(" [")[0]
+    return f"{c.get('symbol')}|{setup}"
+
+class ScanStore:
+    """
+    Keeps the last SCAN_STORE_KEEP scan results as versioned snapshots.
+
+    Each published scan gets the next version (monotonic, survives restarts)
+    and is keyed by its scan time on disk. Dashboard reads are a dict lookup:
+    `latest()` returns the newest snapshot, `since(v)` only the candidates
+    added / removed / changed after version v.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_DIR, keep: int = None):
+        self.path = path
+        self.keep = keep or settings.SCAN_STORE_KEEP
+        self._lock = threading.Lock()
+        # version -> {"version", "scanned_at", "sections": {section: {key: candidate_doc}}}
+        self._snapshots: "OrderedDict[int, dict]" = OrderedDict()
+        self.version = 0
+        self._load()
+
+    def publish(self, results: Dict[str, List[Candidate]], scanned_at: datetime.datetime) -> int:
+        """Stores a scan result as a new snapshot. Returns its version."""
+        sections = {}
+        for section, cands in results.items():
+            docs = OrderedDict()
+            for c in cands:
+                doc = c.model_dump(mode="json")
+                docs[candidate_key(doc)] = doc
+            sections[section] = docs
+
+        with self._lock:
+            self.version += 1
+            snap = {"version": self.version, "scanned_at": scanned_at.isoformat(), "sections": sections}
+            self._snapshots[self.version] = snap
+            while len(self._snapshots) > self.keep:
+                self._snapshots.popitem(last=False)
+            self._save(snap)
+
+        print(f"SCAN STORE: Published v{snap['version']} ({sum(len(s) for s in sections.values())} candidates)")
+        return snap["version"]
+
+    def latest(self) -> dict:
+        """Full newest snapshot. Sections map candidate key -> candidate, in rank order."""
+        with self._lock:
+            snap = self._snapshots.get(self.version)
+        if snap is None:
+            return {"version": self.version, "scanned_at": None, "full": True, "sections": {}}
+        return {
+            "version": snap["version"],
+            "scanned_at": snap["scanned_at"],
+            "full": True,
+            "sections": snap["sections"],
+        }
+
+    def since(self, version: int) -> dict:
+        """
+        Delta from `version` to the newest snapshot.
+        Falls back to the full snapshot if `version` is no longer retained (or unknown).
+        """
+        with self._lock:
+            new = self._snapshots.get(self.version)
+            old = self._snapshots.get(version)
+        if new is None or version == self.version:
+            return {"version": self.version, "since": version, "full": False,
+                    "scanned_at": new["scanned_at"] if new else None,
+                    "added": {}, "removed": {}, "changed": {}, "order": {}}
+        if old is None:
+            return self.latest()
+
+        added, removed, changed, order = {}, {}, {}, {}
+        for section in set(new["sections"]) | set(old["sections"]):
+            cur = new["sections"].get(section, {})
+            prev = old["sections"].get(section, {})
+            a = {k: doc for k, doc in cur.items() if k not in prev}
+            r = [k for k in prev if k not in cur]
+            c = {k: doc for k, doc in cur.items() if k in prev and prev[k] != doc}
+            if a: added[section] = a
+            if r: removed[section] = r
+            if c: changed[section] = c
+            # Rank order (keys only) so the client can re-sort without the full payload
+            if a or r or c or list(cur) != list(prev):
+                order[section] = list(cur)
+
+        return {
+            "version": new["version"],
+            "since": version,
+            "scanned_at": new["scanned_at"],
+            "full": False,
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "order": order,
+        }
+
+    def _save(self, snap: dict):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            stamp = snap["scanned_at"].replace(":", "").replace("-", "")
+            fname = os.path.join(self.path, f"{snap['version']:08d}_{stamp}.json")
+            with open(fname, "w") as f:
+                json.dump(snap, f)
+            # Prune files beyond the retained window
+            for old in sorted(glob.glob(os.path.join(self.path, "*.json")))[:-self.keep]:
+                os.remove(old)
+        except Exception as e:
+            print(f"SCAN STORE: Save failed: {e}")
+
+    def _load(self):
+        for fname in sorted(glob.glob(os.path.join(self.path, "*.json")))[-self.keep:]:
+            try:
+                with open(fname) as f:
+                    snap = json.load(f, object_pairs_hook=OrderedDict)
+                self._snapshots[snap["version"]] = snap
+                self.version = max(self.version, snap["version"])
+            except Exception as e:
+                print(f"SCAN STORE: Skipping {fname}: {e}")
+
+scan_store = ScanStore()
@@ -1,13 +1,17 @@
 
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Tuple
 import asyncio
+import datetime
+import functools
 import json
 import os
 import glob
-from strategy_engine.swing_setups import SwingStrategyEngine
+import threading
+import time
+import pandas as pd
 from strategy_engine.options_strategy import OptionsEngine
-from strategy_engine.day_trade_strategy import DayTradeEngine
 from scoring.ranker import ranker
+from scoring.elite_ranker import elite_ranker
 from configs.settings import settings
 from strategy_engine.models import Candidate, Section, TradePlan, Direction, Scores, Compliance
 from utils.market_clock import MarketClock
@@ -21,21 +25,171 @@ from strategy_engine.warrior_strategy import WarriorStrategy
 from strategy_engine.sykes_strategies import FirstGreenDayStrategy, MorningPanicStrategy
 from strategy_engine.one_box_strategy import OneBoxStrategy
 from strategy_engine.ema_strategy import EMA3Strategy
+from strategy_engine.swing_setups import SwingStrategyEngine
+from strategy_engine.day_trade_strategy import DayTradeEngine
+from data_adapters.asset_index import asset_index
+from strategy_engine.snapshot_frame import SnapshotFrame
+from strategy_engine.bar_frame import BarFrame
+from strategy_engine.sharded_scan import sharded_scanner
+from utils.execution import execution
+from utils.tracing import tracer
+from utils.metrics import SCAN_SECONDS, SCAN_STAGE_SECONDS
+from strategy_engine.scan_store import scan_store
+
+# Status cards run_scan adds to the results (never executed or counted as signals)
+STATUS_SYMBOLS = ("SYSTEM", "ERROR", "DATA_FAIL")
+
+# Engines evaluated when a bar of each timeframe closes (bar-close triggers, see scheduler).
+# "swing" is SwingStrategyEngine + the EMA3 trend scan. The 1Min sniper (ONE_BOX)
+# runs in run_sniper_bot.py on its own universe and its own 1Min trigger.
+TIMEFRAME_ENGINES = {
+    "1Min": ("day",),
+    "5Min": ("warrior", "mpdb", "day"),
+    "1Day": ("swing", "options", "fgd"),
+}
+ALL_ENGINES = ("swing", "options", "day", "warrior", "mpdb", "fgd")
+
+async def _no_candidates() -> List[Candidate]:
+    return []
 
 class ScannerService:
+    # Per-stage timeouts (seconds) for the scan DAG
+    STAGE_TIMEOUTS = {
+        "hunt": 60,
+        "fetch": 120,
+        "rank": 30,
+        "snapshots": 60,
+        "swing": 60,
+        "options": 60,
+        "day": 60,
+        "warrior": 180,
+        "sykes": 240,
+        "news": 60,
+    }
+    # Stages that are mostly pandas/numpy go to the cpu pool, the rest are HTTP-bound
+    CPU_STAGES = ("rank", "swing", "day")
+
     def __init__(self):
-        self.swing_engine = SwingStrategyEngine()
         self.ema_engine = EMA3Strategy()
         self.options_engine = OptionsEngine()
-        self.day_engine = DayTradeEngine()
-        self.warrior_engine = WarriorStrategy() # New
+        self.warrior_engine = WarriorStrategy(profile_rvol=True) # New
         self.fgd_engine = FirstGreenDayStrategy()
         self.mpdb_engine = MorningPanicStrategy()
         self.one_box_engine = OneBoxStrategy()
         self.vdubus_engine = VdubusEngine()
         self.breakout_engine = BreakoutEngine()
         self.hunter = MarketHunter()
+
+        # Single-flight state (see get_scan)
+        self._inflight: Optional[asyncio.Future] = None
+        self._last_result: Optional[Dict[str, List[Candidate]]] = None
+        self._last_scanned_at: Optional[datetime.datetime] = None
+        self._last_mono = 0.0
+        # One run_scan at a time (full and bar-close scans); created on the serving loop
+        self._scan_lock: Optional[asyncio.Lock] = None
+
+        # Latest bar each engine evaluated per symbol (bar-close scans skip unchanged symbols)
+        self._seen: Dict[str, Dict[str, tuple]] = {}
+        self._seen_lock = threading.Lock()
     
+    async def get_scan(self, max_age: Optional[float] = None) -> Tuple[Dict[str, List[Candidate]], datetime.datetime]:
+        """
+        Coalesced entry point for run_scan (API, dashboard, scheduler).
+        - Returns the cached result if it is younger than max_age seconds
+          (default settings.SCAN_CACHE_SECONDS; pass 0 to require a fresh scan).
+        - Otherwise attaches to the in-flight scan, or starts one.
+        Returns (results, scanned_at) where scanned_at is the scan start time.
+        """
+        if max_age is None:
+            max_age = settings.SCAN_CACHE_SECONDS
+            
+        if self._last_result is not None and (time.monotonic() - self._last_mono) <= max_age:
+            return self._last_result, self._last_scanned_at
+            
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._run_and_cache())
+        else:
+            print("DEBUG: Scan already running. Attaching to in-flight scan.")
+            
+        # Shield: a disconnecting caller must not cancel the shared scan
+        return await asyncio.shield(self._inflight)
+
+    async def scan_engines(self, engines: Iterable[str], execute: bool = True, gate: bool = True) -> Tuple[Dict[str, List[Candidate]], datetime.datetime]:
+        """
+        Bar-close scan (scheduler): runs only `engines` (see TIMEFRAME_ENGINES) and
+        only on symbols whose latest bar changed since that engine's last bar-close
+        scan. gate=False skips the intraday segment rules (completed daily bar);
+        execute=False never auto-executes.
+        Every engine, gated and executing (the named checkpoints) is a full scan:
+        it goes through get_scan, so it coalesces with /scan and is cached and
+        published for the dashboard. Other partial results are not cached or
+        published. Scans never overlap (see _traced_scan).
+        """
+        engines = tuple(engines)
+        if gate and execute and set(engines) >= set(ALL_ENGINES):
+            return await self.get_scan(max_age=0)
+        results, scanned_at, _ = await self._traced_scan(engines=engines, execute=execute, gate=gate, changed_only=True)
+        return results, scanned_at
+
+    async def _traced_scan(self, **scan) -> Tuple[Dict[str, List[Candidate]], datetime.datetime, bool]:
+        """
+        run_scan(**scan) with its trace and duration metric. Returns (results, scanned_at, failed).
+        Serialized on _scan_lock: a bar-close scan and a full scan never run (and
+        auto-execute) at the same time.
+        """
+        if self._scan_lock is None:
+            self._scan_lock = asyncio.Lock()
+        async with self._scan_lock:
+            started_mono = time.monotonic()
+            scanned_at = datetime.datetime.now()
+            trace = tracer.start("scan")
+            results = await self.run_scan(**scan)
+        trace.candidates = {section: len(cands) for section, cands in results.items()}
+
+        failed = any(c.symbol == "ERROR" for c in results.get(Section.SWING.value, []))
+        tracer.finish(trace, "error" if failed else "ok")
+        SCAN_SECONDS.observe(time.monotonic() - started_mono, status=trace.status)
+        return results, scanned_at, failed
+
+    async def _run_and_cache(self) -> Tuple[Dict[str, List[Candidate]], datetime.datetime]:
+        started_mono = time.monotonic()
+        try:
+            results, scanned_at, failed = await self._traced_scan()
+            # Don't cache the fatal error card
+            if not failed:
+                self._last_result = results
+                self._last_scanned_at = scanned_at
+                self._last_mono = started_mono
+                # Versioned snapshot for the dashboard (/scan/latest)
+                await execution.run_io(scan_store.publish, results, scanned_at)
+            return results, scanned_at
+        finally:
+            self._inflight = None
+
+    def _new_bars(self, engine: str, frame: Optional[BarFrame], symbols: List[str]) -> List[str]:
+        """
+        Symbols whose latest bar in `frame` (time, volume) differs from the one
+        `engine` evaluated in its last bar-close scan; they are recorded as seen.
+        Symbols without bars are dropped (no engine can use them).
+        """
+        if frame is None or frame.empty:
+            return []
+        index, volume = frame.index.asi8, frame.columns['volume']
+        fresh = []
+        with self._seen_lock:
+            seen = self._seen.setdefault(engine, {})
+            for sym in symbols:
+                rng = frame.ranges.get(sym)
+                if rng is None: continue
+                last = rng[1] - 1
+                mark = (int(index[last]), float(volume[last]))
+                if seen.get(sym) != mark:
+                    seen[sym] = mark
+                    fresh.append(sym)
+        if len(fresh) < len(symbols):
+            print(f"DEBUG: [{engine}] {len(fresh)}/{len(symbols)} symbols have a new bar.")
+        return fresh
+
     def get_target_symbols(self) -> List[str]:
         """
         Merges Hunted symbols with any fresh drops from ChatGPT automation.
@@ -86,99 +240,83 @@ class ScannerService:
         
         return list(symbols)
 
-    async def _run_sykes_scan(self) -> List[Candidate]:
+    def _fetch_small_cap_snapshots(self) -> SnapshotFrame:
+        """
+        One snapshot pass over the small-cap universe, shared by the Warrior and
+        Sykes branches (prebuilt daily: tradable NASDAQ/NYSE/AMEX, $0.50-$30 last close;
+        the Warrior $1-$20 list is a subset).
+        """
+        from alpaca_trade_api.rest import REST
+        api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
+        
+        symbols = list(dict.fromkeys(asset_index.candidates("sykes") + asset_index.candidates("warrior")))
+        snaps = SnapshotFrame.fetch(api, symbols)
+        print(f"DEBUG: Small-cap snapshots: {len(snaps)} of {len(symbols)} symbols.")
+        return snaps
+
+    def _run_sykes_scan(self, snaps: Optional[SnapshotFrame] = None, fgd: bool = True, mpdb: bool = True,
+                        changed_only: bool = False) -> List[Candidate]:
         """
         Scans for Tim Sykes Setups (FGD/MPDB) on Small Caps.
-        1. Fetch Snapshots of potential small caps.
-        2. Filter for Gainers (FGD) and Panic Losers (MPDB).
+        1. Snapshots of potential small caps (shared frame, or fetched here).
+        2. Filter for Gainers (FGD) and Panic Losers (MPDB) - vectorized masks.
         3. Fetch History and Run Strategies.
+        fgd/mpdb select the setups; changed_only skips symbols without a new bar.
         """
         try:
              print("🔎 SYKES SCAN: Hunting Penny Moves...")
              
-             # Reuse Connection
-             from alpaca_trade_api.rest import REST
-             api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
-             
-             # 1. Get Universe (NASDAQ/AMEX Small Caps ideally)
-             # We just get all tradable for now to be safe, filtering later
-             assets = api.list_assets(status='active', asset_class='us_equity')
-             # Filter logic: Focus on Exchanges known for pennies or just all
-             symbols = [a.symbol for a in assets if a.exchange in ['NASDAQ', 'NYSE', 'AMEX'] and a.tradable]
-             
-             # 2. Snapshot & Filter
-             chunk_size = 1000
-             candidates_FGD = []
-             candidates_MPDB = []
-             
-             # Limiter: Scan first 2000 or full? 
-             # Full scan takes time. Let's do 3000 to catch more.
-             scan_limit = 3000 
+             if snaps is None:
+                 snaps = self._fetch_small_cap_snapshots()
              
-             for i in range(0, min(len(symbols), scan_limit), chunk_size):
-                  chunk = symbols[i:i+chunk_size]
-                  try:
-                      snaps = api.get_snapshots(chunk)
-                      for sym, snap in snaps.items():
-                          if not snap.daily_bar: continue
-                          p = snap.daily_bar.c
-                          
-                          # SYKES FILTER: Price < $25
-                          if p > 25.0: continue
-                          if p < 0.50: continue # Garbage
-                          
-                          prev = snap.prev_daily_bar.c
-                          if not prev: continue
-                          change = (p - prev) / prev
-                          
-                          # FGD POTENTIAL: Green > 3%
-                          if change >= 0.03:
-                               candidates_FGD.append(sym)
-                               
-                          # MPDB POTENTIAL: Red < -10% (Panic check)
-                          if change <= -0.10:
-                               candidates_MPDB.append(sym)
-                               
-                  except: pass
+             # 2. Filter (SYKES: $0.50-$25)
+             # FGD POTENTIAL: Green > 3% | MPDB POTENTIAL: Red < -10% (Panic check)
+             candidates_FGD = snaps.select(snaps.mask(min_price=0.50, max_price=25.0, min_change=0.03)) if fgd else []
+             candidates_MPDB = snaps.select(snaps.mask(min_price=0.50, max_price=25.0, max_change=-0.10)) if mpdb else []
              
              print(f"SYKES: Found {len(candidates_FGD)} FGD Candidates, {len(candidates_MPDB)} Panic Candidates.")
              
              results = []
              
-             # 3. Analyze FGD (Needs Daily History)
-             if candidates_FGD:
-                 # Batch Fetch Daily
-                 # We reuse data_loader logic or direct fetch
-                 # Direct fetch for speed here
-                 for sym in candidates_FGD[:20]: # Limit processing
-                      try:
-                          bars = api.get_bars(sym, "1Day", limit=60).df
-                          if bars.empty: continue
-                          
-                          # Feature Dict
-                          f_dict = {"df": bars, "current_date": bars.index[-1]}
-                          cand = self.fgd_engine.analyze(sym, f_dict)
-                          if cand: results.append(cand)
-                      except: pass
-
-             # 4. Analyze MPDB (Needs Intraday)
-             if candidates_MPDB:
-                  for sym in candidates_MPDB[:20]:
-                       try:
-                           bars = api.get_bars(sym, "5Min", limit=100).df
-                           if bars.empty: continue
-                           
-                           # Also need Daily for "Runner" check
-                           daily_bars = api.get_bars(sym, "1Day", limit=20).df
-                           
-                           f_dict = {
-                               "intraday_df": bars, 
-                               "df": daily_bars,
-                               "current_date": bars.index[-1]
-                           }
-                           cand = self.mpdb_engine.analyze(sym, f_dict)
-                           if cand: results.append(cand)
-                       except: pass
+             # 3. Batch-fetch history for every candidate (chunked multi-symbol requests, concurrent)
+             # FGD needs daily history, MPDB needs 5Min bars + daily for the "Runner" check.
+             # feed=None keeps the account's default feed (as the per-symbol calls did).
+             daily_syms = list(dict.fromkeys(candidates_FGD + candidates_MPDB))
+             daily_frame = data_loader.fetch_frame_chunked(daily_syms, "1Day", days=100, tail=60, feed=None)
+             intraday_frame = data_loader.fetch_frame_chunked(candidates_MPDB, "5Min", days=5, tail=100, feed=None)
+             if changed_only:
+                 candidates_FGD = self._new_bars("fgd", daily_frame, candidates_FGD)
+                 candidates_MPDB = self._new_bars("mpdb", intraday_frame, candidates_MPDB)
+             daily = dict(daily_frame.items())
+             intraday = dict(intraday_frame.items())
+             
+             # 4. Analyze FGD
+             for sym in candidates_FGD:
+                  try:
+                      bars = daily.get(sym)
+                      if bars is None or bars.empty: continue
+                      
+                      # Feature Dict
+                      f_dict = {"df": bars, "current_date": bars.index[-1]}
+                      cand = self.fgd_engine.analyze(sym, f_dict)
+                      if cand: results.append(cand)
+                  except: pass
+
+             # 5. Analyze MPDB
+             for sym in candidates_MPDB:
+                   try:
+                       bars = intraday.get(sym)
+                       if bars is None or bars.empty: continue
+                       
+                       daily_bars = daily.get(sym)
+                       f_dict = {
+                           "intraday_df": bars, 
+                           "df": daily_bars.iloc[-20:] if daily_bars is not None else pd.DataFrame(),
+                           "current_date": bars.index[-1]
+                       }
+                       cand = self.mpdb_engine.analyze(sym, f_dict)
+                       if cand: results.append(cand)
+                   except: pass
 
              return results
 
@@ -186,68 +324,28 @@ class ScannerService:
             print(f"Sykes Scan Error: {e}")
             return []
 
-    async def _run_warrior_scan(self) -> List[Candidate]:
+    def _run_warrior_scan(self, snaps: Optional[SnapshotFrame] = None, changed_only: bool = False) -> List[Candidate]:
         """
         Specialized Scan for Ross Cameron Momentum Gappers.
+        changed_only skips gappers without a new 5Min bar.
         """
         try:
-             # 1. Get List (Re-using Hunter logic simplified)
-             # Ideally we call a centralized "Gapper Service" but for now inline is fast.
-             # We need to import API here or reuse data_loader's connection if exposed
-             from alpaca_trade_api.rest import REST
-             api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
+             # 1. Snapshots (shared small-cap frame, or fetched here)
+             if snaps is None:
+                 snaps = self._fetch_small_cap_snapshots()
              
-             assets = api.list_assets(status='active', asset_class='us_equity')
-             # Filter: Exchange and Tradable
-             symbols = [a.symbol for a in assets if a.exchange in ['NASDAQ', 'NYSE', 'AMEX'] and a.tradable]
-             
-             # Chunked Snapshot Fetch
-             chunk_size = 1000
-             candidates_5min = []
-             
-             # Optimization: Only scan top 1000 symbols or so to speed up? 
-             # Or just do first 2 chunks.
-             for i in range(0, min(len(symbols), 2000), chunk_size):
-                  chunk = symbols[i:i+chunk_size]
-                  try:
-                      snaps = api.get_snapshots(chunk)
-                      for sym, snap in snaps.items():
-                          if not snap.daily_bar: continue
-                          p = snap.daily_bar.c
-                          if not (2.0 <= p <= 20.0): continue
-                          
-                          prev = snap.prev_daily_bar.c
-                          if not prev: continue
-                          change = (p - prev) / prev
-                          
-                          if change >= 0.10: # 10% Gap
-                             candidates_5min.append(sym)
-                  except: pass
+             # 2. Gappers: +10% in $2-$20 (vectorized mask)
+             candidates_5min = snaps.select(snaps.mask(min_price=2.0, max_price=20.0, min_change=0.10))
                   
              if not candidates_5min: return []
              
-             # Fetch 5Min Data for candidates
-             res_candidates = []
-             for sym in candidates_5min:
-                 # Fetch 5 min bars
-                 try: 
-                     bars = api.get_bars(sym, "5Min", limit=100).df
-                     if bars.empty: continue
-                     
-                     # Construct Feature Dict
-                     row = bars.iloc[-1]
-                     f_dict = {
-                         "row": row,
-                         "intraday_df": bars,
-                         "current_date": row.name, # Timestamp
-                         "vol_avg": bars['volume'].rolling(20).mean().iloc[-1]
-                     }
-                     
-                     cand = self.warrior_engine.analyze(sym, f_dict)
-                     if cand: res_candidates.append(cand)
-                 except: pass
-                 
-             return res_candidates
+             # Fetch 5Min Data for all gappers (chunked multi-symbol requests, concurrent)
+             intraday = data_loader.fetch_frame_chunked(candidates_5min, "5Min", days=5, tail=100, feed=None)
+             if changed_only:
+                 candidates_5min = self._new_bars("warrior", intraday, candidates_5min)
+             
+             # Bull flag check per gapper (sharded across processes for large universes)
+             return sharded_scanner.scan("WARRIOR_LIVE", intraday, candidates_5min)
 
         except Exception as e:
             print(f"Warrior Scan Error: {e}")
@@ -264,41 +362,15 @@ class ScannerService:
              from strategy_engine.data_loader import data_loader
              from datetime import datetime
              
-             # Map symbols to Data
-             # fetch_intraday_snapshot defaults to 5Min, need 1Min
-             # Since that method is hardcoded, let's just use API direct for speed/flexibility
-             # or update data_loader. Let's use direct API here to ensure 1Min.
-             from alpaca_trade_api.rest import REST
-             api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
-             
              if not symbols: return []
              
-             # Fetch 1Min Bars
-             # Getting last 20 mins is enough
-             try:
-                 bars = api.get_bars(symbols, "1Min", limit=50).df
-             except: return []
-             
-             results = []
-             if bars.empty: return []
-             
-             # Process
-             unique_syms = bars.index.get_level_values(0).unique() if isinstance(bars.index, pd.MultiIndex) else bars['symbol'].unique()
+             # Fetch 1Min Bars: last 50 per symbol (chunked multi-symbol requests, concurrent).
+             # A single request's limit=50 would be shared by the whole universe.
+             frame = data_loader.fetch_frame_chunked(symbols, "1Min", days=3, tail=50, feed=None)
+             if frame.empty: return []
 
-             for sym in unique_syms:
-                  try:
-                      if isinstance(bars.index, pd.MultiIndex):
-                          df = bars.xs(sym).copy()
-                      else:
-                          df = bars[bars['symbol'] == sym].copy()
-                      
-                      # Analyze One Box
-                      f_dict = {"intraday_df": df}
-                      cand = self.one_box_engine.analyze(sym, f_dict)
-                      
-                      if cand:
-                          results.append(cand)
-                  except: pass
+             # Analyze One Box (sharded across processes for large universes)
+             results = sharded_scanner.scan("ONE_BOX", frame)
                   
              # Sort by Profit Potential (User Request: "Most Profitable First")
              # Proxy: Candidates with higher score or just first come?
@@ -310,12 +382,181 @@ class ScannerService:
             print(f"Sniper Scan Error: {e}")
             return []
 
-    async def run_scan(self) -> Dict[str, List[Candidate]]:
+    async def _stage(self, name: str, fn, *args, default=None):
+        """
+        Runs one blocking scan stage on the shared io/cpu pool with its own timeout.
+        On timeout/error the stage yields `default` and the scan continues.
+        (A timed-out worker thread finishes in the background; its result is dropped.)
+        """
+        run = execution.run_cpu if name in self.CPU_STAGES else execution.run_io
+        timeout = self.STAGE_TIMEOUTS.get(name, 120)
+        span = tracer.span(name)
+        status = "ok"
+        t0 = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(run(tracer.bind(span, fn), *args), timeout=timeout)
+            print(f"DEBUG: Stage [{name}] done in {time.perf_counter() - t0:.2f}s")
+            if span is not None and isinstance(result, list):
+                span.candidates = len(result)
+            return result
+        except asyncio.TimeoutError:
+            print(f"⚠️ SCAN STAGE TIMEOUT: [{name}] exceeded {timeout}s. Continuing without it.")
+            status = "timeout"
+        except Exception as e:
+            print(f"Scan Stage Error [{name}]: {e}")
+            status = "error"
+        finally:
+            elapsed = time.perf_counter() - t0
+            SCAN_STAGE_SECONDS.observe(elapsed, stage=name, status=status)
+            if span is not None:
+                span.wall_ms += elapsed * 1000.0
+                span.status = status
+        return default
+
+    async def _after(self, dep: "asyncio.Future", name: str, fn) -> List[Candidate]:
+        """Runs stage `name` on the result of an upstream stage (no candidates if it failed)."""
+        upstream = await dep
+        if upstream is None:
+            return []
+        return await self._stage(name, fn, upstream, default=[])
+
+    def _run_snapshot_engine(self, engine_name: str, market_data: Dict[str, dict], symbols: Optional[List[str]] = None) -> List[Candidate]:
+        """
+        A core engine (SWING_SCAN / DAY_SCAN) over the snapshot's symbols (default
+        all, in snapshot order), sharded across processes for large universes. Workers
+        rebuild the fetch_snapshot feature dict from the shared daily + intraday bars.
+        """
+        if not market_data:
+            return []
+        if symbols is None:
+            symbols = list(market_data)
+        return sharded_scanner.scan(engine_name, market_data.daily, symbols, secondary=market_data.intraday)
+
+    def _run_day_engine(self, market_data: Dict[str, dict], changed_only: bool = False) -> List[Candidate]:
+        symbols = list(market_data)
+        if changed_only and market_data:
+            symbols = self._new_bars("day", market_data.intraday, symbols)
+        # Factor pre-screen: symbols without enough intraday bars never reach the engine
+        factors = market_data.factors if market_data else None
+        if factors is not None:
+            symbols = DayTradeEngine.screen(factors.take(symbols))
+        return self._run_snapshot_engine("DAY_SCAN", market_data, symbols)
+
+    def _run_swing_engines(self, top_swing_syms: List[str], market_data: Dict[str, dict], changed_only: bool = False) -> List[Candidate]:
+        symbols = list(market_data)
+        if changed_only and market_data:
+            symbols = self._new_bars("swing", market_data.daily, symbols)
+            fresh = set(symbols)
+            top_swing_syms = [s for s in top_swing_syms if s in fresh]
+        # Factor pre-screen: only symbols a swing setup can fire on go to the engine
+        factors = market_data.factors if market_data else None
+        if factors is not None:
+            symbols = SwingStrategyEngine.screen(factors.take(symbols))
+
+        # 1. Standard Reversal Scan (Vdub)
+        raw_swing = self._run_snapshot_engine("SWING_SCAN", market_data, symbols)
+        
+        # 2. EMA Trend Scan (The "Trend Bot" Logic)
+        print("DEBUG: Running EMA3 Trend Scan...")
+        for sym in top_swing_syms:
+            if sym not in market_data: continue
+            # Use full feature dict from market_data
+            f_dict = market_data[sym]
+            
+            try:
+                trend_cand = self.ema_engine.analyze(sym, f_dict)
+                if trend_cand:
+                     raw_swing.append(trend_cand)
+            except Exception as e:
+                print(f"EMA3 Error {sym}: {e}")
+        return raw_swing
+
+    async def _run_core_pipeline(self, allow_swing: bool, allow_options: bool, allow_day: bool, reasons: Dict[Section, str],
+                                 changed_only: bool = False) -> dict:
+        """
+        Core branch: hunt -> fetch -> elite rank -> (swing | options | day) engines.
+        The three engine stages are independent and run concurrently.
+        """
+        if not (allow_swing or allow_options or allow_day):
+            print(f"Skipping Core Scan: {reasons[Section.SWING]} / {reasons[Section.DAY_TRADE]}")
+            return {"ran": False, "target_symbols": [], "market_data": {}, "scan_ts": "N/A", "swing": [], "options": [], "day": []}
+
+        # Refresh symbol list from automation drops
+        target_symbols = await self._stage("hunt", self.get_target_symbols, default=[])
+        print(f"DEBUG: Scanning {len(target_symbols)} symbols (Base + Automation)")
+
+        # GET REAL DATA
+        market_data = {}
+        scan_ts = "N/A"
+        if allow_swing or allow_options or allow_day:
+            # Fetch FULL data for all initial targets to allow Ranking
+            market_data = await self._stage("fetch", data_loader.fetch_snapshot, target_symbols, default={})
+            
+            scan_ts = datetime.datetime.now().strftime("%H:%M:%S")
+            print(f"DEBUG: Data Fetched at {scan_ts}. Active Tickers: {len(market_data)}")
+
+        # --- ELITE RANKING (Layer 2) ---
+        # Filter 50 -> Top 3 Day / Top 3 Swing
+        top_day_syms, top_swing_syms = await self._stage(
+            "rank", elite_ranker.rank_candidates, market_data, default=([], [])
+        )
+        
+        print(f"DEBUG: Elite Day: {top_day_syms}")
+        print(f"DEBUG: Elite Swing: {top_swing_syms}")
+
+        # EXECUTE ENGINES ON ELITE LISTS (concurrently)
+        # SWING (Vdub Reversal + EMA3 Trend)
+        if allow_swing:
+            swing_job = self._stage("swing", self._run_swing_engines, top_swing_syms, market_data, changed_only, default=[])
+        else:
+            print(f"Skipping Swing Scan: {reasons[Section.SWING]}")
+            swing_job = _no_candidates()
+
+        # OPTIONS (Follows Swing Leaders)
+        if allow_options:
+            option_syms = top_swing_syms
+            if changed_only and market_data:
+                option_syms = self._new_bars("options", market_data.daily, top_swing_syms)
+            options_job = self._stage("options", self.options_engine.scan, option_syms, market_data, default=[])
+        else:
+            print(f"Skipping Options Scan: {reasons[Section.OPTIONS]}")
+            options_job = _no_candidates()
+
+        # DAY TRADE
+        if allow_day:
+            day_job = self._stage("day", self._run_day_engine, market_data, changed_only, default=[])
+        else:
+            print(f"Skipping Day Trade Scan: {reasons[Section.DAY_TRADE]}")
+            day_job = _no_candidates()
+
+        raw_swing, raw_options, raw_day = await asyncio.gather(swing_job, options_job, day_job)
+
+        return {
+            "ran": True,
+            "target_symbols": target_symbols,
+            "market_data": market_data,
+            "scan_ts": scan_ts,
+            "swing": raw_swing,
+            "options": raw_options,
+            "day": raw_day,
+        }
+
+    async def run_scan(self, engines: Optional[Iterable[str]] = None, execute: bool = True, gate: bool = True,
+                       changed_only: bool = False) -> Dict[str, List[Candidate]]:
+        """
+        Staged scan DAG:
+            core (hunt -> fetch -> rank -> engines) ────┐
+            snapshots ─┬─> warrior (gappers -> 5Min bars) ┼─> assemble -> news -> AI -> execute
+                       └─> sykes (FGD/MPDB -> bars) ──────┘
+        Independent branches run concurrently in the scan thread pool, so latency
+        tracks the slowest branch instead of the sum.
+        engines: subset of ALL_ENGINES to run (default all); branches with nothing to run are skipped.
+        gate=False ignores the market-segment rules (completed daily bar after the close).
+        execute=False never auto-executes (signal only).
+        changed_only: engines only see symbols with a new bar since their last such scan.
+        """
         try:
             print("DEBUG: run_scan() triggered via Scheduler or API. Starting...")
-            # Refresh symbol list from automation drops
-            target_symbols = self.get_target_symbols()
-            print(f"DEBUG: Scanning {len(target_symbols)} symbols (Base + Automation)")
 
             # 1. Analyze Market Context (SPY/QQQ)
             print("DEBUG: Analyzing Market Context (SPY/QQQ Post-ATH)...")
@@ -325,87 +566,58 @@ class ScannerService:
             segment = MarketClock.get_market_segment()
             print(f"DEBUG: Current Market Segment: {segment}")
             
-            allow_swing, reason_swing = TradingRules.can_trade_section(Section.SWING, segment)
-            allow_options, reason_options = TradingRules.can_trade_section(Section.OPTIONS, segment)
-            allow_day, reason_day = TradingRules.can_trade_section(Section.DAY_TRADE, segment)
-            
-            raw_swing = []
-            raw_options = []
-            raw_day = []
-
-            # 3. GET REAL DATA
-            market_data = {}
-            scan_ts = "N/A"
-            if allow_swing or allow_options or allow_day:
-                # Fetch FULL data for all initial targets to allow Ranking
-                market_data = data_loader.fetch_snapshot(target_symbols)
-                
-                import datetime
-                scan_ts = datetime.datetime.now().strftime("%H:%M:%S")
-                print(f"DEBUG: Data Fetched at {scan_ts}. Active Tickers: {len(market_data)}")
-
-            # --- ELITE RANKING (Layer 2) ---
-            # Filter 50 -> Top 3 Day / Top 3 Swing
-            from scoring.elite_ranker import elite_ranker
-            top_day_syms, top_swing_syms = elite_ranker.rank_candidates(market_data)
-            
-            print(f"DEBUG: Elite Day: {top_day_syms}")
-            print(f"DEBUG: Elite Swing: {top_swing_syms}")
-
-            # 4. EXECUTE ENGINES ON ELITE LISTS
-            
-            # SWING (Vdub Reversal + EMA3 Trend)
-            if allow_swing: 
-                # 1. Standard Reversal Scan (Vdub)
-                raw_swing = self.swing_engine.scan(top_swing_syms, market_data)
-                
-                # 2. EMA Trend Scan (The "Trend Bot" Logic)
-                print("DEBUG: Running EMA3 Trend Scan...")
-                for sym in top_swing_syms:
-                    if sym not in market_data: continue
-                    # Use full feature dict from market_data
-                    f_dict = market_data[sym]
-                    
-                    try:
-                        trend_cand = self.ema_engine.analyze(sym, f_dict)
-                        if trend_cand:
-                             raw_swing.append(trend_cand)
-                    except Exception as e:
-                        print(f"EMA3 Error {sym}: {e}")
+            if gate:
+                allow_swing, reason_swing = TradingRules.can_trade_section(Section.SWING, segment)
+                allow_options, reason_options = TradingRules.can_trade_section(Section.OPTIONS, segment)
+                allow_day, reason_day = TradingRules.can_trade_section(Section.DAY_TRADE, segment)
             else:
-                print(f"Skipping Swing Scan: {reason_swing}")
+                allow_swing = allow_options = allow_day = True
+                reason_swing = reason_options = reason_day = "Completed bar (no session gate)."
+            reasons = {Section.SWING: reason_swing, Section.OPTIONS: reason_options, Section.DAY_TRADE: reason_day}
 
-            # OPTIONS (Follows Swing Leaders)
-            if allow_options: 
-                raw_options = self.options_engine.scan(top_swing_syms, market_data)
-            else:
-                print(f"Skipping Options Scan: {reason_options}")
-                
-            # DAY TRADE
-            if allow_day:
-                raw_day = self.day_engine.scan(top_day_syms, market_data)
-            else:
-                print(f"Skipping Day Trade Scan: {reason_day}")
-            
-            # WARRIOR SCAN (Parallel or Sequential)
-            warrior_raw = []
-            if allow_day: # Warrior is a day strategy
-                 print("DEBUG: Running Warrior Scan...")
-            # WARRIOR SCAN (Parallel or Sequential)
-            warrior_raw = []
-            if allow_day: # Warrior is a day strategy
+            # Engines not requested on this run (bar-close scans run a timeframe's engines only)
+            engines = set(engines if engines is not None else ALL_ENGINES)
+            for section, name in ((Section.SWING, "swing"), (Section.OPTIONS, "options"), (Section.DAY_TRADE, "day")):
+                if name not in engines:
+                    reasons[section] = "Not due on this bar."
+            run_swing = allow_swing and "swing" in engines
+            run_options = allow_options and "options" in engines
+            run_day = allow_day and "day" in engines
+
+            # 3. BRANCHES (Core | Warrior | Sykes) in parallel
+            core_job = self._run_core_pipeline(run_swing, run_options, run_day, reasons, changed_only)
+
+            # Small-cap snapshots: fetched once, filtered by both Warrior and Sykes
+            run_warrior = allow_day and "warrior" in engines # Warrior is a day strategy
+            run_fgd = allow_swing and "fgd" in engines # FGD is Swing
+            run_mpdb = allow_day and "mpdb" in engines # MPDB is Day
+            run_sykes = run_fgd or run_mpdb
+            if run_warrior or run_sykes:
+                 snaps_job = asyncio.ensure_future(self._stage("snapshots", self._fetch_small_cap_snapshots))
+
+            # WARRIOR SCAN
+            if run_warrior:
                  print("DEBUG: Running Warrior Scan...")
-                 warrior_raw = await self._run_warrior_scan()
+                 warrior_job = self._after(snaps_job, "warrior", functools.partial(self._run_warrior_scan, changed_only=changed_only))
+            else:
+                 warrior_job = _no_candidates()
             
             # SYKES SCAN
-            sykes_raw = []
-            if allow_day or allow_swing: # FGD is Swing, MPDB is Day
-                 sykes_raw = await self._run_sykes_scan()
+            if run_sykes:
+                 sykes_job = self._after(snaps_job, "sykes", functools.partial(self._run_sykes_scan, fgd=run_fgd, mpdb=run_mpdb, changed_only=changed_only))
+            else:
+                 sykes_job = _no_candidates()
+
+            core, warrior_raw, sykes_raw = await asyncio.gather(core_job, warrior_job, sykes_job)
+            
+            target_symbols = core["target_symbols"]
+            market_data = core["market_data"]
+            scan_ts = core["scan_ts"]
 
             # --- FINAL ASSEMBLY ---
-            swing_final = raw_swing 
-            options_final = raw_options
-            day_final = raw_day + warrior_raw # Merge Day & Warrior
+            swing_final = core["swing"]
+            options_final = core["options"]
+            day_final = core["day"] + warrior_raw # Merge Day & Warrior
             
             # Route Sykes Results
             for c in sykes_raw:
@@ -420,31 +632,31 @@ class ScannerService:
             # Apply Core Logic / AI Check / News Check on Swing
             from strategy_engine.news_engine import news_engine
             
-            # Helper to enrich with news
+            # Helper to enrich with news (one batched, cached lookup for all candidates)
             def enrich_with_news(c_list):
+                c_list = [c for c in c_list if c.symbol not in STATUS_SYMBOLS]
+                sentiments = news_engine.get_sentiments([c.symbol for c in c_list])
                 for c in c_list:
-                    if c.symbol in ["SYSTEM", "ERROR", "DATA_FAIL"]: continue
-                    
-                    news = news_engine.get_market_sentiment(c.symbol)
+                    news = sentiments[c.symbol]
                     c.thesis += f" | NOTE: {news['latest_headline']}"
                     
                     # if news['sentiment'] == 'NEGATIVE':
                     #     c.setup_name = "⚠️ NEWS RISK " + c.setup_name
                          
-            enrich_with_news(swing_final)
-            enrich_with_news(day_final)
+            await self._stage("news", enrich_with_news, swing_final + day_final)
 
             # AI Sanity Check (Swing Only)
-            for cand in swing_final:
-                 cand.scores.overall_rank_score = 99.0 # Elite
-                 try:
-                     cand.ai_analysis = await llm_analyzer.analyze_candidate(cand)
-                 except: pass 
+            with tracer.timed("ai"):
+                for cand in swing_final:
+                     cand.scores.overall_rank_score = 99.0 # Elite
+                     try:
+                         cand.ai_analysis = await llm_analyzer.analyze_candidate(cand)
+                     except: pass 
             
             # [SYSTEM STATUS CARD]
             try:
-                # 1. CHECK FOR DATA FAILURE
-                if len(market_data) == 0:
+                # 1. CHECK FOR DATA FAILURE (core branch only; bar-close scans may not run it)
+                if core["ran"] and len(market_data) == 0:
                      failure_card = Candidate(
                         section=Section.SWING,
                         symbol="DATA_FAIL",
@@ -486,47 +698,25 @@ class ScannerService:
                 print(f"Error creating Info Card: {e}")
 
             # --- AUTO EXECUTION ---
-            if settings.AUTO_EXECUTION_ENABLED:
+            if not execute:
+                 print("ℹ️ Signal-only scan (execute=False).")
+            elif settings.AUTO_EXECUTION_ENABLED:
                 from executor_service.order_executor import executor
                 print("⚡ AUTO-EXECUTION: Processing Elite Signals...")
                 
-                # Execute Day Trades
-                for cand in day_final:
-                    if cand.symbol not in ["SYSTEM", "ERROR", "DATA_FAIL"]:
-                        res = executor.execute_trade(cand)
+                with tracer.timed("execution") as span:
+                    # Day Trades first, then Swing Trades: one batch, one account snapshot
+                    batch = [c for c in day_final + swing_final if c.symbol not in STATUS_SYMBOLS]
+                    res_list = await execution.run_io(tracer.bind(span, executor.execute_batch), batch)
+                    for cand, res in zip(batch, res_list):
                         cand.setup_name += f" [{res}]"
-                
-                # Execute Swing Trades
-                for cand in swing_final:
-                    if cand.symbol not in ["SYSTEM", "ERROR", "DATA_FAIL"]:
-                         res = executor.execute_trade(cand)
-                         cand.setup_name += f" [{res}]"
             else:
                  print("ℹ️ Auto-Execution Disabled (Signal only).")
 
-            # --- SANITIZATION (Fix Serialization Errors) ---
-            import numpy as np
-            import pandas as pd
-            
-            def sanitize_value(v):
-                # DataFrames/Series trigger bool ambiguity checks if passed to pd.isna() or bool() directly logic
-                if isinstance(v, (pd.DataFrame, pd.Series, list, dict)): 
-                    return None # Do not export complex structures in features
-                if pd.isna(v): return None
-                if isinstance(v, (np.int64, np.int32)): return int(v)
-                if isinstance(v, (np.float64, np.float32)): return float(v)
-                return v
-
+            # Drop bar-frame references from the results we keep (features serialize lazily)
             for cand_list in [swing_final, options_final, day_final]:
                 for c in cand_list:
-                    # Sanitize Features
-                    if c.features:
-                        # We must create a new dict to avoid mutation issues or just overwrite
-                        clean_features = {}
-                        for k, v in c.features.items():
-                             clean_features[k] = sanitize_value(v)
-                        c.features = clean_features
-                    pass
+                    c.features.release()
 
             results = {
                 Section.SWING.value: swing_final,
@@ -0,0 +1,203 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+import time
+import numpy as np
+import pandas as pd
+from configs.settings import settings
+from strategy_engine.bar_frame import BarFrame
+from strategy_engine.models import Candidate
+from utils.execution import execution
+from utils.tracing import tracer
+
+# Shards per worker process (smaller shards even out slow symbols)
+SHARDS_PER_WORKER = 2
+
+# --- Feature dicts per engine (same shape the serial scanner loops build) ---
+# Builders get the symbol's bars from the primary frame and, when the scan has
+# one, from the secondary frame (None otherwise).
+
+def _intraday_features(bars: pd.DataFrame, _secondary=None) -> dict:
+    return {"intraday_df": bars}
+
+def _warrior_features(bars: pd.DataFrame, _secondary=None) -> dict:
+    row = bars.iloc[-1]
+    return {
+        "row": row,
+        "intraday_df": bars,
+        "current_date": row.name, # Timestamp
+        "vol_avg": bars['volume'].rolling(20).mean().iloc[-1]
+    }
+
+_SNAPSHOT_INDICATORS: Optional[tuple] = None
+
+def _snapshot_features(daily: pd.DataFrame, intraday: Optional[pd.DataFrame] = None) -> dict:
+    """DataLoader.fetch_snapshot's dict (daily frame primary, intraday secondary)."""
+    global _SNAPSHOT_INDICATORS
+    from strategy_engine.data_loader import snapshot_features
+    if _SNAPSHOT_INDICATORS is None:
+        from strategy_engine.strategy_registry import SCANNER_STRATEGIES, merge_requirements
+        _SNAPSHOT_INDICATORS = merge_requirements(SCANNER_STRATEGIES)["1Day"].indicators
+    return snapshot_features(daily, intraday, _SNAPSHOT_INDICATORS)
+
+# Registered strategy name -> feature builder ((bars, secondary bars) -> feature dict)
+FEATURES: Dict[str, Callable[..., dict]] = {
+    "ONE_BOX": _intraday_features,
+    "WARRIOR": _warrior_features,
+    "WARRIOR_LIVE": _warrior_features,
+    # Core pipeline engines: scanned over the fetch_snapshot frames (daily + intraday)
+    "SWING_SCAN": _snapshot_features,
+    "DAY_SCAN": _snapshot_features,
+}
+
+# --- Worker side (module-level so the spawn pool can import it) ---
+
+_ENGINES: Dict[str, object] = {}
+
+def _engine(name: str):
+    # One engine per process, built from the registry on first use
+    if name not in _ENGINES:
+        from strategy_engine.strategy_registry import get_strategy
+        _ENGINES[name] = get_strategy(name).factory()
+    return _ENGINES[name]
+
+def analyze_frame(engine_name: str, frame: BarFrame, symbols: List[str], secondary: Optional[BarFrame] = None) -> List[Candidate]:
+    """
+    Runs one engine over `symbols` in order. A failing symbol is skipped, as in
+    the serial loops. Candidate features are released to JSON scalars, so
+    results cross the process boundary without any bar data.
+    """
+    engine = _engine(engine_name)
+    build = FEATURES[engine_name]
+    analyze = getattr(engine, "analyze", None)
+    out = []
+    for sym in symbols:
+        bars = frame.get(sym)
+        if bars is None or bars.empty: continue
+        try:
+            features = build(bars, secondary.get(sym) if secondary is not None else None)
+            found = [analyze(sym, features)] if analyze else engine.scan([sym], {sym: features})
+        except Exception:
+            continue
+        for cand in found:
+            if cand:
+                cand.features.release()
+                out.append(cand)
+    return out
+
+def _attach(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name, track=False) # 3.13+
+    except TypeError:
+        # Older Pythons register attached blocks with the resource tracker too,
+        # which would unlink/warn about a block the parent owns
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+def _close(shm: SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        pass # A view is still referenced; the mapping goes with it
+
+def _run_shard(engine_name: str, desc: dict, symbols: List[str], secondary_desc: Optional[dict] = None) -> Tuple[List[Candidate], float]:
+    c0 = time.process_time()
+    blocks = [_attach(desc["shm"])]
+    try:
+        frame = BarFrame.from_shared(blocks[0], desc)
+        secondary = None
+        if secondary_desc is not None:
+            blocks.append(_attach(secondary_desc["shm"]))
+            secondary = BarFrame.from_shared(blocks[1], secondary_desc)
+        results = analyze_frame(engine_name, frame, symbols, secondary)
+        del frame, secondary
+    finally:
+        for shm in blocks:
+            _close(shm)
+    return results, time.process_time() - c0
+
+# --- Parent side ---
+
+class ShardedScanner:
+    """
+    Sharded scan mode for CPU-bound per-symbol strategy loops.
+
+    The universe is cut into contiguous shards and run on the process pool.
+    Bar data is copied once into a shared memory block (BarFrame.to_shared);
+    workers attach to it and build zero-copy views, so no DataFrame is pickled.
+    Only a small descriptor goes in and released candidates come back.
+    Results are concatenated in shard order, not completion order, so the
+    output is identical to a serial scan of the same frame. Universes below
+    SHARD_MIN_SYMBOLS, SCAN_PROCESSES <= 1, or a broken pool run in-process.
+    `secondary` is a second frame shared the same way (the core pipeline's
+    intraday bars next to the daily frame).
+    """
+
+    def scan(self, engine_name: str, frame: BarFrame, symbols: Optional[List[str]] = None,
+             secondary: Optional[BarFrame] = None) -> List[Candidate]:
+        if engine_name not in FEATURES:
+            raise KeyError(f"No sharded feature builder for {engine_name}. Known: {', '.join(FEATURES)}")
+        symbols = [s for s in (symbols if symbols is not None else frame.symbols) if s in frame]
+
+        workers = settings.SCAN_PROCESSES
+        if secondary is not None and secondary.empty:
+            secondary = None
+        if workers <= 1 or len(symbols) < settings.SHARD_MIN_SYMBOLS:
+            return analyze_frame(engine_name, frame, symbols, secondary)
+
+        t0 = time.perf_counter()
+        n_shards = min(workers * SHARDS_PER_WORKER, len(symbols))
+        shards = [list(s) for s in np.array_split(np.array(symbols, dtype=object), n_shards) if len(s)]
+
+        shm, desc = frame.to_shared()
+        blocks = [shm]
+        results: List[Candidate] = []
+        cpu = 0.0
+        try:
+            secondary_desc = None
+            if secondary is not None:
+                sec_shm, secondary_desc = secondary.to_shared()
+                blocks.append(sec_shm)
+            pool = execution.process_pool
+            futures = []
+            for shard in shards:
+                shard_desc = dict(desc, ranges={s: frame.ranges[s] for s in shard})
+                shard_secondary = None
+                if secondary_desc is not None:
+                    shard_secondary = dict(secondary_desc, ranges={s: secondary.ranges[s] for s in shard if s in secondary})
+                futures.append(pool.submit(_run_shard, engine_name, shard_desc, shard, shard_secondary))
+
+            # Shard order, not completion order: same output as a serial scan
+            for shard, fut in zip(shards, futures):
+                try:
+                    cands, secs = fut.result()
+                    cpu += secs
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    print(f"SHARDED SCAN [{engine_name}]: shard of {len(shard)} failed in worker ({e}). Running it in-process.")
+                    cands = analyze_frame(engine_name, frame, shard, secondary)
+                results.extend(cands)
+        except BrokenProcessPool as e:
+            print(f"SHARDED SCAN [{engine_name}]: process pool broken ({e}). Falling back to in-process scan.")
+            execution.reset_process_pool()
+            return analyze_frame(engine_name, frame, symbols, secondary)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        # Worker CPU is not on this thread's clock; charge it to the calling stage
+        span = tracer.active_span()
+        if span is not None:
+            span.add_cpu(cpu)
+        print(f"SHARDED SCAN [{engine_name}]: {len(symbols)} symbols / {len(shards)} shards -> "
+              f"{len(results)} candidates in {time.perf_counter() - t0:.2f}s (worker cpu {cpu:.2f}s)")
+        return results
+
+sharded_scanner = ShardedScanner()
@@ -0,0 +1,88 @@
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+# Raw snapshot bar field -> column name
+DAILY_FIELDS = {"o": "open", "h": "high", "l": "low", "c": "price", "v": "volume", "vw": "vwap"}
+
+class SnapshotFrame:
+    """
+    Columnar view of an Alpaca multi-symbol snapshot response.
+
+    Snapshots are read once from the raw JSON into float64 NumPy columns
+    (price, prev_close, open, high, low, volume, vwap; NaN when missing), so
+    every prefilter is a mask over the whole universe and every "top N" list
+    an argpartition instead of a Python loop over snapshot objects.
+    """
+
+    def __init__(self, raw: Optional[Dict[str, dict]] = None):
+        raw = raw or {}
+        syms = [s for s, snap in raw.items() if snap]
+        n = len(syms)
+        self.symbols = np.array(syms, dtype=object)
+        self.columns: Dict[str, np.ndarray] = {c: np.full(n, np.nan) for c in list(DAILY_FIELDS.values()) + ["prev_close"]}
+
+        for i, sym in enumerate(syms):
+            snap = raw[sym]
+            daily = snap.get("dailyBar")
+            if daily:
+                for k, col in DAILY_FIELDS.items():
+                    v = daily.get(k)
+                    if v is not None: self.columns[col][i] = v
+            prev = snap.get("prevDailyBar")
+            if prev and prev.get("c") is not None:
+                self.columns["prev_close"][i] = prev["c"]
+
+        self.price = self.columns["price"]
+        self.prev_close = self.columns["prev_close"]
+        self.volume = self.columns["volume"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.change = np.where(self.prev_close > 0, (self.price - self.prev_close) / self.prev_close, np.nan)
+
+    @classmethod
+    def fetch(cls, api, symbols: Iterable[str], chunk_size: int = 1000) -> "SnapshotFrame":
+        """
+        Chunked snapshot fetch (old-SDK REST client). Uses the raw response, which
+        skips building per-symbol entity objects. Failed chunks are logged and skipped.
+        """
+        symbols = list(symbols)
+        raw = {}
+        for i in range(0, len(symbols), chunk_size):
+            chunk = symbols[i:i + chunk_size]
+            try:
+                resp = api.data_get('/stocks/snapshots?symbols={}'.format(','.join(chunk)), api_version='v2')
+                raw.update(resp)
+            except Exception as e:
+                print(f"Snapshot chunk failed ({len(chunk)} symbols): {e}")
+        return cls(raw)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def mask(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+             min_change: Optional[float] = None, max_change: Optional[float] = None) -> np.ndarray:
+        """Boolean mask over the universe. Rows without today's price / prev close never match."""
+        price = self.price
+        m = ~np.isnan(price) & ~np.isnan(self.change)
+        if min_price is not None: m &= price >= min_price
+        if max_price is not None: m &= price <= max_price
+        if min_change is not None: m &= self.change >= min_change
+        if max_change is not None: m &= self.change <= max_change
+        return m
+
+    def select(self, mask: np.ndarray) -> List[str]:
+        return self.symbols[mask].tolist()
+
+    def top_k(self, values: np.ndarray, k: int, mask: Optional[np.ndarray] = None, largest: bool = True) -> List[str]:
+        """
+        Symbols with the k largest (or smallest) `values` within `mask`, best first.
+        argpartition picks the k rows in O(n); only those k get sorted.
+        """
+        idx = np.flatnonzero(mask) if mask is not None else np.arange(len(values))
+        if k <= 0 or len(idx) == 0:
+            return []
+        v = values[idx] if largest else -values[idx]
+        if len(idx) > k:
+            part = np.argpartition(-v, k - 1)[:k]
+            idx, v = idx[part], v[part]
+        order = np.argsort(-v, kind="stable")
+        return self.symbols[idx[order]].tolist()
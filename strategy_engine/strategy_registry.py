@@ -0,0 +1,176 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import math
+from strategy_engine.indicators.columns import resolve
+
+# Approximate bars per trading session (IEX, regular hours) for lookback -> calendar days
+BARS_PER_DAY = {"1Min": 390, "5Min": 78, "15Min": 26, "1Hour": 7, "1Day": 1}
+
+class DataRequirement:
+    """One timeframe a strategy reads: bars of history needed and indicator columns on them."""
+
+    def __init__(self, timeframe: str, lookback: int, indicators: Iterable[str] = ()):
+        self.timeframe = timeframe
+        self.lookback = lookback
+        self.indicators = tuple(indicators)
+
+    @property
+    def is_daily(self) -> bool:
+        return self.timeframe == "1Day"
+
+    def lookback_days(self) -> int:
+        """Calendar days to request so `lookback` bars are available (weekends/holidays included)."""
+        sessions = math.ceil(self.lookback / BARS_PER_DAY.get(self.timeframe, 1))
+        return math.ceil(sessions * 7 / 5) + 3
+
+    def __repr__(self):
+        return f"DataRequirement({self.timeframe}, {self.lookback}, {list(self.indicators)})"
+
+class StrategySpec:
+    """
+    Registry entry: how to build a strategy and the data it expects.
+    - requirements: first one is the primary timeframe (the one a backtest steps through).
+    - window: bars of primary-timeframe history passed as features['intraday_df'] (0 = none).
+    - aliases: feature key -> column, for strategies that read a column under another name.
+    """
+
+    def __init__(self, name: str, factory: Callable, requirements: List[DataRequirement],
+                 window: int = 0, aliases: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.factory = factory
+        self.requirements = requirements
+        self.window = window
+        self.aliases = aliases or {}
+
+    @property
+    def primary(self) -> DataRequirement:
+        return self.requirements[0]
+
+STRATEGIES: Dict[str, StrategySpec] = {}
+
+def register(spec: StrategySpec) -> StrategySpec:
+    STRATEGIES[spec.name] = spec
+    return spec
+
+def get_strategy(name: str) -> StrategySpec:
+    if name not in STRATEGIES:
+        raise KeyError(f"Unknown strategy type: {name}. Registered: {', '.join(STRATEGIES)}")
+    return STRATEGIES[name]
+
+def merge_requirements(names: Iterable[str]) -> Dict[str, DataRequirement]:
+    """
+    Union of the requirements of several strategies, one entry per timeframe:
+    longest lookback, every indicator (dependencies resolved, each listed once).
+    """
+    merged: Dict[str, Tuple[int, List[str]]] = {}
+    for name in names:
+        for req in get_strategy(name).requirements:
+            lookback, indicators = merged.get(req.timeframe, (0, []))
+            merged[req.timeframe] = (max(lookback, req.lookback), indicators + list(req.indicators))
+    return {tf: DataRequirement(tf, lb, resolve(ind)) for tf, (lb, ind) in merged.items()}
+
+# --- Registered strategies ---
+# Imports are local to the factories so the registry can be loaded without every engine.
+
+def _swing_20_50():
+    from strategy_engine.swing_setups import SwingSetup_20_50
+    return SwingSetup_20_50()
+
+def _swing_scan_engine():
+    from strategy_engine.swing_setups import SwingStrategyEngine
+    return SwingStrategyEngine()
+
+def _day():
+    from strategy_engine.day_trade_strategy import DayTradeEngine
+    return DayTradeEngine()
+
+def _day_live():
+    from strategy_engine.day_trade_strategy import DayTradeEngine
+    return DayTradeEngine(profile_rvol=True, bar_minutes=1) # DAY_SCAN runs on 1Min bars
+
+def _donchian():
+    from strategy_engine.experimental_strategies import DonchianBreakoutStrategy
+    return DonchianBreakoutStrategy()
+
+def _rsi2():
+    from strategy_engine.experimental_strategies import RSI2MeanReversionStrategy
+    return RSI2MeanReversionStrategy()
+
+def _elite():
+    from strategy_engine.elite_strategy import SwingSetup_Elite
+    return SwingSetup_Elite()
+
+def _kellog():
+    from strategy_engine.kellog_strategy import KellogStrategy
+    return KellogStrategy()
+
+def _congress():
+    from strategy_engine.congress_strategy import CongressStrategy
+    return CongressStrategy()
+
+def _buffett():
+    from strategy_engine.buffett_strategy import BuffettStrategy
+    return BuffettStrategy()
+
+def _rsi_bands():
+    from strategy_engine.rsi_bands_strategy import RSIBandsStrategy
+    return RSIBandsStrategy()
+
+def _warrior():
+    from strategy_engine.warrior_strategy import WarriorStrategy
+    return WarriorStrategy()
+
+def _warrior_live():
+    from strategy_engine.warrior_strategy import WarriorStrategy
+    return WarriorStrategy(profile_rvol=True, bar_minutes=5) # Scanner gappers run on 5Min bars
+
+def _ema3():
+    from strategy_engine.ema_strategy import EMA3Strategy
+    return EMA3Strategy()
+
+def _fgd():
+    from strategy_engine.sykes_strategies import FirstGreenDayStrategy
+    return FirstGreenDayStrategy()
+
+def _mpdb():
+    from strategy_engine.sykes_strategies import MorningPanicStrategy
+    return MorningPanicStrategy()
+
+def _one_box():
+    from strategy_engine.one_box_strategy import OneBoxStrategy
+    return OneBoxStrategy()
+
+def _options():
+    from strategy_engine.options_strategy import OptionsEngine
+    return OptionsEngine()
+
+SWING_DAILY = ("ema20", "sma50", "atr", "vol_avg_20", "prev_close", "candle_patterns")
+ELITE_DAILY = ("rsi14", "adx", "ema20", "sma50")
+
+# Backtest strategy types (BacktestEngine(strategy_type=...))
+register(StrategySpec("SWING", _swing_20_50, [DataRequirement("1Day", 60, SWING_DAILY)]))
+register(StrategySpec("DAY", _day, [DataRequirement("5Min", 51)], window=50))
+register(StrategySpec("DONCHIAN", _donchian, [DataRequirement("1Day", 21, ("donchian",))]))
+register(StrategySpec("RSI2", _rsi2, [DataRequirement("1Day", 200, ("sma200", "sma5", "rsi2"))]))
+# Elite reads the Wilder ATR computed alongside ADX as 'atr'
+register(StrategySpec("ELITE", _elite, [DataRequirement("1Day", 60, ELITE_DAILY)], aliases={"atr": "atr_wilder"}))
+register(StrategySpec("OPTIONS_SIM", _elite, [DataRequirement("1Day", 60, ELITE_DAILY)], aliases={"atr": "atr_wilder"})) # Signals from Elite, Execution is Options
+register(StrategySpec("OPTIONS_INVERSE", _elite, [DataRequirement("1Day", 60, ELITE_DAILY)], aliases={"atr": "atr_wilder"})) # Signals from Elite, Inverted Execution
+register(StrategySpec("SNIPER_OPTIONS", _day, [DataRequirement("5Min", 51)], window=50)) # Signals from Day Trade, Execution is Options
+register(StrategySpec("KELLOG", _kellog, [DataRequirement("5Min", 51, ("vwap_cum", "atr", "vol_avg"))], window=50))
+register(StrategySpec("CONGRESS", _congress, [DataRequirement("1Day", 1)]))
+register(StrategySpec("BUFFETT", _buffett, [DataRequirement("1Day", 1)]))
+register(StrategySpec("RSI_BANDS", _rsi_bands, [DataRequirement("1Day", 50, ("bollinger", "sma50", "rsi14"))]))
+register(StrategySpec("WARRIOR", _warrior, [DataRequirement("5Min", 51, ("vol_avg",))], window=50))
+register(StrategySpec("EMA3", _ema3, [DataRequirement("1Day", 140)]))
+register(StrategySpec("FGD", _fgd, [DataRequirement("1Day", 60)]))
+register(StrategySpec("MPDB", _mpdb, [DataRequirement("5Min", 100)], window=50))
+
+# Live scanner core pipeline (ScannerService / DataLoader.fetch_snapshot)
+register(StrategySpec("SWING_SCAN", _swing_scan_engine, [DataRequirement("1Day", 140, SWING_DAILY)]))
+register(StrategySpec("OPTIONS_SCAN", _options, [DataRequirement("1Day", 60, ("ema20", "sma50"))]))
+register(StrategySpec("DAY_SCAN", _day_live, [DataRequirement("1Min", 390)]))
+register(StrategySpec("WARRIOR_LIVE", _warrior_live, [DataRequirement("5Min", 51, ("vol_avg",))], window=50))
+# Sniper (run_sniper_scan)
+register(StrategySpec("ONE_BOX", _one_box, [DataRequirement("1Min", 50)]))
+
+SCANNER_STRATEGIES = ("SWING_SCAN", "EMA3", "OPTIONS_SCAN", "DAY_SCAN")
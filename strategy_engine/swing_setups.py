@@ -1,8 +1,10 @@
 from typing import List, Optional, Dict
+import numpy as np
 from strategy_engine.models import Candidate, Section, Direction, TradePlan, Scores, Compliance
 from strategy_engine.models import Candidate, Section, Direction, TradePlan, Scores, Compliance
 from configs.settings import settings
 from strategy_engine.ema_strategy import EMA3Strategy
+from strategy_engine.factor_engine import FactorMatrix
 
 
 class SwingAnalysis:
@@ -81,6 +83,14 @@ class SwingSetup_20_50:
     def __init__(self):
         self.grader = SwingAnalysis()
 
+    @staticmethod
+    def screen(factors: FactorMatrix) -> np.ndarray:
+        """Row mask of analyze()'s filters before grading (trend values present, close within 10% of EMA20)."""
+        close, ema20, sma50 = factors["close"], factors["ema20"], factors["sma50"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stretched = np.abs(close - ema20) / ema20 > 0.10
+        return (close != 0) & (ema20 != 0) & (sma50 != 0) & ~stretched
+
     def analyze(self, symbol: str, data: Dict[str, any]) -> Optional[Candidate]:
         # A+ FILTERS
         # 1. Liquidity check (Mocked to True for demo)
@@ -151,6 +161,16 @@ class SwingStrategyEngine:
             EMA3Strategy() # Trend Bot Integration
         ]
 
+    @staticmethod
+    def screen(factors: FactorMatrix) -> List[str]:
+        """
+        Symbols (in matrix order) at least one setup can fire on, from the
+        snapshot's factor matrix. Only the setups' own first filters, so
+        scanning the rest gives the same candidates as scanning everything.
+        """
+        keep = SwingSetup_20_50.screen(factors) | EMA3Strategy.screen(factors)
+        return [s for s, k in zip(factors.symbols, keep) if k]
+
     def scan(self, symbols: List[str], market_data: Dict[str, dict] = None) -> List[Candidate]:
         candidates = []
         
@@ -1,6 +1,7 @@
 
 from typing import Dict, Optional, List
 from strategy_engine.models import Candidate, Section, TradePlan, Direction, Scores, Compliance
+from data_adapters.volume_profile import volume_profiles
 import pandas as pd
 import numpy as np
 
@@ -16,9 +17,15 @@ class WarriorStrategy:
     3. TRIGGER: First 1-min candle to break HIGH of previous candle (Resumption).
     4. RISK: Stop = Low of Pullback. Target = 2R (or HOD retest).
     5. SIZING: "Cushion Sizing" (1/4 size until profit > Daily Goal/4).
+
+    profile_rvol: the 3x volume gate compares the bar to the same minutes of an
+    average session (nightly volume profile) instead of the last 20 bars. Live
+    scans only, like DayTradeEngine; backtests keep the flat average.
     """
 
-    def __init__(self):
+    def __init__(self, profile_rvol: bool = False, bar_minutes: int = 5):
+        self.profile_rvol = profile_rvol
+        self.bar_minutes = bar_minutes
         self.daily_pnl = 0.0 # Track cushion
         self.daily_goal = 500.0 # Target per day
         self.cushion_achieved = False
@@ -40,7 +47,12 @@ class WarriorStrategy:
         # (Simplified: Current Vol > 3x Avg Vol of last 20 bars)
         vol = row['volume']
         vol_avg = float(row.get('vol_avg', df['volume'].rolling(20).mean().iloc[-1]))
-        if vol_avg > 0 and (vol / vol_avg) < 3.0: return None # Strict momentum requirement
+        rel_vol = vol / vol_avg if vol_avg > 0 else float('nan')
+        if self.profile_rvol:
+            tod = volume_profiles.bar_rvol(symbol, df['volume'].to_numpy(), df.index, self.bar_minutes)
+            if tod is not None and np.isfinite(tod[-1]):
+                rel_vol = float(tod[-1])
+        if rel_vol < 3.0: return None # Strict momentum requirement
         
         # 3. PATTERN RECOGNITION (Bull Flag / Pullback)
         # Lookback 5-10 bars. 
@@ -89,8 +101,8 @@ class WarriorStrategy:
                 symbol=symbol,
                 setup_name="Warrior Bull Flag",
                 direction=Direction.LONG,
-                thesis=f"Small Cap Momentum. RelVol {vol/vol_avg:.1f}x. Flag Breakout > {prev_high:.2f}.",
-                features={"rel_vol": vol/vol_avg, "impulse_high": impulse_high},
+                thesis=f"Small Cap Momentum. RelVol {rel_vol:.1f}x. Flag Breakout > {prev_high:.2f}.",
+                features={"rel_vol": rel_vol, "impulse_high": impulse_high},
                 trade_plan=TradePlan(
                     entry=close,
                     stop_loss=stop,
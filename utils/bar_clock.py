@@ -0,0 +1,182 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from typing import Awaitable, Callable, Dict, List, Optional
+from configs.settings import settings
+from utils.market_clock import NY_TZ, MarketClock
+from utils.metrics import BAR_TRIGGERS, BAR_TRIGGER_LAG_SECONDS
+
+# Bars are labelled by their close. Session hours per day come from MarketClock.session.
+
+# Timeframe -> bar length in seconds (None = one bar per session, closing at 16:00)
+TIMEFRAMES: Dict[str, Optional[int]] = {
+    "1Min": 60,
+    "5Min": 300,
+    "15Min": 900,
+    "1Day": None,
+}
+
+class BarClock:
+    """
+    Regular-session bar boundaries in America/New_York.
+    Intraday bars close every `step` seconds from the open (first close 9:31
+    for 1Min, 9:35 for 5Min) through the session close; the daily bar closes
+    at the session close. Sessions come from MarketClock.session: weekends and
+    holidays are skipped, early closes end the day early.
+    """
+
+    def _step(self, timeframe: str) -> Optional[int]:
+        if timeframe not in TIMEFRAMES:
+            raise KeyError(f"Unknown bar timeframe {timeframe}. Known: {', '.join(TIMEFRAMES)}")
+        return TIMEFRAMES[timeframe]
+
+    def _at(self, day, t: dtime) -> datetime:
+        return NY_TZ.localize(datetime.combine(day, t))
+
+    def _session_day(self, day, direction: int):
+        while MarketClock.session(day) is None:
+            day += timedelta(days=direction)
+        return day
+
+    def session_open(self, day) -> datetime:
+        return self._at(day, MarketClock.session(day)[0])
+
+    def session_close(self, day) -> datetime:
+        return self._at(day, MarketClock.session(day)[1])
+
+    def _now(self, now: Optional[datetime]) -> datetime:
+        return now.astimezone(NY_TZ) if now is not None else datetime.now(NY_TZ)
+
+    def next_close(self, timeframe: str, now: Optional[datetime] = None) -> datetime:
+        """First bar close strictly after `now`."""
+        step = self._step(timeframe)
+        now = self._now(now)
+        day = now.date()
+        if MarketClock.session(day) is None or now >= self.session_close(day):
+            day = self._session_day(day + timedelta(days=1), 1)
+        close = self.session_close(day)
+        if step is None:
+            return close
+        open_ = self.session_open(day)
+        if now < open_:
+            return open_ + timedelta(seconds=step)
+        n = int((now - open_).total_seconds() // step) + 1
+        return min(open_ + timedelta(seconds=n * step), close)
+
+    def last_close(self, timeframe: str, now: Optional[datetime] = None) -> datetime:
+        """Most recent bar close at or before `now`."""
+        step = self._step(timeframe)
+        now = self._now(now)
+        day = self._session_day(now.date(), -1)
+        if day != now.date() or now >= self.session_close(day):
+            return self.session_close(day)
+        open_ = self.session_open(day)
+        if step is None or now < open_ + timedelta(seconds=step):
+            prev = self._session_day(day - timedelta(days=1), -1)
+            return self.session_close(prev)
+        n = int((now - open_).total_seconds() // step)
+        return open_ + timedelta(seconds=n * step)
+
+    async def wait_for_close(self, timeframe: str) -> datetime:
+        """
+        Sleeps until the next bar close plus settings.BAR_CLOSE_DELAY_SECONDS
+        (time for the data feed to publish the bar) and returns the close.
+        Long sleeps are re-checked so suspend/clock drift can't overshoot much.
+        """
+        close = self.next_close(timeframe)
+        target = close + timedelta(seconds=settings.BAR_CLOSE_DELAY_SECONDS)
+        while True:
+            remaining = (target - datetime.now(NY_TZ)).total_seconds()
+            if remaining <= 0:
+                return close
+            await asyncio.sleep(min(remaining, 300.0))
+
+class _Subscription:
+    def __init__(self, name: str, timeframe: str, handler: Callable[[datetime], Awaitable], min_interval: float):
+        self.name = name
+        self.timeframe = timeframe
+        self.handler = handler
+        self.min_interval = min_interval
+        self.running = False
+        self.last_bar: Optional[datetime] = None
+        self.last_start = 0.0
+
+class BarCloseTrigger:
+    """
+    Event-driven scan triggers: each subscription's handler is started as soon
+    as a bar of its timeframe closes (exchange-aligned, after the settle delay).
+    Debounced per subscription - a close is dropped when:
+    - busy:      the previous run is still going (runs never overlap)
+    - unchanged: that bar was already handled
+    - debounced: the last run started less than `min_interval` seconds ago
+    Nothing fires outside the regular session, so idle hours cost no scans.
+    """
+
+    def __init__(self, clock: BarClock = None):
+        self.clock = clock or BarClock()
+        self._subs: Dict[str, List[_Subscription]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def subscribe(self, name: str, timeframe: str, handler: Callable[[datetime], Awaitable], min_interval: float = 0.0):
+        """`handler(close)` is awaited with the NY-time close of the bar that triggered it."""
+        self.clock._step(timeframe) # Validate
+        self._subs.setdefault(timeframe, []).append(_Subscription(name, timeframe, handler, min_interval))
+        if self._tasks and timeframe not in self._tasks:
+            self._tasks[timeframe] = asyncio.get_running_loop().create_task(self._run(timeframe))
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        for timeframe in self._subs:
+            if timeframe not in self._tasks:
+                self._tasks[timeframe] = loop.create_task(self._run(timeframe))
+
+    async def _run(self, timeframe: str):
+        while True:
+            try:
+                close = await self.clock.wait_for_close(timeframe)
+                for sub in self._subs.get(timeframe, []):
+                    self._dispatch(sub, close)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"BAR TRIGGER [{timeframe}] Error: {e}")
+                await asyncio.sleep(1.0)
+
+    def _dispatch(self, sub: _Subscription, close: datetime):
+        if sub.running:
+            result = "busy"
+        elif sub.last_bar is not None and close <= sub.last_bar:
+            result = "unchanged"
+        elif sub.last_start and time.monotonic() - sub.last_start < sub.min_interval:
+            result = "debounced"
+        else:
+            result = "fired"
+        BAR_TRIGGERS.inc(trigger=sub.name, result=result)
+        if result != "fired":
+            print(f"BAR TRIGGER [{sub.name}]: {sub.timeframe} close {close.strftime('%H:%M')} skipped ({result}).")
+            return
+        sub.running = True
+        sub.last_bar = close
+        sub.last_start = time.monotonic()
+        asyncio.get_running_loop().create_task(self._fire(sub, close))
+
+    async def _fire(self, sub: _Subscription, close: datetime):
+        BAR_TRIGGER_LAG_SECONDS.observe((datetime.now(NY_TZ) - close).total_seconds(), timeframe=sub.timeframe)
+        try:
+            await sub.handler(close)
+        except Exception as e:
+            print(f"BAR TRIGGER [{sub.name}] Handler Error: {e}")
+        finally:
+            sub.running = False
+
+    def stats(self) -> dict:
+        return {
+            tf: [{"name": s.name, "running": s.running,
+                  "last_bar": s.last_bar.isoformat() if s.last_bar else None,
+                  "next_close": self.clock.next_close(tf).isoformat()} for s in subs]
+            for tf, subs in self._subs.items()
+        }
+
+bar_clock = BarClock()
+bar_trigger = BarCloseTrigger(bar_clock)
@@ -0,0 +1,100 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from configs.settings import settings
+
+class ExecutionLayer:
+    """
+    Keeps the FastAPI/APScheduler event loop free.
+    - io pool:  blocking broker / HTTP / disk calls (Alpaca SDK, requests, sqlite)
+    - cpu pool: pandas / numpy work (mostly releases the GIL inside kernels)
+    - process pool: pure-Python strategy loops sharded across cores
+      (strategy_engine.sharded_scan), started on first use
+    The io pool is also installed as the loop's default executor, so
+    run_in_executor(None, ...) and APScheduler's sync jobs use it too.
+    """
+
+    def __init__(self):
+        self.io_pool = ThreadPoolExecutor(max_workers=settings.IO_POOL_WORKERS, thread_name_prefix="io")
+        self.cpu_pool = ThreadPoolExecutor(max_workers=settings.CPU_POOL_WORKERS, thread_name_prefix="cpu")
+        self._process_pool = None
+        self._process_lock = threading.Lock()
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent has live threads (pools, scheduler, SDK sessions)
+        with self._process_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=max(settings.SCAN_PROCESSES, 1),
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._process_pool
+
+    def reset_process_pool(self):
+        """Drops a broken pool (a worker died); the next use starts a fresh one."""
+        with self._process_lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def install(self, loop: asyncio.AbstractEventLoop = None):
+        loop = loop or asyncio.get_running_loop()
+        loop.set_default_executor(self.io_pool)
+
+    async def run_io(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, functools.partial(fn, *args, **kwargs))
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_pool, functools.partial(fn, *args, **kwargs))
+
+class LoopLagMonitor:
+    """
+    Sleeps `interval` seconds in a loop and measures how late it wakes up.
+    Any lag above settings.LOOP_LAG_WARN_MS means something blocked the loop.
+    """
+
+    def __init__(self, interval: float = 0.1, keep: int = 50):
+        self.interval = interval
+        self.threshold_ms = settings.LOOP_LAG_WARN_MS
+        self.stalls = deque(maxlen=keep)
+        self.stall_count = 0
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = (time.perf_counter() - t0 - self.interval) * 1000.0
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms > self.threshold_ms:
+                self.stall_count += 1
+                self.stalls.append({"at": datetime.now().isoformat(), "lag_ms": round(lag_ms, 1)})
+                print(f"⚠️ EVENT LOOP STALL: {lag_ms:.0f}ms (threshold {self.threshold_ms:.0f}ms)")
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "threshold_ms": self.threshold_ms,
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "stall_count": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+execution = ExecutionLayer()
+loop_monitor = LoopLagMonitor()
@@ -1,28 +1,67 @@
-from datetime import datetime, time
+from datetime import date, datetime, time
+from typing import Dict, Optional, Tuple
 import pytz
 
 # Define Eastern Time Zone
 NY_TZ = pytz.timezone('America/New_York')
 
+# Regular session, exchange time (fallback when the broker calendar isn't loaded)
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+
 class MarketClock:
+    # Broker trading calendar: date -> (open, close); holidays are absent, early closes carry their close
+    _sessions: Optional[Dict[date, Tuple[time, time]]] = None
+    _calendar_range: Optional[Tuple[date, date]] = None
+
     @staticmethod
     def get_ny_time():
         """Returns current time in New York."""
         return datetime.now(NY_TZ)
 
+    @staticmethod
+    def load_calendar() -> int:
+        """
+        Loads the broker's trading calendar for this year and next (holidays,
+        early closes). Blocking; run at startup and daily. Returns sessions loaded.
+        Until it succeeds every weekday counts as a 9:30-16:00 session.
+        """
+        from configs.settings import settings
+        if not settings.APCA_API_KEY_ID:
+            return 0
+        year = MarketClock.get_ny_time().year
+        start, end = date(year, 1, 1), date(year + 1, 12, 31)
+        try:
+            from alpaca_trade_api.rest import REST
+            api = REST(settings.APCA_API_KEY_ID, settings.APCA_API_SECRET_KEY, base_url=settings.APCA_API_BASE_URL)
+            days = api.get_calendar(start=start.isoformat(), end=end.isoformat())
+        except Exception as e:
+            print(f"MARKET CLOCK: Calendar load failed ({e}). Using weekday sessions.")
+            return 0
+        MarketClock._sessions = {d.date.date(): (d.open, d.close) for d in days}
+        MarketClock._calendar_range = (start, end)
+        return len(days)
+
+    @staticmethod
+    def session(day: date) -> Optional[Tuple[time, time]]:
+        """(open, close) of the regular session on `day`, or None if the market is closed all day."""
+        rng = MarketClock._calendar_range
+        if rng is not None and rng[0] <= day <= rng[1]:
+            return MarketClock._sessions.get(day)
+        # 0=Monday, 4=Friday
+        if day.weekday() > 4:
+            return None
+        return REGULAR_OPEN, REGULAR_CLOSE
+
     @staticmethod
     def is_market_open():
-        """Checks if current time is between 9:30 AM and 4:00 PM ET on a weekday."""
+        """Checks if current time is inside today's regular session (holidays / early closes from the calendar)."""
         now = MarketClock.get_ny_time()
-        # 0=Monday, 4=Friday
-        if now.weekday() > 4:
+        session = MarketClock.session(now.date())
+        if session is None:
             return False
-            
-        current_time = now.time()
-        market_open = time(9, 30)
-        market_close = time(16, 0)
-        
-        return market_open <= current_time <= market_close
+        market_open, market_close = session
+        return market_open <= now.time() <= market_close
 
     @staticmethod
     def get_market_segment():
@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Prometheus text exposition format (0.0.4), served at /metrics.
+# Small in-process implementation: counters, gauges and histograms with labels,
+# no client library needed.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _fmt(v: float) -> str:
+    if v == float("inf"): return "+Inf"
+    return repr(float(v)) if v != int(v) else f"{int(v)}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra: parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [per-bucket counts (non-cumulative), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = next(i for i, b in enumerate(self.buckets) if value <= b)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for b, c in zip(self.buckets, counts):
+                cumulative += c
+                le = 'le="%s"' % _fmt(b)
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Broker REST paths -> bounded endpoint labels (ids, symbols, OCC contracts collapsed)
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-f]{8}-[0-9a-f-]{27}|[A-Z0-9.\-]{1,21})$")
+
+def endpoint_label(path: str) -> str:
+    segments = [s for s in path.split("?")[0].split("/") if s]
+    return "/" + "/".join("{id}" if _ID_SEGMENT.match(s) else s for s in segments)
+
+# --- Application metrics ---
+WEBHOOK_ORDER_SECONDS = Histogram(
+    "webhook_to_order_seconds", "Webhook receipt to broker order response", ("result",))
+ORDERS_SUBMITTED = Counter(
+    "orders_submitted_total", "Broker order submissions by source and outcome", ("source", "result"))
+SCAN_SECONDS = Histogram(
+    "scan_duration_seconds", "Full scan (run_scan) duration", ("status",), buckets=SLOW_BUCKETS)
+SCAN_STAGE_SECONDS = Histogram(
+    "scan_stage_duration_seconds", "Scan stage duration", ("stage", "status"), buckets=SLOW_BUCKETS)
+BROKER_SECONDS = Histogram(
+    "broker_request_duration_seconds", "Alpaca REST request latency", ("method", "endpoint"))
+BROKER_ERRORS = Counter(
+    "broker_request_errors_total", "Alpaca REST requests that failed or returned >= 400", ("method", "endpoint"))
+SCHEDULER_JOB_SECONDS = Histogram(
+    "scheduler_job_duration_seconds", "Scheduler job run duration", ("job", "status"), buckets=SLOW_BUCKETS)
+SCHEDULER_JOB_RUNNING = Gauge(
+    "scheduler_job_running", "Scheduler job runs currently in progress", ("job",))
+SCHEDULER_JOB_OVERLAPS = Counter(
+    "scheduler_job_overlaps_total", "Job runs started while a previous run was active (concurrent) or dropped by the scheduler (skipped)", ("job", "kind"))
+DISCORD_SECONDS = Histogram(
+    "discord_send_duration_seconds", "Discord webhook send latency", ("result",))
+JOURNAL_WRITE_SECONDS = Histogram(
+    "journal_write_duration_seconds", "Trade journal CSV write time", ("op",))
+BAR_TRIGGERS = Counter(
+    "bar_close_triggers_total", "Bar-close scan triggers by outcome (fired, busy, unchanged, debounced)", ("trigger", "result"))
+BAR_TRIGGER_LAG_SECONDS = Histogram(
+    "bar_close_trigger_lag_seconds", "Bar close to triggered handler start", ("timeframe",))
+PORTFOLIO_EVENTS = Counter(
+    "portfolio_trade_updates_total", "Trade-update events applied to the in-memory portfolio", ("event",))
+PORTFOLIO_DRIFT = Counter(
+    "portfolio_reconcile_drift_total", "Positions/orders the periodic reconcile found out of sync with the event-built state", ("kind",))
+LIFECYCLE_REACTION_SECONDS = Histogram(
+    "order_lifecycle_reaction_seconds", "Trade-update event to completed reaction (exit journaled, position re-protected)", ("action", "result"))
+CONDOR_PHASE_SECONDS = Histogram(
+    "condor_phase_duration_seconds", "Iron condor phase (wings, body): submit to all legs final or deadline", ("phase", "result"), buckets=SLOW_BUCKETS)
+BROKER_QUEUE_SECONDS = Histogram(
+    "broker_rate_limit_wait_seconds", "Time an Alpaca request waited for a rate-limit token", ("bucket", "priority"), buckets=SLOW_BUCKETS)
+BROKER_QUEUE_DEPTH = Gauge(
+    "broker_rate_limit_queue_depth", "Alpaca requests currently waiting for a rate-limit token", ("bucket", "priority"))
+BROKER_RETRIES = Counter(
+    "broker_request_retries_total", "Alpaca requests retried after 429 / 5xx / connection errors", ("bucket", "reason"))
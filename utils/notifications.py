@@ -2,6 +2,8 @@ import os
 import requests
 from datetime import datetime
 import pytz
+import time
+from utils.metrics import DISCORD_SECONDS
 from dotenv import load_dotenv
 
 load_dotenv("secrets.env")
@@ -31,14 +33,18 @@ class NotificationService:
             ]
         }
         
+        t0 = time.perf_counter()
         try:
             resp = requests.post(self.discord_webhook, json=payload, timeout=5)
             if resp.status_code in [200, 204]:
+                DISCORD_SECONDS.observe(time.perf_counter() - t0, result="ok")
                 return True
             else:
+                DISCORD_SECONDS.observe(time.perf_counter() - t0, result="error")
                 print(f"DISCORD ERROR {resp.status_code}: {resp.text}")
                 return False
         except Exception as e:
+            DISCORD_SECONDS.observe(time.perf_counter() - t0, result="error")
             print(f"Failed to send discord alert: {e}")
             return False
 
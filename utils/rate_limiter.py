@@ -0,0 +1,226 @@
+import contextvars
+import functools
+import heapq
+import importlib
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from configs.settings import settings
+from utils.metrics import BROKER_QUEUE_SECONDS, BROKER_QUEUE_DEPTH, BROKER_RETRIES
+
+# Priority classes (lower value is served first)
+ORDERS = 0     # submit / replace / cancel, stops
+ACCOUNT = 1    # positions, account, open orders, clock
+SCAN = 2       # market data for scans
+ANALYTICS = 3  # hydration, asset index, volume profiles
+PRIORITY_NAMES = {ORDERS: "orders", ACCOUNT: "account", SCAN: "scan", ANALYTICS: "analytics"}
+
+# Idempotent methods are retried on 5xx / connection errors; POST/PATCH only on 429 (never processed)
+IDEMPOTENT = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+# SDK REST clients with their own 429/504 retry loop (module, class)
+SDK_CLIENTS = (("alpaca_trade_api.rest", "REST"), ("alpaca.common.rest", "RESTClient"))
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("broker_priority", default=None)
+
+@contextmanager
+def broker_priority(priority: int):
+    """
+    Overrides the priority class of every broker request made inside the block
+    (follows the context into copy_context() pool tasks). Also usable as a decorator.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class TokenBucket:
+    """
+    Token bucket (rate_per_min, burst) with a priority queue of waiters: the
+    best-priority, oldest waiter takes the next token. Scan/analytics classes
+    also leave `reserve` tokens in the bucket, so an order or stop arriving
+    after a burst of scan calls finds a token waiting.
+    """
+
+    def __init__(self, name: str, rate_per_min: float, burst: int, reserve: int = 0):
+        self.name = name
+        self.rate = rate_per_min / 60.0
+        self.capacity = float(burst)
+        self.reserve = reserve
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int) -> float:
+        """Blocks until a token is granted. Returns seconds spent queued."""
+        t0 = time.monotonic()
+        label = PRIORITY_NAMES.get(priority, str(priority))
+        floor = 1.0 + (self.reserve if priority >= SCAN else 0)
+        with self._cond:
+            me = (priority, next(self._seq))
+            heapq.heappush(self._waiting, me)
+            BROKER_QUEUE_DEPTH.inc(bucket=self.name, priority=label)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiting[0] == me and self.tokens >= floor:
+                        heapq.heappop(self._waiting)
+                        self.tokens -= 1.0
+                        break
+                    wait = (floor - self.tokens) / self.rate if self._waiting[0] == me else 0.05
+                    self._cond.wait(timeout=min(max(wait, 0.001), 1.0))
+            except BaseException:
+                if me in self._waiting:
+                    self._waiting.remove(me)
+                    heapq.heapify(self._waiting)
+                raise
+            finally:
+                BROKER_QUEUE_DEPTH.dec(bucket=self.name, priority=label)
+                self._cond.notify_all()
+        waited = time.monotonic() - t0
+        BROKER_QUEUE_SECONDS.observe(waited, bucket=self.name, priority=label)
+        return waited
+
+    def penalize(self, seconds: float):
+        """Broker said slow down (429): nobody gets a token for `seconds`."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill()
+            queued: Dict[str, int] = {}
+            for priority, _ in self._waiting:
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                queued[name] = queued.get(name, 0) + 1
+            return {"tokens": round(self.tokens, 2), "rate_per_min": self.rate * 60, "burst": self.capacity, "queued": queued}
+
+class BrokerRateLimiter:
+    """
+    Process-wide limiter for every Alpaca request (trading and market data
+    buckets, settings.BROKER_* / DATA_*). install() wraps requests.Session.send
+    like the tracer does, so both SDKs, every pool and every job share it.
+
+    Priority: broker_priority() override, else by endpoint - order writes are
+    ORDERS, other trading API calls ACCOUNT, market data SCAN.
+    429 and (idempotent) 5xx / connection errors are retried up to
+    BROKER_RETRY_MAX times with full-jitter exponential backoff (Retry-After
+    wins); a 429 also pauses the whole bucket. The SDKs' own retry loops are
+    switched off so a request is never retried by both layers.
+    """
+
+    def __init__(self):
+        self.buckets = {
+            "trading": TokenBucket("trading", settings.BROKER_RATE_PER_MIN, settings.BROKER_BURST, settings.BROKER_RESERVED_TOKENS),
+            "data": TokenBucket("data", settings.DATA_RATE_PER_MIN, settings.DATA_BURST, settings.BROKER_RESERVED_TOKENS),
+        }
+        self._installed = False
+
+    def route(self, method: str, url: str) -> Optional[Tuple[TokenBucket, int]]:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        if not host.endswith("alpaca.markets"):
+            return None
+        bucket = self.buckets["data" if host.startswith("data.") else "trading"]
+        priority = _priority.get()
+        if priority is None:
+            if bucket.name == "data":
+                priority = SCAN
+            elif (method != "GET" and "/orders" in parts.path) or method == "DELETE": # Incl. close position
+                priority = ORDERS
+            else:
+                priority = ACCOUNT
+        return bucket, priority
+
+    @staticmethod
+    def backoff(attempt: int, resp=None) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.BROKER_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(settings.BROKER_BACKOFF_MAX, settings.BROKER_BACKOFF_BASE * 2 ** attempt))
+
+    @staticmethod
+    def disable_sdk_retries():
+        """
+        Both SDKs retry 429/504 themselves (APCA_RETRY_MAX, default 3, fixed
+        3s sleep), which would multiply our retries and ignore the buckets.
+        Their loop only retries when _one_request is told retries remain, so
+        passing 0 makes every SDK call a single attempt - including clients
+        built before install(). APCA_RETRY_MAX=0 covers clients built later.
+        """
+        os.environ["APCA_RETRY_MAX"] = "0"
+        for module, name in SDK_CLIENTS:
+            try:
+                client = getattr(importlib.import_module(module), name)
+            except (ImportError, AttributeError):
+                continue
+            one_request = client._one_request
+
+            @functools.wraps(one_request)
+            def single_attempt(sdk, method, url, opts, retry, _one_request=one_request):
+                return _one_request(sdk, method, url, opts, 0)
+
+            client._one_request = single_attempt
+
+    def install(self):
+        if self._installed:
+            return
+        import requests
+        self.disable_sdk_retries()
+        send = requests.Session.send
+
+        @functools.wraps(send)
+        def limited_send(session, request, **kwargs):
+            route = self.route(request.method, request.url)
+            if route is None:
+                return send(session, request, **kwargs)
+            bucket, priority = route
+            idempotent = request.method in IDEMPOTENT
+            retries = settings.BROKER_RETRY_MAX
+            for attempt in range(retries + 1):
+                bucket.acquire(priority)
+                try:
+                    resp = send(session, request, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    if not idempotent or attempt == retries:
+                        raise
+                    BROKER_RETRIES.inc(bucket=bucket.name, reason="connection")
+                    time.sleep(self.backoff(attempt))
+                    continue
+
+                status = resp.status_code
+                if attempt == retries or not (status == 429 or (status >= 500 and idempotent)):
+                    return resp
+                delay = self.backoff(attempt, resp)
+                if status == 429:
+                    bucket.penalize(delay)
+                BROKER_RETRIES.inc(bucket=bucket.name, reason=str(status))
+                print(f"BROKER: {status} on {request.method} {urlsplit(request.url).path}, retry {attempt + 1}/{retries} in {delay:.2f}s")
+                resp.close() # Release the pooled connection before sleeping
+                time.sleep(delay)
+            return resp
+
+        requests.Session.send = limited_send
+        self._installed = True
+
+    def stats(self) -> dict:
+        return {name: b.stats() for name, b in self.buckets.items()}
+
+rate_limiter = BrokerRateLimiter()
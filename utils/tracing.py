@@ -0,0 +1,256 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from configs.settings import settings
+from utils.metrics import BROKER_SECONDS, BROKER_ERRORS, SCHEDULER_JOB_SECONDS, SCHEDULER_JOB_RUNNING, SCHEDULER_JOB_OVERLAPS, endpoint_label
+
+# Span that HTTP calls on this thread/task are attributed to (see Tracer.install)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+
+class Span:
+    """
+    One stage of a trace. Wall time is measured by whoever awaits the stage;
+    CPU time, API calls and bytes are added from the worker threads running it
+    (thread-safe, repeated calls to the same stage accumulate).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self.api_calls = 0
+        self.api_bytes = 0
+        self.api_by_host: Dict[str, List[int]] = {}
+        self.candidates: Optional[int] = None
+        self.status = "ok"
+        self._lock = threading.Lock()
+
+    def add_cpu(self, seconds: float):
+        with self._lock:
+            self.cpu_ms += seconds * 1000.0
+
+    def add_api(self, host: str, nbytes: int):
+        with self._lock:
+            self.api_calls += 1
+            self.api_bytes += nbytes
+            calls_bytes = self.api_by_host.setdefault(host, [0, 0])
+            calls_bytes[0] += 1
+            calls_bytes[1] += nbytes
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_ms": round(self.wall_ms, 1),
+            "cpu_ms": round(self.cpu_ms, 1),
+            "api_calls": self.api_calls,
+            "api_bytes": self.api_bytes,
+            "api_by_host": {h: {"calls": c, "bytes": b} for h, (c, b) in self.api_by_host.items()},
+            "candidates": self.candidates,
+            "status": self.status,
+        }
+
+class Trace:
+    """One scan or scheduler job run: ordered stages plus totals."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now()
+        self.status = "running"
+        self.wall_ms = 0.0
+        self.candidates: Dict[str, int] = {}
+        self.spans: "OrderedDict[str, Span]" = OrderedDict()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name: str) -> Span:
+        with self._lock:
+            if name not in self.spans:
+                self.spans[name] = Span(name)
+            return self.spans[name]
+
+    def to_dict(self) -> dict:
+        spans = list(self.spans.values())
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "status": self.status,
+            "wall_ms": round(self.wall_ms, 1),
+            "cpu_ms": round(sum(s.cpu_ms for s in spans), 1),
+            "api_calls": sum(s.api_calls for s in spans),
+            "api_bytes": sum(s.api_bytes for s in spans),
+            "candidates": self.candidates,
+            "stages": {s.name: s.to_dict() for s in spans},
+        }
+
+class Tracer:
+    """
+    Built-in tracing for run_scan and the scheduler jobs.
+    - start()/finish() open a Trace for the current task (copied into child tasks).
+    - bind(span, fn) wraps a blocking callable so that, on the worker thread,
+      its CPU time and every HTTP request it makes are charged to `span`.
+    - install() hooks requests.Session.send once; both Alpaca SDKs (and the
+      Discord/webhook calls) go through it. Calls outside any span are not
+      traced, but every Alpaca request feeds the broker latency histogram.
+    The last settings.TRACE_KEEP finished traces are kept for /api/debug/traces.
+    """
+
+    def __init__(self, keep: int = None):
+        self.traces = deque(maxlen=keep or settings.TRACE_KEEP)
+        self._installed = False
+        self._running: Dict[str, int] = {}
+        self._jobs_lock = threading.Lock()
+
+    # --- API call accounting ---
+    def install(self):
+        if self._installed:
+            return
+        import requests
+        send = requests.Session.send
+
+        @functools.wraps(send)
+        def traced_send(session, request, **kwargs):
+            t0 = time.perf_counter()
+            parts = urlsplit(request.url)
+            broker = (parts.hostname or "").endswith("alpaca.markets")
+            try:
+                resp = send(session, request, **kwargs)
+            except Exception:
+                if broker: BROKER_ERRORS.inc(method=request.method, endpoint=endpoint_label(parts.path))
+                raise
+            if broker:
+                endpoint = endpoint_label(parts.path)
+                BROKER_SECONDS.observe(time.perf_counter() - t0, method=request.method, endpoint=endpoint)
+                if resp.status_code >= 400:
+                    BROKER_ERRORS.inc(method=request.method, endpoint=endpoint)
+            span = _current_span.get()
+            if span is not None:
+                try:
+                    nbytes = 0 if kwargs.get("stream") else len(resp.content or b"")
+                    span.add_api(parts.hostname or "?", nbytes)
+                except Exception:
+                    pass
+            return resp
+
+        requests.Session.send = traced_send
+        self._installed = True
+
+    # --- Traces ---
+    def start(self, name: str) -> Trace:
+        trace = Trace(name)
+        _current_trace.set(trace)
+        return trace
+
+    def current(self) -> Optional[Trace]:
+        return _current_trace.get()
+
+    def finish(self, trace: Trace, status: str = "ok"):
+        trace.wall_ms = (time.perf_counter() - trace._t0) * 1000.0
+        trace.status = status
+        self.traces.append(trace)
+
+    def active_span(self) -> Optional[Span]:
+        """Span the current thread is charged to (inside bind()), if any."""
+        return _current_span.get()
+
+    def span(self, name: str) -> Optional[Span]:
+        """Span `name` on the current trace (None when not tracing)."""
+        trace = _current_trace.get()
+        return trace.span(name) if trace is not None else None
+
+    @contextmanager
+    def timed(self, name: str):
+        """Wall time of an inline (possibly awaiting) block; yields its span or None."""
+        span = self.span(name)
+        t0 = time.perf_counter()
+        try:
+            yield span
+        except Exception:
+            if span is not None: span.status = "error"
+            raise
+        finally:
+            if span is not None:
+                span.wall_ms += (time.perf_counter() - t0) * 1000.0
+
+    def bind(self, span: Optional[Span], fn):
+        """Blocking callable charged to `span` on whichever thread runs it."""
+        if span is None:
+            return fn
+
+        @functools.wraps(fn)
+        def traced(*args, **kwargs):
+            token = _current_span.set(span)
+            c0 = time.thread_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                span.add_cpu(time.thread_time() - c0)
+                _current_span.reset(token)
+        return traced
+
+    def _job_started(self, name: str):
+        with self._jobs_lock:
+            if self._running.get(name, 0) > 0:
+                SCHEDULER_JOB_OVERLAPS.inc(job=name, kind="concurrent")
+            self._running[name] = self._running.get(name, 0) + 1
+            SCHEDULER_JOB_RUNNING.set(self._running[name], job=name)
+
+    def _job_finished(self, name: str, trace: Trace, status: str):
+        with self._jobs_lock:
+            self._running[name] -= 1
+            SCHEDULER_JOB_RUNNING.set(self._running[name], job=name)
+        self.finish(trace, status)
+        SCHEDULER_JOB_SECONDS.observe(trace.wall_ms / 1000.0, job=name, status=status)
+
+    def job(self, name: str):
+        """
+        Decorator for scheduler jobs: each run is its own trace (one 'run' stage for
+        sync jobs), plus duration / in-progress / overlap metrics per job.
+        """
+        def wrap(fn):
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def traced_async(*args, **kwargs):
+                    trace = self.start(f"job:{name}")
+                    self._job_started(name)
+                    status = "ok"
+                    try:
+                        return await fn(*args, **kwargs)
+                    except Exception:
+                        status = "error"
+                        raise
+                    finally:
+                        self._job_finished(name, trace, status)
+                return traced_async
+
+            @functools.wraps(fn)
+            def traced_sync(*args, **kwargs):
+                # Runs on a pool thread: the context var is reset so it can't leak to the next job
+                trace = Trace(f"job:{name}")
+                token = _current_trace.set(trace)
+                self._job_started(name)
+                status = "ok"
+                t0 = time.perf_counter()
+                try:
+                    return self.bind(trace.span("run"), fn)(*args, **kwargs)
+                except Exception:
+                    status = "error"
+                    raise
+                finally:
+                    trace.span("run").wall_ms = (time.perf_counter() - t0) * 1000.0
+                    _current_trace.reset(token)
+                    self._job_finished(name, trace, status)
+            return traced_sync
+        return wrap
+
+    def recent(self, limit: int = 20, name: Optional[str] = None) -> List[dict]:
+        traces = [t for t in list(self.traces) if name is None or t.name == name]
+        return [t.to_dict() for t in reversed(traces[-limit:])] if limit > 0 else []
+
+tracer = Tracer()
@@ -38,6 +38,16 @@ export const api = {
             throw error;
         }
     },
+    getLatestScan: async (since = null) => {
+        // Reads the scan store (no scan). With `since`, returns only the delta.
+        try {
+            const res = await axiosInstance.get(`/scan/latest`, { params: since === null ? {} : { since } });
+            return res.data;
+        } catch (error) {
+            console.error("Fetch Latest Scan Failed", error);
+            return null;
+        }
+    },
     getUploads: async () => {
         try {
             const res = await axiosInstance.get(`/upload/list`);
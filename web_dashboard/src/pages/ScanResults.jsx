@@ -1,16 +1,55 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { api } from '../api';
 import { Play, RefreshCw, Send, CheckCircle } from 'lucide-react';
 
+const REFRESH_MS = 30000;
+
+// Applies a /scan/latest delta to the local snapshot ({section: {key: candidate}})
+const applyDelta = (sections, delta) => {
+    const next = { ...sections };
+    const touched = new Set([
+        ...Object.keys(delta.added),
+        ...Object.keys(delta.changed),
+        ...Object.keys(delta.removed),
+        ...Object.keys(delta.order),
+    ]);
+    touched.forEach((section) => {
+        const merged = { ...(next[section] || {}), ...(delta.added[section] || {}), ...(delta.changed[section] || {}) };
+        (delta.removed[section] || []).forEach((key) => delete merged[key]);
+        const order = delta.order[section] || Object.keys(merged);
+        next[section] = Object.fromEntries(order.filter((key) => key in merged).map((key) => [key, merged[key]]));
+    });
+    return next;
+};
+
 const ScanPage = () => {
-    const [results, setResults] = useState(null);
+    const [sections, setSections] = useState(null);
     const [scanning, setScanning] = useState(false);
+    const versionRef = useRef(null);
+
+    // Reads the scan store: full snapshot first, then only deltas
+    const refresh = useCallback(async () => {
+        const data = await api.getLatestScan(versionRef.current);
+        if (!data || data.version === 0) return;
+        if (data.full) {
+            setSections(data.sections);
+        } else if (data.version !== versionRef.current) {
+            setSections((prev) => applyDelta(prev || {}, data));
+        }
+        versionRef.current = data.version;
+    }, []);
+
+    useEffect(() => {
+        refresh();
+        const timer = setInterval(refresh, REFRESH_MS);
+        return () => clearInterval(timer);
+    }, [refresh]);
 
     const handleScan = async () => {
         setScanning(true);
         try {
-            const data = await api.runScan();
-            setResults(data);
+            await api.runScan();
+            await refresh();
         } catch (e) {
             alert("Scan failed. Check backend console.");
         } finally {
@@ -18,6 +57,10 @@ const ScanPage = () => {
         }
     };
 
+    const results = sections && Object.fromEntries(
+        Object.entries(sections).map(([section, byKey]) => [section, Object.values(byKey)])
+    );
+
     return (
         <div className="p-6 space-y-6">
             <div className="flex items-center justify-between">